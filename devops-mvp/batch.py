@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from cache import normalize_repo_url
+
+# Analyses simultanées d'un lot, tous hôtes confondus
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+# Analyses simultanées d'un lot vers un même hôte (github.com, gitlab interne...)
+BATCH_PER_HOST_CONCURRENCY = int(os.getenv("BATCH_PER_HOST_CONCURRENCY", 2))
+BATCH_MAX_REPOSITORIES = int(os.getenv("BATCH_MAX_REPOSITORIES", 1000))
+
+# Tranches de 10 points du health score, 100 % compté avec 90-100
+HEALTH_BUCKETS = [f"{low}-{low + 9}" for low in range(0, 90, 10)] + ["90-100"]
+
+
+def repo_host(repo_url):
+    """Hôte d'une URL de repository ; chaîne vide pour les chemins locaux."""
+    return urlsplit(normalize_repo_url(repo_url)).netloc
+
+
+class BatchSummary:
+    """Statistiques agrégées d'un lot, publiées sur la dernière ligne NDJSON."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.succeeded = 0
+        self.failed = 0
+        self.cached = 0
+        self.languages = Counter()
+        self.frameworks = Counter()
+        self.health_histogram = dict.fromkeys(HEALTH_BUCKETS, 0)
+
+    def add(self, result):
+        if result.get("status") != "success":
+            self.failed += 1
+            return
+        self.succeeded += 1
+        if result.get("cached"):
+            self.cached += 1
+        analysis = result.get("analysis") or {}
+        self.languages[analysis.get("language") or "Unknown"] += 1
+        self.frameworks[analysis.get("framework") or "None"] += 1
+        percentage = (analysis.get("health_score") or {}).get("percentage")
+        if percentage is not None:
+            self.health_histogram[HEALTH_BUCKETS[min(int(percentage) // 10, 9)]] += 1
+
+    def to_dict(self):
+        elapsed = time.time() - self.started_at
+        total = self.succeeded + self.failed
+        return {
+            "type": "summary",
+            "repositories": total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cached": self.cached,
+            "elapsed_seconds": round(elapsed, 3),
+            "repos_per_minute": round(total / elapsed * 60, 2) if elapsed > 0 else None,
+            "languages": dict(self.languages.most_common()),
+            "frameworks": dict(self.frameworks.most_common()),
+            "health_histogram": dict(self.health_histogram),
+        }
+
+
+async def run_batch(repo_urls, analyze, concurrency=BATCH_CONCURRENCY, per_host=BATCH_PER_HOST_CONCURRENCY):
+    """Analyse `repo_urls` en parallèle et produit chaque résultat dès qu'il est prêt.
+
+    `analyze(repo_url)` est une coroutine renvoyant le dict de résultat ; ses
+    exceptions sont converties en résultat d'erreur pour ne pas interrompre le
+    lot. Le dernier élément produit est le résumé (BatchSummary).
+    """
+    global_slots = asyncio.Semaphore(concurrency)
+    host_slots = {}
+    results = asyncio.Queue()
+    summary = BatchSummary()
+
+    async def analyze_one(repo_url):
+        host = repo_host(repo_url)
+        slots = host_slots.setdefault(host, asyncio.Semaphore(per_host))
+        # Le créneau de l'hôte d'abord : un hôte saturé ne bloque pas les autres
+        async with slots, global_slots:
+            try:
+                result = await analyze(repo_url)
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+        await results.put({"type": "result", "repo_url": repo_url, **result})
+
+    tasks = [asyncio.create_task(analyze_one(url)) for url in repo_urls]
+    try:
+        for _ in tasks:
+            result = await results.get()
+            summary.add(result)
+            yield result
+        yield summary.to_dict()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def format_ndjson(item):
+    return json.dumps(item) + "\n"
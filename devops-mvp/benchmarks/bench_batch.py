@@ -0,0 +1,113 @@
+"""Débit de `/analyze-batch` comparé à des POST `/analyze-repo` séquentiels.
+
+Usage :
+    python benchmarks/bench_batch.py [--repos 60] [--files 200]
+
+Génère `--repos` repositories bare locaux (Flask, FastAPI, Django, Express),
+démarre uvicorn, puis mesure en repos/minute l'analyse séquentielle et
+l'analyse par lot (NDJSON). Les deux passes utilisent force=true.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_fetch import git  # noqa: E402
+from load_home_latency import free_port  # noqa: E402
+
+FLAVOURS = [
+    {"requirements.txt": "flask==2.3.0\n", "app.py": "from flask import Flask\napp = Flask(__name__)\n"},
+    {"requirements.txt": "fastapi==0.104.1\nuvicorn==0.24.0\n", "main.py": "from fastapi import FastAPI\napp = FastAPI()\n"},
+    {"requirements.txt": "django==4.2\n", "manage.py": "import django\n"},
+    {"package.json": '{"dependencies": {"express": "^4.18.0"}}\n', "index.js": "const express = require('express');\n"},
+]
+
+
+def build_fixtures(root, repos, files):
+    urls = []
+    for index in range(repos):
+        work = os.path.join(root, f"work{index}")
+        for rel, content in FLAVOURS[index % len(FLAVOURS)].items():
+            os.makedirs(os.path.dirname(os.path.join(work, rel)), exist_ok=True)
+            with open(os.path.join(work, rel), "w") as f:
+                f.write(content)
+        for i in range(files):
+            d = os.path.join(work, "src", f"pkg{i % 10}")
+            os.makedirs(d, exist_ok=True)
+            with open(os.path.join(d, f"m{i}.py"), "w") as f:
+                f.write(f"def f{i}():\n    return {i}\n")
+        git("init", "-q", "-b", "main", cwd=work)
+        git("add", "-A", cwd=work)
+        git("commit", "-q", "-m", "initial", cwd=work)
+        bare = os.path.join(root, f"repo{index}.git")
+        git("clone", "-q", "--bare", work, bare, cwd=root)
+        git("config", "uploadpack.allowFilter", "true", cwd=bare)
+        shutil.rmtree(work)
+        urls.append("file://" + bare)
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=60)
+    parser.add_argument("--files", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_batch_")
+    port = free_port()
+    env = dict(os.environ, MIRROR_ROOT=os.path.join(workdir, "mirrors"))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        urls = build_fixtures(workdir, args.repos, args.files)
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        with httpx.Client(base_url=base_url, timeout=600) as client:
+            start = time.perf_counter()
+            for url in urls:
+                client.post("/analyze-repo", data={"repo_url": url, "force": "true"})
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            first_line = None
+            lines = []
+            with client.stream("POST", "/analyze-batch", json={"repo_urls": urls, "force": True}) as response:
+                for line in response.iter_lines():
+                    if line:
+                        first_line = first_line or time.perf_counter() - start
+                        lines.append(json.loads(line))
+            batch = time.perf_counter() - start
+
+        print(json.dumps({
+            "repositories": len(urls),
+            "sequential_repos_per_minute": round(len(urls) / sequential * 60, 1),
+            "batch_repos_per_minute": round(len(urls) / batch * 60, 1),
+            "batch_first_result_seconds": round(first_line, 3),
+            "summary": lines[-1],
+        }, indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
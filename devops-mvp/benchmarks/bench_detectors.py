@@ -0,0 +1,139 @@
+"""Temps de chaque détecteur et de l'analyse complète sur des repositories synthétiques.
+
+Usage :
+    python benchmarks/bench_detectors.py [--sizes 1k,10k] [--repeat 5] [--output results.json]
+                                         [--baseline benchmarks/baseline.json] [--threshold 0.5]
+                                         [--update-baseline] [--git]
+
+Chaque mesure est le meilleur temps de `--repeat` exécutions (comme timeit :
+le bruit de la machine ne fait qu'allonger les mesures), après une
+exécution d'échauffement, chacune sur un snapshot neuf (le parcours n'est
+pas compté, sauf pour `walk` et `end_to_end`). Avec `--baseline`, le script échoue (code 1) si une mesure
+dépasse la référence de plus de `--threshold` (et d'au moins `--min-delta`
+secondes, pour ignorer le bruit des mesures très courtes).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import main  # noqa: E402
+from snapshot import RepoSnapshot  # noqa: E402
+from synthetic import generate_repo, make_git_remote  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Tailles de fixtures disponibles : nombre de fichiers source et annexes
+SIZES = {
+    "1k": {"files": 1_000, "large_files": 2, "binary_files": 10, "vendor_files": 500},
+    "10k": {"files": 10_000, "large_files": 5, "binary_files": 20, "vendor_files": 5_000},
+    "100k": {"files": 100_000, "large_files": 10, "binary_files": 50, "vendor_files": 20_000},
+    "500k": {"files": 500_000, "large_files": 20, "binary_files": 100, "vendor_files": 50_000},
+}
+
+DETECTORS = {
+    "detect_language": lambda snapshot, framework: main.detect_language(snapshot),
+    "detect_framework": lambda snapshot, framework: main.detect_framework(snapshot),
+    "detect_dependencies": lambda snapshot, framework: main.detect_dependencies(snapshot),
+    "detect_imports": lambda snapshot, framework: main.detect_imports(snapshot),
+    "detect_port": lambda snapshot, framework: main.detect_port(snapshot, framework=framework),
+    "calculate_health_score": lambda snapshot, framework: main.calculate_health_score(snapshot),
+    "analyze_storage_costs": lambda snapshot, framework: main.analyze_storage_costs(snapshot),
+}
+
+
+def best_time(fn, repeat, setup=None):
+    # Une exécution d'échauffement (cache disque, imports paresseux) non comptée
+    fn(setup() if setup else None)
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return round(min(timings), 6)
+
+
+def bench_fixture(root, repeat, url=None):
+    framework = main.detect_framework(RepoSnapshot(root))
+    results = {"walk": best_time(lambda _: RepoSnapshot(root), repeat)}
+    for name, detector in DETECTORS.items():
+        results[name] = best_time(lambda snapshot: detector(snapshot, framework), repeat,
+                                    setup=lambda: RepoSnapshot(root))
+    # Ce que fait /analyze-repo une fois le checkout terminé
+    results["end_to_end"] = best_time(lambda _: main.analyze_snapshot(RepoSnapshot(root)), repeat)
+    if url:
+        results["end_to_end_git"] = best_time(lambda _: main.analyze_repository_job(url, force=True), repeat)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Liste des régressions (taille, mesure, référence, valeur) par rapport à `baseline`."""
+    regressions = []
+    for size, measures in results.items():
+        for name, value in measures.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            if value > reference * (1 + threshold) and value - reference > min_delta:
+                regressions.append({"size": size, "measure": name, "baseline": reference, "value": value})
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", help="référence à comparer (défaut : aucune)")
+    parser.add_argument("--threshold", type=float, default=0.5, help="dépassement relatif toléré")
+    parser.add_argument("--min-delta", type=float, default=0.02, help="dépassement absolu minimal (s)")
+    parser.add_argument("--update-baseline", action="store_true", help=f"écrire les résultats dans {DEFAULT_BASELINE}")
+    parser.add_argument("--git", action="store_true", help="mesurer aussi l'analyse avec clone (file://)")
+    args = parser.parse_args()
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="bench_detectors_")
+    try:
+        for size in args.sizes.split(","):
+            root = os.path.join(workdir, size)
+            start = time.perf_counter()
+            generate_repo(root, **SIZES[size])
+            print(f"fixture {size} générée en {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            url = make_git_remote(root) if args.git else None
+            results[size] = bench_fixture(root, args.repeat, url)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "repeat": args.repeat},
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        report["regressions"] = compare(results, baseline, args.threshold, args.min_delta)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.update_baseline:
+        with open(DEFAULT_BASELINE, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if report.get("regressions"):
+        print(f"{len(report['regressions'])} régression(s) détectée(s)", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,133 @@
+"""Compare clone complet, clone sparse et miroir local sur un gros repository bare.
+
+Usage :
+    python benchmarks/bench_fetch.py [--files 5000] [--commits 20] [--blob-kb 256]
+
+Le volume transféré est mesuré par la taille de .git/objects après le clone
+(ou par la croissance du miroir), et le temps par l'horloge murale. Le miroir
+est mesuré à froid (création) puis à chaud (fetch incrémental + worktree).
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402,F401  (enregistre les fichiers requis par les détecteurs)
+from fetching import checkout_for_analysis, clone_for_analysis  # noqa: E402
+from mirrors import mirror_store  # noqa: E402
+
+
+def git(*args, cwd):
+    subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+def build_fixture(root, files, commits, blob_kb, seed=42):
+    """Repository avec historique, sources Python et gros fichiers binaires."""
+    rng = random.Random(seed)
+    work = os.path.join(root, "work")
+    os.makedirs(work)
+    git("init", "-q", "-b", "main", cwd=work)
+    with open(os.path.join(work, "requirements.txt"), "w") as f:
+        f.write("fastapi==0.104.1\npytest==7.4.0\n")
+    for commit in range(commits):
+        for i in range(files // commits):
+            d = os.path.join(work, f"pkg{i % 50}", f"mod{i % 7}")
+            os.makedirs(d, exist_ok=True)
+            with open(os.path.join(d, f"f{commit}_{i}.py"), "w") as f:
+                f.write(f"import os\n\ndef f{i}():\n    return {rng.random()}\n")
+        # Un gros binaire réécrit à chaque commit : gonfle l'historique
+        data = os.path.join(work, "assets")
+        os.makedirs(data, exist_ok=True)
+        with open(os.path.join(data, "model.bin"), "wb") as f:
+            f.write(rng.randbytes(blob_kb * 1024))
+        git("add", "-A", cwd=work)
+        git("commit", "-q", "-m", f"commit {commit}", cwd=work)
+    bare = os.path.join(root, "fixture.git")
+    git("clone", "-q", "--bare", work, bare, cwd=root)
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    shutil.rmtree(work)
+    return "file://" + bare
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def measure(url, mode, workdir):
+    dest = os.path.join(workdir, mode)
+    start = time.perf_counter()
+    snapshot = clone_for_analysis(url, dest, mode=mode)
+    elapsed = time.perf_counter() - start
+    result = {
+        "mode": mode,
+        "wall_seconds": round(elapsed, 3),
+        "object_bytes": dir_size(os.path.join(dest, ".git", "objects")),
+        "worktree_bytes": dir_size(dest) - dir_size(os.path.join(dest, ".git")),
+        "files_in_snapshot": len(snapshot.files),
+    }
+    shutil.rmtree(dest)
+    return result
+
+
+def measure_mirror(url, label, workdir):
+    dest = os.path.join(workdir, label)
+    before = mirror_store.total_bytes()
+    start = time.perf_counter()
+    with checkout_for_analysis(url, dest, mode="mirror") as snapshot:
+        elapsed = time.perf_counter() - start
+        worktree_bytes = dir_size(dest)
+        files = len(snapshot.files)
+    return {
+        "mode": label,
+        "wall_seconds": round(elapsed, 3),
+        "object_bytes": mirror_store.total_bytes() - before,
+        "worktree_bytes": worktree_bytes,
+        "files_in_snapshot": files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--commits", type=int, default=20)
+    parser.add_argument("--blob-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_fetch_")
+    try:
+        url = build_fixture(workdir, args.files, args.commits, args.blob_kb)
+        mirror_store.root = os.path.join(workdir, "mirrors")
+        results = [measure(url, mode, workdir) for mode in ("full", "sparse")]
+        results.append(measure_mirror(url, "mirror_cold", workdir))
+        results.append(measure_mirror(url, "mirror_warm", workdir))
+        full, sparse = results[:2]
+        print(json.dumps({
+            "fixture": vars(args),
+            "results": results,
+            "bytes_ratio": round(sparse["object_bytes"] / max(full["object_bytes"], 1), 4),
+            "speedup": round(full["wall_seconds"] / max(sparse["wall_seconds"], 1e-6), 2),
+            "warm_mirror_speedup": round(full["wall_seconds"] / max(results[3]["wall_seconds"], 1e-6), 2),
+        }, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Temps de l'identification des frameworks selon le nombre de signatures.
+
+Usage :
+    python benchmarks/bench_frameworks.py [--files 20000] [--signatures 0,1000,100000]
+
+Génère en mémoire des fichiers Python, JavaScript, Java et Go qui importent
+chacun une dizaine de modules, puis chronomètre frameworks.imported_frameworks
+sur l'ensemble après avoir ajouté à la table des imports le nombre de
+signatures synthétiques demandé : le temps ne dépend pas de ce nombre.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frameworks  # noqa: E402
+
+SOURCES = {
+    ".py": "import os\nfrom django.db import models\nfrom app.utils import helper\nimport requests\n",
+    ".ts": "import React from 'react'\nimport { x } from './local'\nconst express = require('express')\n",
+    ".java": "import java.util.List;\nimport org.springframework.boot.SpringApplication;\nimport com.acme.Tool;\n",
+    ".go": 'import (\n\t"fmt"\n\t"github.com/gin-gonic/gin"\n\t"example.com/internal/db"\n)\n',
+}
+
+
+def corpus(files):
+    exts = list(SOURCES)
+    body = "\n".join(f"value_{n} = {n}" for n in range(40)).encode()
+    return [(f"src/f{n}{exts[n % len(exts)]}", SOURCES[exts[n % len(exts)]].encode() + body) for n in range(files)]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--signatures", default="0,1000,100000")
+    args = parser.parse_args()
+
+    files = corpus(args.files)
+    original = frameworks.IMPORTS
+    results = []
+    for count in (int(value) for value in args.signatures.split(",")):
+        frameworks.IMPORTS = {**original, **{
+            (ecosystem, f"org.synthetic{n}.module"): (f"Synthetic {n}",)
+            for n in range(count) for ecosystem in ("python", "jvm")}}
+        start = time.perf_counter()
+        found = sum(len(frameworks.imported_frameworks(path, buffer)) for path, buffer in files)
+        results.append({
+            "signatures": len(frameworks.IMPORTS),
+            "files": len(files),
+            "frameworks_found": found,
+            "seconds": round(time.perf_counter() - start, 3),
+        })
+    frameworks.IMPORTS = original
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,90 @@
+"""Temps et pic mémoire de l'analyse de taille de l'historique (history_size).
+
+Usage :
+    python benchmarks/bench_history.py [--blobs 1000000] [--per-commit 1000]
+
+Génère par `git fast-import` un repository bare dont l'historique contient
+`--blobs` blobs distincts (dont quelques binaires volumineux réécrits à
+chaque commit), puis mesure le temps de history_size et le pic mémoire
+Python (tracemalloc), qui ne dépend pas du nombre d'objets.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import history_size  # noqa: E402
+from workers import Repo  # noqa: E402
+
+
+def fast_import_stream(blobs, per_commit):
+    """Flux fast-import : des commits de `per_commit` nouveaux fichiers, plus un binaire réécrit."""
+    mark = 0
+    for commit in range(-(-blobs // per_commit)):
+        lines = []
+        for n in range(commit * per_commit, min(blobs, (commit + 1) * per_commit)):
+            data = f"value_{n} = {n}\n".encode()
+            # Un dossier par commit : chaque commit ne modifie que quelques arbres
+            lines.append(b"M 644 inline src/%d/%d/f%d.py\ndata %d\n%s\n" % (commit % 50, commit, n, len(data), data))
+        blob = os.urandom(64 * 1024)
+        lines.append(b"M 644 inline assets/model.bin\ndata %d\n%s\n" % (len(blob), blob))
+        mark += 1
+        message = b"commit %d" % commit
+        yield (b"commit refs/heads/main\nmark :%d\ncommitter bench <bench@example.com> %d +0000\n"
+               b"data %d\n%s\n" % (mark, 1_700_000_000 + commit, len(message), message))
+        if commit:
+            yield b"from :%d\n" % (mark - 1)
+        yield b"".join(lines)
+
+
+def generate(root, blobs, per_commit):
+    subprocess.run(["git", "init", "-q", "--bare", root], check=True)
+    process = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=root, stdin=subprocess.PIPE)
+    for chunk in fast_import_stream(blobs, per_commit):
+        process.stdin.write(chunk)
+    process.stdin.close()
+    if process.wait():
+        raise RuntimeError("git fast-import a échoué")
+    subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=root, check=True)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blobs", type=int, default=1_000_000)
+    parser.add_argument("--per-commit", type=int, default=1000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_history_")
+    try:
+        root = os.path.join(workdir, "repo.git")
+        start = time.perf_counter()
+        generate(root, args.blobs, args.per_commit)
+        generated = time.perf_counter() - start
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = history_size(Repo(root))
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(json.dumps({
+            "blobs": size["history"]["blobs"],
+            "pack_bytes": size["objects"]["pack_bytes"],
+            "generation_seconds": round(generated, 1),
+            "history_size_seconds": round(seconds, 2),
+            "python_peak_mb": round(peak / 1024 ** 2, 2),
+            "top_lfs_candidate": size["lfs_candidates"][0] if size["lfs_candidates"] else None,
+        }, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_cli()
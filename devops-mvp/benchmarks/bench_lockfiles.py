@@ -0,0 +1,87 @@
+"""Temps et pic mémoire de la lecture d'un gros package-lock.json.
+
+Usage :
+    python benchmarks/bench_lockfiles.py [--packages 20000,100000] [--repeat 3]
+
+Pour chaque taille, génère un package-lock.json (lockfileVersion 3) puis
+compare manifests.read_package_lock (lecture par blocs) à un json.load du
+fichier entier. Le temps est le meilleur de `--repeat` exécutions ; le pic
+mémoire est mesuré par tracemalloc lors d'une exécution séparée.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manifests import count_packages, read_package_lock  # noqa: E402
+
+
+def write_lockfile(path, packages):
+    entries = {"": {"name": "app", "version": "1.0.0"}}
+    for i in range(packages):
+        entries[f"node_modules/pkg{i}/node_modules/@scope/dep{i}"] = {
+            "version": f"1.{i}.0",
+            "resolved": f"https://registry.npmjs.org/@scope/dep{i}/-/dep{i}-1.{i}.0.tgz",
+            "integrity": "sha512-" + "A" * 86 + "==",
+            "dev": i % 3 == 0,
+            "dependencies": {"x": "^1.0.0", "y": "~2.3.4"},
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"name": "app", "lockfileVersion": 3, "requires": True, "packages": entries}, f, indent=2)
+
+
+def streaming(path):
+    with open(path, "rb") as f:
+        return count_packages(read_package_lock(f))["packages"]
+
+
+def whole_file(path):
+    with open(path, "rb") as f:
+        return len(json.load(f)["packages"]) - 1
+
+
+def measure(func, path, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func(path)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(timings), 3), "peak_mb": round(peak / 2**20, 1), "packages": count}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", default="20000,100000", help="tailles, séparées par des virgules")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_lockfiles_")
+    try:
+        results = {}
+        for packages in (int(n) for n in args.packages.split(",")):
+            path = os.path.join(workdir, f"package-lock-{packages}.json")
+            write_lockfile(path, packages)
+            results[packages] = {
+                "file_mb": round(os.path.getsize(path) / 2**20, 1),
+                "streaming": measure(streaming, path, args.repeat),
+                "json_load": measure(whole_file, path, args.repeat),
+            }
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_cli()
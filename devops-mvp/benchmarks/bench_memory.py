@@ -0,0 +1,99 @@
+"""Pic de mémoire (RSS) de l'analyse d'un repository contenant ~1 Go de texte.
+
+Usage :
+    python benchmarks/bench_memory.py [--total-mb 1024] [--file-mb 48]
+
+Génère de gros fichiers Python générés (bundles, données) plus un millier de
+petits fichiers, puis analyse le repository dans un processus fils, deux fois :
+`bounded` (réglages par défaut de fileaccess : mmap, plafond, cache borné) et
+`unbounded` (seuils relevés à l'infini : chaque fichier est lu entièrement en
+mémoire et conservé, comme avant la couche d'accès commune). Le pic RSS du
+fils est obtenu par os.wait4.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+
+UNBOUNDED = str(1 << 40)
+
+
+def build_fixture(root, total_mb, file_mb):
+    sys.path.insert(0, BENCH_DIR)
+    from synthetic import generate_repo
+
+    generate_repo(root, files=1000, mix={"python": 1})
+    line = b"DATA_%08d = ['" + b"x" * 100 + b"']\n"
+    chunk = b"".join(line % i for i in range(10000))
+    os.makedirs(os.path.join(root, "generated"), exist_ok=True)
+    for n in range(max(total_mb // file_mb, 1)):
+        with open(os.path.join(root, "generated", f"bundle_{n}.py"), "wb") as f:
+            written = 0
+            while written < file_mb * 1024 * 1024:
+                f.write(chunk)
+                written += len(chunk)
+
+
+def run_child(root, env):
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, __file__, "--child", root], cwd=APP_DIR, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = process.stdout.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    if status != 0:
+        raise RuntimeError(f"analyse en échec (statut {status})")
+    result = json.loads(output)
+    # ru_maxrss est en Ko sous Linux
+    result.update(peak_rss_mb=round(usage.ru_maxrss / 1024, 1), wall_seconds=round(time.perf_counter() - start, 2))
+    return result
+
+
+def child(root):
+    sys.path.insert(0, APP_DIR)
+    import main
+    from snapshot import RepoSnapshot
+
+    snapshot = RepoSnapshot(root)
+    analysis = main.analyze_snapshot(snapshot)
+    print(json.dumps({
+        "framework": analysis["framework"],
+        "dependencies": len(analysis["dependencies"]),
+        "files_read": snapshot.files_read,
+        "bytes_read_mb": round(snapshot.bytes_read / 1024 ** 2, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--total-mb", type=int, default=1024)
+    parser.add_argument("--file-mb", type=int, default=48)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    workdir = tempfile.mkdtemp(prefix="bench_memory_")
+    try:
+        root = os.path.join(workdir, "repo")
+        build_fixture(root, args.total_mb, args.file_mb)
+        env = dict(os.environ, LOG_LEVEL="WARNING")
+        unbounded = dict(env, ANALYSIS_MMAP_THRESHOLD=UNBOUNDED, ANALYSIS_READ_MAX_BYTES=UNBOUNDED,
+                         ANALYSIS_CONTENT_CACHE_BYTES=UNBOUNDED)
+        print(json.dumps({
+            "text_mb": args.total_mb,
+            "bounded": run_child(root, env),
+            "unbounded": run_child(root, unbounded),
+        }, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Taille sur le réseau et temps de sérialisation des réponses d'analyse.
+
+Usage :
+    python benchmarks/bench_responses.py [--files 15000] [--page 1000] [--repeat 20]
+
+Analyse un monorepo Python synthétique (`synthetic.py`) puis mesure, pour le
+résultat de /analyze-repo et pour une page de GET /imports, la taille et le
+temps de production du corps : json (réglages de FastAPI), orjson, msgpack,
+puis gzip et brotli sur le JSON. Les encodeurs absents sont ignorés.
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import main  # noqa: E402
+import responses  # noqa: E402
+from imports import import_page  # noqa: E402
+from snapshot import RepoSnapshot  # noqa: E402
+from synthetic import generate_repo  # noqa: E402
+
+
+def encoders():
+    found = {"json": lambda content: json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")}
+    if responses.orjson:
+        found["orjson"] = lambda content: responses.orjson.dumps(content, option=responses.orjson.OPT_NON_STR_KEYS)
+    if responses.msgpack:
+        found["msgpack"] = lambda content: responses.msgpack.packb(content, use_bin_type=True)
+    return found
+
+
+def compressors():
+    found = {"gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0)}
+    if responses.brotli:
+        found["br"] = responses.COMPRESSORS["br"]
+    return found
+
+
+def best_time(fn, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def measure(content, repeat):
+    results = {}
+    for name, encode in encoders().items():
+        seconds, body = best_time(encode, content, repeat)
+        results[name] = {"bytes": len(body), "ms": round(seconds * 1000, 2)}
+    body = encoders()["orjson" if responses.orjson else "json"](content)
+    for name, compress in compressors().items():
+        seconds, compressed = best_time(compress, body, repeat)
+        results[f"json+{name}"] = {"bytes": len(compressed), "ms": round(seconds * 1000, 2)}
+    reference = results["json"]["bytes"]
+    for measure_ in results.values():
+        measure_["ratio"] = round(measure_["bytes"] / reference, 3)
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=15_000)
+    parser.add_argument("--page", type=int, default=1000, help="taille de la page de GET /imports")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_responses_")
+    try:
+        root = os.path.join(workdir, "repo")
+        generate_repo(root, files=args.files, mix={"python": 1})
+        snapshot = RepoSnapshot(root)
+        analysis = main.analyze_snapshot(snapshot)
+        result = {"status": "success", "analysis": analysis, "commit": "0" * 40, "cached": False}
+        file_imports = main._file_imports(main.content_facts(snapshot))
+        page = import_page(file_imports, limit=args.page)
+        print(json.dumps({
+            "files": args.files,
+            "analyze_repo": measure(result, args.repeat),
+            "imports_page": measure(page, args.repeat),
+        }, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_cli()
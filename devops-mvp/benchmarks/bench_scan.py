@@ -0,0 +1,77 @@
+"""Accélération de la passe de lecture du contenu selon le nombre de processus.
+
+Usage :
+    python benchmarks/bench_scan.py [--files 200000] [--workers 1,2,4] [--repeat 3]
+
+Génère un monorepo synthétique (`synthetic.py`), puis chronomètre
+scanning.scan_contents avec les règles de l'analyse pour chaque nombre de
+processus (par défaut 1, 2, 4... jusqu'au nombre de cœurs). Chaque mesure
+est le meilleur temps de `--repeat` exécutions sur un snapshot neuf, le
+pool de processus étant démarré par une exécution d'échauffement.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import main  # noqa: E402
+import scanning  # noqa: E402
+from snapshot import RepoSnapshot  # noqa: E402
+from synthetic import generate_repo  # noqa: E402
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def time_scan(root, workers, repeat):
+    # Toujours en parallèle au-delà d'un processus, quelle que soit la taille
+    scanning.SCAN_PARALLEL_MIN_FILES = 1
+    scanning.scan_contents(RepoSnapshot(root), main.CONTENT_SELECTORS, workers=workers)
+    timings = []
+    for _ in range(repeat):
+        snapshot = RepoSnapshot(root)
+        start = time.perf_counter()
+        facts = scanning.scan_contents(snapshot, main.CONTENT_SELECTORS, workers=workers)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(facts)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--workers", help="nombres de processus, séparés par des virgules")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else default_workers()
+
+    workdir = tempfile.mkdtemp(prefix="bench_scan_")
+    try:
+        root = os.path.join(workdir, "repo")
+        generate_repo(root, files=args.files, mix={"python": 8, "javascript": 1, "go": 1})
+        results = {}
+        for workers in counts:
+            seconds, scanned = time_scan(root, workers, args.repeat)
+            results[workers] = {"seconds": round(seconds, 3), "files": scanned}
+        serial = results[counts[0]]["seconds"]
+        for measure in results.values():
+            measure["speedup"] = round(serial / measure["seconds"], 2)
+        print(json.dumps({"cpu_count": os.cpu_count(), "files": args.files, "workers": results}, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_cli()
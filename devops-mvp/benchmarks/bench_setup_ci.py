@@ -0,0 +1,96 @@
+"""Temps de /setup-ci (commit par plumbing) face à l'ancien clone + `git add -A`.
+
+Usage :
+    python benchmarks/bench_setup_ci.py [--size-mb 1024] [--files 2000]
+
+Génère par `git fast-import` un repository bare local (URL file://) de
+`--size-mb` Mo de contenu incompressible réparti en `--files` fichiers, puis
+chronomètre l'ajout du workflow CI poussé sur une nouvelle branche :
+clone superficiel avec checkout, `git add -A`, commit et push (ancienne
+méthode), puis setup_ci_job en mode shallow (clone bare sans blobs) et en
+mode mirror (miroir froid puis déjà présent).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fetching  # noqa: E402
+import main  # noqa: E402
+from mirrors import mirror_store  # noqa: E402
+
+IDENTITY = {"GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@example.com",
+            "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@example.com"}
+
+
+def generate(root, size_mb, files):
+    subprocess.run(["git", "init", "-q", "--bare", "-b", "main", root], check=True)
+    subprocess.run(["git", "config", "uploadpack.allowFilter", "true"], cwd=root, check=True)
+    process = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=root, stdin=subprocess.PIPE)
+    message = b"initial"
+    process.stdin.write(b"commit refs/heads/main\ncommitter bench <bench@example.com> 1700000000 +0000\n"
+                        b"data %d\n%s\n" % (len(message), message))
+    main_py = b"print('hello')\n"
+    process.stdin.write(b"M 644 inline main.py\ndata %d\n%s\n" % (len(main_py), main_py))
+    size = size_mb * 1024 * 1024 // files
+    for n in range(files):
+        data = os.urandom(size)
+        process.stdin.write(b"M 644 inline assets/%d/blob%d.bin\ndata %d\n%s\n" % (n % 100, n, len(data), data))
+    process.stdin.close()
+    if process.wait():
+        raise RuntimeError("git fast-import a échoué")
+
+
+def legacy(url, workdir, branch):
+    """Ancienne méthode : checkout complet, écriture du fichier, `git add -A`, commit, push."""
+    work = os.path.join(workdir, "legacy")
+    subprocess.run(["git", "clone", "-q", "--depth=1", url, work], check=True)
+    os.makedirs(os.path.join(work, ".github", "workflows"))
+    with open(os.path.join(work, ".github", "workflows", "ci.yml"), "w") as f:
+        f.write(main.generate_github_action(["main.py"]))
+    for args in (["add", "-A"], ["commit", "-q", "-m", main.CI_COMMIT_MESSAGE],
+                 ["push", "-q", "origin", f"HEAD:refs/heads/{branch}"]):
+        subprocess.run(["git", *args], cwd=work, check=True)
+    shutil.rmtree(work)
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return round(time.perf_counter() - start, 2)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--files", type=int, default=2000)
+    args = parser.parse_args()
+    os.environ.update(IDENTITY)
+
+    workdir = tempfile.mkdtemp(prefix="bench_setup_ci_")
+    try:
+        root = os.path.join(workdir, "remote.git")
+        generate(root, args.size_mb, args.files)
+        url = "file://" + root
+        mirror_store.root = os.path.join(workdir, "mirrors")
+
+        results = {"size_mb": args.size_mb, "files": args.files + 1}
+        results["legacy_clone_add_commit_push_seconds"] = timed(lambda: legacy(url, workdir, "bench/legacy"))
+        fetching.FETCH_MODE = "shallow"
+        results["plumbing_shallow_seconds"] = timed(lambda: main.setup_ci_job(url, "bench/shallow"))
+        fetching.FETCH_MODE = "mirror"
+        results["plumbing_mirror_cold_seconds"] = timed(lambda: main.setup_ci_job(url, "bench/mirror-cold"))
+        results["plumbing_mirror_warm_seconds"] = timed(lambda: main.setup_ci_job(url, "bench/mirror-warm"))
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_cli()
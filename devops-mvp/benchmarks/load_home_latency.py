@@ -0,0 +1,127 @@
+"""Latence de la page d'accueil pendant 20 analyses concurrentes.
+
+Usage :
+    python benchmarks/load_home_latency.py [--analyses 20] [--files 3000]
+
+Démarre uvicorn sur un port libre, mesure la latence de `GET /` au repos,
+puis pendant que `--analyses` requêtes `/analyze-repo` (force=true) tournent
+sur un repository bare local généré. Affiche p50/p99 pour les deux phases.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_fetch import build_fixture  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def sample_home(base_url, stop, samples):
+    with httpx.Client(base_url=base_url) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get("/")
+            samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+
+def summarize(samples):
+    return {
+        "requests": len(samples),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=20)
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--idle-seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    port = free_port()
+    env = dict(
+        os.environ,
+        MIRROR_ROOT=os.path.join(workdir, "mirrors"),
+        MAX_QUEUED_ANALYSES=str(args.analyses),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        url = build_fixture(workdir, args.files, 5, 64)
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        idle, stop = [], threading.Event()
+        sampler = threading.Thread(target=sample_home, args=(base_url, stop, idle))
+        sampler.start()
+        time.sleep(args.idle_seconds)
+        stop.set()
+        sampler.join()
+
+        busy, stop = [], threading.Event()
+        sampler = threading.Thread(target=sample_home, args=(base_url, stop, busy))
+        statuses = []
+
+        def analyze():
+            response = httpx.post(base_url + "/analyze-repo", data={"repo_url": url, "force": "true"}, timeout=600)
+            statuses.append(response.status_code)
+
+        workers = [threading.Thread(target=analyze) for _ in range(args.analyses)]
+        start = time.perf_counter()
+        sampler.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        sampler.join()
+
+        print(json.dumps({
+            "analyses": args.analyses,
+            "analysis_statuses": {str(code): statuses.count(code) for code in set(statuses)},
+            "analyses_wall_seconds": round(elapsed, 2),
+            "home_idle": summarize(idle),
+            "home_during_analyses": summarize(busy),
+        }, indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
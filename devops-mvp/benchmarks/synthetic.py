@@ -0,0 +1,174 @@
+"""Générateur de repositories synthétiques déterministes pour les benchmarks.
+
+Usage :
+    python benchmarks/synthetic.py DEST [--files 10000] [--depth 4] [--mix python=0.6,javascript=0.3,java=0.1]
+                                        [--large-files 5] [--binary-files 20] [--vendor-files 2000] [--git]
+
+Une même configuration (graine comprise) produit toujours la même arborescence,
+octet pour octet : les mesures sont comparables d'une exécution à l'autre.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+
+# Gabarits de fichiers source par langage : (extension, contenu)
+TEMPLATES = {
+    "python": (".py", "import os\nimport json\n\n\ndef handler_{n}(value):\n    \"\"\"Traitement {n}.\"\"\"\n"
+                      "    if value > {n}:\n        return json.dumps({{'v': value}})\n    return os.getcwd()\n"),
+    "javascript": (".js", "const path = require('path');\n\nfunction handler{n}(value) {{\n"
+                          "  return value > {n} ? path.join('a', 'b') : null;\n}}\n\nmodule.exports = handler{n};\n"),
+    "typescript": (".ts", "export function handler{n}(value: number): string | null {{\n"
+                          "  return value > {n} ? `v${{value}}` : null;\n}}\n"),
+    "java": (".java", "package com.example;\n\npublic class Handler{n} {{\n"
+                      "    public int run(int value) {{\n        return value > {n} ? value : 0;\n    }}\n}}\n"),
+    "go": (".go", "package main\n\nfunc handler{n}(value int) int {{\n\tif value > {n} {{\n\t\treturn value\n\t}}\n\treturn 0\n}}\n"),
+}
+
+# Fichiers de configuration écrits à la racine selon les langages présents
+MANIFESTS = {
+    "python": {
+        "requirements.txt": "fastapi==0.104.1\nuvicorn==0.24.0\npytest==7.4.3\nrequests>=2.31\n",
+        "main.py": "from fastapi import FastAPI\n\napp = FastAPI()\n\nif __name__ == '__main__':\n"
+                   "    import uvicorn\n    uvicorn.run(app, port=8000)\n",
+    },
+    "javascript": {
+        "package.json": json.dumps({
+            "name": "synthetic", "dependencies": {"express": "^4.18.2", "lodash": "^4.17.21"},
+            "devDependencies": {"jest": "^29.7.0"},
+        }, indent=2) + "\n",
+    },
+    "java": {
+        "pom.xml": "<project>\n  <dependencies>\n" + "".join(
+            f"    <dependency>\n      <groupId>org.example</groupId>\n      <artifactId>lib{i}</artifactId>\n"
+            f"      <version>1.{i}.0</version>\n    </dependency>\n" for i in range(5)) + "  </dependencies>\n</project>\n",
+    },
+}
+
+COMMON_FILES = {
+    "README.md": "# Synthetic repository\n\nGénéré par benchmarks/synthetic.py.\n",
+    ".gitignore": "*.pyc\nnode_modules/\nvenv/\n",
+    "Dockerfile": "FROM python:3.11-slim\nCOPY . /app\nEXPOSE 8000\n",
+    "docker-compose.yml": "services:\n  app:\n    build: .\n    ports:\n      - \"8000:8000\"\n",
+}
+
+DEFAULT_MIX = {"python": 0.6, "javascript": 0.3, "java": 0.1}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        language, _, weight = part.partition("=")
+        if language not in TEMPLATES:
+            raise ValueError(f"Langage inconnu: {language}")
+        mix[language] = float(weight or 1)
+    return mix
+
+
+def _write(root, rel, content):
+    path = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(path, mode, **({} if isinstance(content, bytes) else {"encoding": "utf-8"})) as f:
+        f.write(content)
+
+
+def _directory(rng, depth, fanout=8):
+    levels = rng.randint(1, depth)
+    return "/".join(f"{'pkg' if level == 0 else 'mod'}{rng.randrange(fanout)}" for level in range(levels))
+
+
+def generate_repo(root, files=1000, depth=4, mix=None, large_files=0, large_file_kb=2048,
+                  binary_files=0, binary_file_kb=64, vendor_files=0, test_ratio=0.1, seed=0):
+    """Écrit un repository synthétique dans `root` et renvoie ses caractéristiques.
+
+    `files` compte les fichiers source hors vendoring ; `vendor_files` sont
+    répartis entre `node_modules/` et `venv/` ; les gros fichiers texte et les
+    binaires s'ajoutent au total.
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    languages = list(mix)
+    weights = [mix[language] for language in languages]
+    os.makedirs(root, exist_ok=True)
+
+    for rel, content in COMMON_FILES.items():
+        _write(root, rel, content)
+    for language in languages:
+        for rel, content in MANIFESTS.get(language, {}).items():
+            _write(root, rel, content)
+
+    counts = dict.fromkeys(languages, 0)
+    tests = 0
+    for n in range(files):
+        language = rng.choices(languages, weights)[0]
+        ext, template = TEMPLATES[language]
+        counts[language] += 1
+        if language == "python" and rng.random() < test_ratio:
+            tests += 1
+            _write(root, f"tests/{_directory(rng, max(depth - 1, 1))}/test_{n}.py",
+                   f"def test_{n}():\n    assert {n} == {n}\n")
+            continue
+        _write(root, f"src/{_directory(rng, depth)}/file_{n}{ext}", template.format(n=n))
+
+    for n in range(large_files):
+        line = f"# ligne de remplissage {n} " + "x" * 64 + "\n"
+        _write(root, f"data/large_{n}.py", line * (large_file_kb * 1024 // len(line)))
+    for n in range(binary_files):
+        _write(root, f"assets/blob_{n}.bin", rng.randbytes(binary_file_kb * 1024))
+    for n in range(vendor_files):
+        if n % 2:
+            _write(root, f"node_modules/dep{n % 50}/lib/index_{n}.js", TEMPLATES["javascript"][1].format(n=n))
+        else:
+            _write(root, f"venv/lib/python3.11/site-packages/dep{n % 50}/mod_{n}.py", TEMPLATES["python"][1].format(n=n))
+
+    return {
+        "root": root,
+        "files": files,
+        "languages": counts,
+        "tests": tests,
+        "large_files": large_files,
+        "binary_files": binary_files,
+        "vendor_files": vendor_files,
+        "seed": seed,
+    }
+
+
+def make_git_remote(root):
+    """Commit `root` et renvoie l'URL file:// d'une copie bare (pour l'analyse de bout en bout)."""
+    def git(*args, cwd):
+        subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+                       cwd=cwd, check=True, capture_output=True)
+    git("init", "-q", "-b", "main", cwd=root)
+    git("add", "-A", cwd=root)
+    git("commit", "-q", "-m", "synthetic", cwd=root)
+    bare = root.rstrip("/") + ".git"
+    git("clone", "-q", "--bare", root, bare, cwd=os.path.dirname(bare))
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    return "file://" + os.path.abspath(bare)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dest")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--large-files", type=int, default=0)
+    parser.add_argument("--binary-files", type=int, default=0)
+    parser.add_argument("--vendor-files", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--git", action="store_true", help="créer aussi un repository bare")
+    args = parser.parse_args()
+    info = generate_repo(args.dest, files=args.files, depth=args.depth, mix=args.mix, large_files=args.large_files,
+                         binary_files=args.binary_files, vendor_files=args.vendor_files, seed=args.seed)
+    if args.git:
+        info["url"] = make_git_remote(args.dest)
+    json.dump(info, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from workers import DeadlineGit
+
+CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 512))
+CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", 24 * 3600))
+# Chemin de la base SQLite du cache persistant ; vide = cache mémoire seul
+CACHE_DB_PATH = os.getenv("ANALYSIS_CACHE_DB", "")
+
+_SCP_LIKE = re.compile(r'^(?:[\w.-]+@)?([\w.-]+):(?!//)(.+)$')
+
+
+def normalize_repo_url(url):
+    """Forme canonique d'une URL de repository, utilisée comme clé de cache.
+
+    `git@github.com:org/Repo.git`, `https://github.com/org/Repo/` et
+    `https://GitHub.com/org/Repo.git` donnent la même clé.
+    """
+    url = url.strip()
+    match = _SCP_LIKE.match(url)
+    if match and '://' not in url:
+        url = f"ssh://{match.group(1)}/{match.group(2)}"
+    url = url.rstrip('/')
+    if url.endswith('.git'):
+        url = url[:-4]
+    scheme, sep, rest = url.partition('://')
+    if not sep:
+        return url
+    host, _, path = rest.partition('/')
+    host = host.rsplit('@', 1)[-1].lower()
+    if scheme in ('http', 'https', 'ssh', 'git'):
+        scheme = 'https' if host else scheme
+    return f"{scheme}://{host}/{path}"
+
+
+def resolve_head(repo_url):
+    """SHA du HEAD distant via `git ls-remote`, sans clone."""
+    output = DeadlineGit().ls_remote(repo_url, 'HEAD')
+    for line in output.splitlines():
+        sha, _, ref = line.partition('\t')
+        if ref == 'HEAD':
+            return sha
+    raise ValueError(f"HEAD introuvable pour {repo_url}")
+
+
+def resolve_default_ref(repo_url):
+    """Référence de la branche par défaut du remote (ex. refs/heads/main), via `git ls-remote --symref`."""
+    output = DeadlineGit().ls_remote('--symref', repo_url, 'HEAD')
+    for line in output.splitlines():
+        if line.startswith('ref: '):
+            return line[len('ref: '):].split('\t', 1)[0]
+    raise ValueError(f"Branche par défaut introuvable pour {repo_url}")
+
+
+class AnalysisCache:
+    """Cache des résultats d'analyse indexé par (URL, commit, version).
+
+    Niveau mémoire : LRU borné en nombre d'entrées avec TTL. Niveau disque
+    optionnel (SQLite) : survit aux redémarrages et recharge le niveau mémoire.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, db_path=CACHE_DB_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path or None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        if self.db_path:
+            self._execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, result TEXT NOT NULL)"
+            )
+
+    @staticmethod
+    def make_key(repo_url, commit, version):
+        return f"{normalize_repo_url(repo_url)}@{commit}#{version}"
+
+    def _execute(self, sql, params=()):
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with db:
+                return db.execute(sql, params).fetchone()
+        finally:
+            db.close()
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                if not self._expired(stored_at):
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return result
+                del self._entries[key]
+                self.stats["expirations"] += 1
+
+        if self.db_path:
+            row = self._execute("SELECT stored_at, result FROM analyses WHERE key = ?", (key,))
+            if row is not None and self._expired(row[0]):
+                self._execute("DELETE FROM analyses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                result = json.loads(row[1])
+                with self._lock:
+                    self._store_memory(key, row[0], result)
+                    self.stats["disk_hits"] += 1
+                return result
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key, result):
+        stored_at = time.time()
+        with self._lock:
+            self._store_memory(key, stored_at, result)
+        if self.db_path:
+            self._execute(
+                "INSERT OR REPLACE INTO analyses (key, stored_at, result) VALUES (?, ?, ?)",
+                (key, stored_at, json.dumps(result)),
+            )
+            if self.ttl is not None:
+                self._execute("DELETE FROM analyses WHERE stored_at < ?", (stored_at - self.ttl,))
+
+    def _store_memory(self, key, stored_at, result):
+        self._entries[key] = (stored_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            self._execute("DELETE FROM analyses")
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "max_entries": self.max_entries}
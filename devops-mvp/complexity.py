@@ -0,0 +1,166 @@
+import ast
+import hashlib
+import heapq
+import math
+import os
+from collections import Counter
+
+from manifests import ParseCache
+
+# Métriques de complexité conservées, indexées par SHA du blob git : un
+# fichier inchangé n'est jamais ré-analysé, d'un commit ou d'un fork à l'autre
+COMPLEXITY_CACHE_ENTRIES = int(os.getenv("ANALYSIS_COMPLEXITY_CACHE_ENTRIES", 50_000))
+# En dessous de ce nombre de fichiers à analyser, la compilation s'exécute
+# en série (elle coûte bien plus que la simple lecture)
+COMPLEXITY_PARALLEL_MIN_FILES = int(os.getenv("ANALYSIS_COMPLEXITY_PARALLEL_MIN_FILES", 200))
+# Fonctions (points chauds) et fichiers les moins maintenables listés
+COMPLEXITY_HOTSPOTS = int(os.getenv("COMPLEXITY_HOTSPOTS", 10))
+
+# Rangs de complexité cyclomatique (mêmes bornes que radon) ; F au-delà
+RANKS = ((5, 'A'), (10, 'B'), (20, 'C'), (30, 'D'), (40, 'E'))
+
+# Nœuds qui ajoutent un chemin d'exécution (match : Python 3.10+, except* : 3.11+)
+DECISIONS = (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.Assert,
+             ast.comprehension) + ((ast.match_case,) if hasattr(ast, 'match_case') else ())
+# Blocs qui augmentent la profondeur d'imbrication
+NESTING = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try) + tuple(
+    getattr(ast, name) for name in ('Match', 'TryStar') if hasattr(ast, name))
+FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+SCOPES = FUNCTIONS + (ast.ClassDef,)
+
+# Métriques numériques de la synthèse, utilisables par les règles du Health Score
+METRICS = ('files', 'functions', 'parse_errors', 'average_complexity', 'max_complexity', 'average_maintainability')
+
+complexity_cache = ParseCache(max_entries=COMPLEXITY_CACHE_ENTRIES)
+
+
+def rank(complexity):
+    for bound, letter in RANKS:
+        if complexity <= bound:
+            return letter
+    return 'F'
+
+
+def blob_id(buffer):
+    """SHA du blob git d'un contenu (bytes ou mmap), comme `git hash-object`."""
+    digest = hashlib.sha1(b"blob %d\0" % len(buffer))
+    digest.update(buffer)
+    return digest.hexdigest()
+
+
+def _block(node):
+    """(complexité cyclomatique, profondeur d'imbrication) du corps de `node`.
+
+    Les fonctions et classes imbriquées sont mesurées séparément ; un `elif`
+    n'ajoute pas de niveau d'imbrication.
+    """
+    complexity, max_depth = 1, 0
+    stack = [(child, 0) for child in ast.iter_child_nodes(node)]
+    while stack:
+        current, depth = stack.pop()
+        if isinstance(current, SCOPES):
+            continue
+        if isinstance(current, DECISIONS):
+            complexity += 1
+        if isinstance(current, ast.comprehension):
+            complexity += len(current.ifs)
+        elif isinstance(current, ast.BoolOp):
+            complexity += len(current.values) - 1
+        inner = depth
+        if isinstance(current, NESTING):
+            inner = depth + 1
+            max_depth = max(max_depth, inner)
+        for child in ast.iter_child_nodes(current):
+            elif_ = isinstance(current, ast.If) and current.orelse == [child] and isinstance(child, ast.If)
+            stack.append((child, depth if elif_ else inner))
+    return complexity, max_depth
+
+
+def _halstead_volume(tree):
+    operators, operands = Counter(), Counter()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.operator, ast.unaryop, ast.boolop, ast.cmpop)):
+            operators[type(node).__name__] += 1
+        elif isinstance(node, ast.Name):
+            operands[node.id] += 1
+        elif isinstance(node, ast.Constant):
+            operands[repr(node.value)] += 1
+    vocabulary = len(operators) + len(operands)
+    length = sum(operators.values()) + sum(operands.values())
+    return length * math.log2(vocabulary) if vocabulary > 1 else 0.0
+
+
+def _functions(tree):
+    # (nom qualifié, nœud) de chaque fonction, méthodes et fonctions imbriquées comprises
+    stack = [(tree, '')]
+    while stack:
+        node, prefix = stack.pop()
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, SCOPES):
+                name = f"{prefix}{child.name}"
+                if isinstance(child, FUNCTIONS):
+                    yield name, child
+                stack.append((child, name + '.'))
+            else:
+                stack.append((child, prefix))
+
+
+def measure(path, buffer):
+    """Métriques d'un fichier Python (bytes ou mmap) ; {'error': ...} s'il ne se compile pas.
+
+    `functions` : (nom, ligne, longueur, complexité, imbrication) par fonction.
+    L'indice de maintenabilité suit la variante de Visual Studio (0 à 100)
+    de la formule d'Oman et Hagemeister.
+    """
+    source = bytes(buffer)
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError) as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    functions = []
+    total = _block(tree)[0]
+    for name, node in _functions(tree):
+        complexity, depth = _block(node)
+        functions.append((name, node.lineno, node.end_lineno - node.lineno + 1, complexity, depth))
+        total += complexity - 1
+    sloc = sum(1 for line in source.splitlines() if line.strip() and not line.lstrip().startswith(b'#'))
+    volume = _halstead_volume(tree)
+    index = 171 - 5.2 * math.log(max(volume, 1)) - 0.23 * total - 16.2 * math.log(max(sloc, 1))
+    return {
+        'sloc': sloc,
+        'complexity': total,
+        'maintainability': round(max(0.0, index * 100 / 171), 2),
+        'functions': tuple(functions),
+    }
+
+
+def summarize(files, top=COMPLEXITY_HOTSPOTS):
+    """Synthèse des métriques par fichier ({chemin: measure(...)}) : moyennes, rangs, points chauds."""
+    parsed = {path: metrics for path, metrics in files.items() if 'error' not in metrics}
+    errors = sorted(path for path, metrics in files.items() if 'error' in metrics)
+    functions = [(path, *function) for path, metrics in parsed.items() for function in metrics['functions']]
+    complexities = [function[4] for function in functions]
+    return {
+        'files': len(parsed),
+        'functions': len(functions),
+        'parse_errors': len(errors),
+        'unparsable': errors[:top],
+        'average_complexity': round(sum(complexities) / len(complexities), 2) if complexities else None,
+        'max_complexity': max(complexities, default=None),
+        'average_maintainability': round(
+            sum(metrics['maintainability'] for metrics in parsed.values()) / len(parsed), 2) if parsed else None,
+        'ranks': dict(sorted(Counter(rank(complexity) for complexity in complexities).items())),
+        # Les fonctions les plus complexes, puis les plus longues
+        'hotspots': [
+            {'path': path, 'function': name, 'line': line, 'length': length, 'complexity': complexity,
+             'rank': rank(complexity), 'depth': depth}
+            for path, name, line, length, complexity, depth in heapq.nlargest(
+                top, functions, key=lambda function: (function[4], function[3], function[0], -function[2]))
+        ],
+        'least_maintainable': [
+            {'path': path, 'maintainability': metrics['maintainability'], 'complexity': metrics['complexity'],
+             'sloc': metrics['sloc']}
+            for path, metrics in heapq.nsmallest(
+                top, parsed.items(), key=lambda item: (item[1]['maintainability'], item[0]))
+        ],
+    }
@@ -0,0 +1,286 @@
+import os
+import re
+import subprocess
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+
+import git
+
+from logs import get_logger
+from metrics import WALK_SECONDS
+from mirrors import mirror_store
+from snapshot import RepoSnapshot
+from workers import DeadlineGit, clone_repo
+
+logger = get_logger("fetching")
+
+# "mirror" : worktree sur un miroir local persistant, mis à jour par fetch
+# incrémental, avec checkout partiel des seuls fichiers déclarés par les
+# détecteurs. "sparse" : même checkout partiel sur un clone superficiel
+# (depth=1) sans blobs. "full" : clone complet historique.
+FETCH_MODE = os.getenv("ANALYSIS_FETCH_MODE", "mirror")
+
+# Taille maximale (octets) d'un fichier source analysé
+MAX_SOURCE_SIZE = int(os.getenv("ANALYSIS_MAX_SOURCE_SIZE", 1024 * 1024))
+# Filtre des clones partiels : seuls les blobs de plus de MAX_SOURCE_SIZE
+# octets restent sur le serveur (blob:limit=n exclut les blobs d'au moins n
+# octets), la taille des autres se lit localement
+BLOB_FILTER = f"blob:limit={MAX_SOURCE_SIZE + 1}"
+_FILTER_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+# Motifs (pattern, taille max) déclarés par les détecteurs via @requires_files.
+# Un motif sans joker désigne un chemin à la racine ; "*" traverse les dossiers.
+# La limite est appliquée avant le checkout : un blob laissé sur le serveur par
+# le filtre blob:limit est au moins aussi gros que la limite du filtre, il
+# n'est récupéré que pour un motif qui accepte cette taille.
+REQUIRED_FILES = []
+
+
+def requires_files(*patterns, max_size=None):
+    """Déclare les fichiers dont un détecteur a besoin pour son analyse."""
+    def decorator(func):
+        for pattern in patterns:
+            if (pattern, max_size) not in REQUIRED_FILES:
+                REQUIRED_FILES.append((pattern, max_size))
+        return func
+    return decorator
+
+
+def size_limit(path, requirements=None):
+    """Taille maximale acceptée pour `path`, False s'il n'est requis par aucun détecteur."""
+    limit = False
+    for pattern, max_size in (REQUIRED_FILES if requirements is None else requirements):
+        if fnmatchcase(path, pattern):
+            if max_size is None:
+                return None
+            limit = max(limit or 0, max_size)
+    return limit
+
+
+def is_required(path, size=None, requirements=None):
+    limit = size_limit(path, requirements)
+    if limit is False:
+        return False
+    return limit is None or size is None or size <= limit
+
+
+def is_partial(repo):
+    """Vrai si le repository est un clone partiel (blobs récupérés à la demande)."""
+    try:
+        return repo.git.config("--get", "remote.origin.promisor") == "true"
+    except git.GitCommandError:
+        return False
+
+
+def filter_limit(repo):
+    """Taille minimale des blobs laissés sur le serveur par le filtre blob:limit, None sinon."""
+    try:
+        spec = repo.git.config("--get", "remote.origin.partialclonefilter")
+    except git.GitCommandError:
+        return None
+    match = re.fullmatch(r"blob:limit=(\d+)([kmg]?)", spec.strip().lower())
+    return int(match.group(1)) * _FILTER_UNITS[match.group(2)] if match else None
+
+
+def list_tree(repo, rev="HEAD"):
+    """Liste les blobs de l'arbre : [(chemin, taille, SHA du blob)].
+
+    Dans un clone partiel, `ls-tree -l` téléchargerait un à un les blobs
+    absents pour lire leur taille : celle-ci est lue dans la base d'objets
+    locale (cat-file --batch-check), et vaut None pour les blobs absents
+    (plus gros que la limite du filtre, ou tous avec blob:none).
+    """
+    partial = is_partial(repo)
+    entries = []
+    output = repo.git.ls_tree("-r", "-z", *([] if partial else ["-l"]), rev)
+    for record in output.split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        fields = meta.split()
+        # Les liens symboliques et sous-modules ne sont pas des fichiers du snapshot
+        if fields[1] != "blob" or fields[0] == "120000":
+            continue
+        entries.append((path, None if partial else int(fields[3]), fields[2]))
+    if partial:
+        sizes = local_blob_sizes(repo, rev)
+        entries = [(path, sizes.get(sha), sha) for path, _, sha in entries]
+    return entries
+
+
+def local_blob_sizes(repo, rev="HEAD"):
+    """{SHA: taille} des blobs de l'arbre de `rev` présents localement, sans rien télécharger."""
+    # Comme history.iter_blobs : rev-list ignore les objets absents
+    # (--missing=allow-promisor) au lieu de les récupérer, cat-file ne reçoit
+    # donc que des objets locaux
+    env = {**os.environ, "GIT_DIR": repo.git_dir}
+    rev_list = subprocess.Popen(["git", "rev-list", "--objects", "--no-walk", "--missing=allow-promisor", rev, "--"],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+    cat_file = subprocess.Popen(["git", "cat-file", "--batch-check=%(objecttype) %(objectname) %(objectsize) %(rest)"],
+                                stdin=rev_list.stdout, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+    rev_list.stdout.close()
+    output = cat_file.communicate()[0]
+    if cat_file.returncode or rev_list.wait():
+        raise RuntimeError("Échec de la lecture des tailles de blobs (rev-list/cat-file)")
+    sizes = {}
+    for line in output.decode().splitlines():
+        kind, sha, size = line.split(" ", 3)[:3]
+        if kind == "blob":
+            sizes[sha] = int(size)
+    return sizes
+
+
+def _sparse_pattern(path):
+    # Chemin exact, ancré à la racine, avec échappement des caractères spéciaux
+    escaped = "".join("\\" + c if c in "*?[]\\" else c for c in path)
+    if escaped[:1] in ("#", "!"):
+        escaped = "\\" + escaped
+    return "/" + escaped
+
+
+def sparse_checkout(repo, paths):
+    """Matérialise uniquement `paths` ; les blobs manquants sont récupérés en un lot.
+
+    L'option core.sparseCheckout est passée à la seule commande read-tree :
+    dans un worktree, la configuration est partagée avec le miroir.
+    """
+    info_dir = os.path.join(repo.git_dir, "info")
+    os.makedirs(info_dir, exist_ok=True)
+    with open(os.path.join(info_dir, "sparse-checkout"), "w", encoding="utf-8") as f:
+        for path in paths:
+            f.write(_sparse_pattern(path) + "\n")
+    repo.git(c="core.sparseCheckout=true").read_tree("-mu", "HEAD")
+
+
+def _sparse_snapshot(repo, local_path):
+    """Checkout partiel des fichiers requis et snapshot construit depuis l'arbre."""
+    # Tailles lues dans la base d'objets, sans lire le contenu des blobs ;
+    # inconnues pour les seuls blobs laissés sur le serveur par le filtre
+    with WALK_SECONDS.time():
+        tree = list_tree(repo)
+    # Blob absent d'un clone blob:limit : sa taille est au moins la limite du
+    # filtre, ce qui suffit à écarter les fichiers trop gros sans les télécharger
+    minimum = filter_limit(repo)
+    wanted = [path for path, size, _ in tree if is_required(path, minimum if size is None else size)]
+    sparse_checkout(repo, wanted)
+
+    # Taille des blobs absents : connue une fois le fichier récupéré
+    sizes = {path: size for path, size, _ in tree}
+    readable = []
+    for path in wanted:
+        if sizes[path] is None:
+            try:
+                sizes[path] = os.path.getsize(os.path.join(local_path, *path.split("/")))
+            except OSError:
+                continue
+        if is_required(path, sizes[path]):
+            readable.append(path)
+    snapshot = RepoSnapshot.from_tree(local_path, sizes.items(), checked_out=readable,
+                                      blob_ids={path: sha for path, _, sha in tree})
+    snapshot.commit = repo.head.commit.hexsha
+    return snapshot
+
+
+def clone_for_analysis(repo_url, local_path, mode=None, rev=None):
+    """Clone `repo_url` dans `local_path` et renvoie le RepoSnapshot correspondant.
+
+    `rev` : SHA complet du commit à analyser (par défaut, HEAD du remote).
+    """
+    mode = mode or FETCH_MODE
+    if mode == "full":
+        repo = clone_repo(repo_url, local_path)
+        if rev:
+            repo.git.checkout("--detach", rev)
+        else:
+            # Récupérer la branche principale
+            try:
+                repo.git.checkout('main')
+            except git.GitCommandError:
+                try:
+                    repo.git.checkout('master')
+                except git.GitCommandError:
+                    logger.warning("Impossible de changer de branche pour %s", repo_url)
+        snapshot = RepoSnapshot(local_path)
+        snapshot.commit = repo.head.commit.hexsha
+        return snapshot
+    if mode != "sparse":
+        raise ValueError(f"Mode de récupération inconnu: {mode}")
+
+    repo = clone_repo(repo_url, local_path, depth=1, filter=BLOB_FILTER, no_checkout=True)
+    if rev and repo.head.commit.hexsha != rev:
+        # Commit qui n'est plus en tête de la branche : récupéré seul, avec le
+        # même filtre, puis désigné par un HEAD détaché
+        repo.git.fetch("--depth=1", f"--filter={BLOB_FILTER}", "origin", rev)
+        repo.git.update_ref("--no-deref", "HEAD", rev)
+    return _sparse_snapshot(repo, local_path)
+
+
+@contextmanager
+def checkout_for_analysis(repo_url, local_path, mode=None, rev=None):
+    """Fournit le RepoSnapshot de `repo_url` (au commit `rev`, sinon HEAD), matérialisé dans `local_path`.
+
+    En mode "mirror", le worktree est retiré du miroir à la sortie ; dans les
+    autres modes, `local_path` reste à la charge de l'appelant.
+    """
+    mode = mode or FETCH_MODE
+    if mode != "mirror":
+        yield clone_for_analysis(repo_url, local_path, mode=mode, rev=rev)
+        return
+    with mirror_store.worktree(repo_url, local_path, checkout=False, rev=rev or "HEAD") as repo:
+        yield _sparse_snapshot(repo, local_path)
+
+
+@contextmanager
+def full_checkout(repo_url, local_path):
+    """Répertoire de travail complet (build Docker, commit CI)."""
+    if FETCH_MODE == "mirror":
+        with mirror_store.worktree(repo_url, local_path) as repo:
+            yield repo
+    else:
+        yield clone_repo(repo_url, local_path, depth=1)
+
+
+@contextmanager
+def object_store(repo_url, local_path):
+    """Repository bare, sans répertoire de travail, pour créer des commits par plumbing.
+
+    En mode mirror, c'est le miroir partagé ; sinon, un clone bare de la
+    branche par défaut, superficiel et sans blobs.
+    """
+    if FETCH_MODE == "mirror":
+        with mirror_store.using(repo_url) as repo:
+            yield repo
+    else:
+        yield clone_repo(repo_url, local_path, bare=True, depth=1, filter="blob:none")
+
+
+def default_branch(repo):
+    """Référence de la branche par défaut du remote `origin` (ex. refs/heads/main)."""
+    output = repo.git.ls_remote("--symref", "origin", "HEAD")
+    for line in output.splitlines():
+        if line.startswith("ref: "):
+            return line[len("ref: "):].split("\t", 1)[0]
+    raise ValueError("Branche par défaut introuvable")
+
+
+def resolve_commit(repo_url, sha):
+    """SHA complet du commit `sha`, éventuellement abrégé, de `repo_url`.
+
+    En mode mirror, le miroir (mis à jour) résout toute abréviation ; sinon,
+    seuls les commits en tête d'une référence distante (git ls-remote) sont
+    reconnus. Lève ValueError si le commit est introuvable ou ambigu.
+    """
+    sha = sha.lower()
+    if len(sha) in (40, 64):
+        return sha
+    if FETCH_MODE == "mirror":
+        with mirror_store.using(repo_url) as mirror:
+            try:
+                return mirror.git.rev_parse("--verify", "--quiet", f"{sha}^{{commit}}")
+            except git.GitCommandError:
+                raise ValueError(f"Commit {sha} introuvable ou ambigu dans {repo_url}")
+    matches = {line.split("\t", 1)[0] for line in DeadlineGit().ls_remote(repo_url).splitlines()
+               if line.startswith(sha)}
+    if len(matches) != 1:
+        raise ValueError(f"Commit {sha} introuvable ou ambigu dans {repo_url}")
+    return matches.pop()
@@ -0,0 +1,106 @@
+import mmap
+import os
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Octets lus en tête de fichier pour reconnaître un binaire
+SNIFF_BYTES = 8192
+# Au-delà, les recherches se font sur une projection mmap au lieu d'une copie en mémoire
+MMAP_THRESHOLD = int(os.getenv("ANALYSIS_MMAP_THRESHOLD", 1024 * 1024))
+# Fichiers plus gros ignorés par tous les détecteurs
+READ_MAX_BYTES = int(os.getenv("ANALYSIS_READ_MAX_BYTES", 64 * 1024 * 1024))
+# Budget mémoire des contenus conservés par un snapshot (LRU)
+CONTENT_CACHE_BYTES = int(os.getenv("ANALYSIS_CONTENT_CACHE_BYTES", 64 * 1024 * 1024))
+
+_TEXT_BYTES = bytes(range(0x20, 0x7f)) + bytes(range(0x80, 0x100)) + b"\n\r\t\f\b\x1b"
+
+
+def looks_binary(head):
+    """Heuristique de git/grep : un octet nul, ou plus de 30 % de caractères de contrôle."""
+    if not head:
+        return False
+    if b"\0" in head:
+        return True
+    control = len(head.translate(None, _TEXT_BYTES))
+    return control / len(head) > 0.3
+
+
+@lru_cache(maxsize=256)
+def needles_pattern(needles):
+    """Motif compilé (insensible à la casse) reconnaissant l'une des chaînes `needles`."""
+    return re.compile(b"|".join(re.escape(needle.encode("utf-8")) for needle in needles), re.IGNORECASE)
+
+
+@contextmanager
+def mapped(path):
+    """Projection en lecture seule de `path` (b"" pour un fichier vide)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def count_newlines(buffer, start, end, chunk=1024 * 1024):
+    """Nombre de fins de ligne dans buffer[start:end], par tranches bornées."""
+    total = 0
+    for offset in range(start, end, chunk):
+        total += buffer[offset:min(offset + chunk, end)].count(b"\n")
+    return total
+
+
+# Les fonctions de recherche ci-dessous ne renvoient que des copies : le mmap
+# parcouru est fermé dès la fin de la recherche.
+
+def scan_needles(buffer, needles, stop_on_first=False):
+    """(chaînes trouvées, octets parcourus) ; s'arrête dès que toutes sont trouvées."""
+    wanted = {needle.lower() for needle in needles}
+    found = set()
+    end = len(buffer)
+    for match in needles_pattern(tuple(needles)).finditer(buffer):
+        found.add(match.group(0).decode("utf-8").lower())
+        if stop_on_first or found >= wanted:
+            end = match.end()
+            break
+    return found, end
+
+
+def count_occurrences(buffer, needle):
+    """Occurrences (sans chevauchement) de `needle` dans un bytes ou un mmap."""
+    if isinstance(buffer, bytes):
+        return buffer.count(needle)
+    total, position = 0, buffer.find(needle)
+    while position != -1:
+        total += 1
+        position = buffer.find(needle, position + len(needle))
+    return total
+
+
+class ContentCache:
+    """Contenus bruts des fichiers, bornés en octets (LRU)."""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = CONTENT_CACHE_BYTES if max_bytes is None else max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
@@ -0,0 +1,278 @@
+import os
+import re
+
+# Signatures des frameworks : écosystème, paquets déclarés dans les
+# manifestes (manifests.STACK_MANIFEST_READERS), modules importés par le code
+# et fichiers de configuration caractéristiques (nom de fichier, ou chemin
+# depuis la racine s'il contient "/"). Un méta-framework (`extends`) reprend
+# les indices du framework sur lequel il repose et le précède à confiance
+# égale, l'ordre de la table départageant les autres. Les noms sont ceux du champ `framework` de l'analyse
+# (DEFAULT_PORTS s'y réfère).
+FRAMEWORKS = {
+    # Python
+    'Django': {'ecosystem': 'python', 'packages': ('django',), 'imports': ('django',), 'files': ('manage.py',)},
+    'FastAPI': {'ecosystem': 'python', 'extends': 'Starlette', 'packages': ('fastapi',), 'imports': ('fastapi',)},
+    'Flask': {'ecosystem': 'python', 'packages': ('flask',), 'imports': ('flask',)},
+    'Pyramid': {'ecosystem': 'python', 'packages': ('pyramid',), 'imports': ('pyramid',)},
+    'Tornado': {'ecosystem': 'python', 'packages': ('tornado',), 'imports': ('tornado',)},
+    'Starlette': {'ecosystem': 'python', 'packages': ('starlette',), 'imports': ('starlette',)},
+    'Litestar': {'ecosystem': 'python', 'packages': ('litestar',), 'imports': ('litestar',)},
+    'Sanic': {'ecosystem': 'python', 'packages': ('sanic',), 'imports': ('sanic',)},
+    'Quart': {'ecosystem': 'python', 'packages': ('quart',), 'imports': ('quart',)},
+    'Falcon': {'ecosystem': 'python', 'packages': ('falcon',), 'imports': ('falcon',)},
+    'Bottle': {'ecosystem': 'python', 'packages': ('bottle',), 'imports': ('bottle',)},
+    # aiohttp est aussi un client HTTP : seul son serveur est une signature
+    'aiohttp': {'ecosystem': 'python', 'imports': ('aiohttp.web',)},
+    'Streamlit': {'ecosystem': 'python', 'packages': ('streamlit',), 'imports': ('streamlit',)},
+    'Dash': {'ecosystem': 'python', 'packages': ('dash',), 'imports': ('dash',)},
+    'Gradio': {'ecosystem': 'python', 'packages': ('gradio',), 'imports': ('gradio',)},
+    # Node.js
+    'Next.js': {'ecosystem': 'node', 'extends': 'React', 'packages': ('next',), 'imports': ('next',),
+                'files': ('next.config.js', 'next.config.mjs', 'next.config.ts')},
+    'Nuxt': {'ecosystem': 'node', 'extends': 'Vue.js', 'packages': ('nuxt', 'nuxt3'), 'imports': ('nuxt', '#app'),
+             'files': ('nuxt.config.js', 'nuxt.config.ts', 'nuxt.config.mjs')},
+    'Remix': {'ecosystem': 'node', 'extends': 'React',
+              'packages': ('@remix-run/react', '@remix-run/node', '@remix-run/serve'), 'imports': ('@remix-run',),
+              'files': ('remix.config.js', 'remix.config.mjs')},
+    'Gatsby': {'ecosystem': 'node', 'extends': 'React', 'packages': ('gatsby',), 'imports': ('gatsby',),
+               'files': ('gatsby-config.js', 'gatsby-config.ts', 'gatsby-node.js')},
+    'SvelteKit': {'ecosystem': 'node', 'extends': 'Svelte', 'packages': ('@sveltejs/kit',),
+                  'imports': ('@sveltejs/kit', '$app'), 'files': ('svelte.config.js', 'svelte.config.ts')},
+    'Astro': {'ecosystem': 'node', 'packages': ('astro',), 'imports': ('astro',),
+              'files': ('astro.config.mjs', 'astro.config.ts', 'astro.config.js')},
+    'Angular': {'ecosystem': 'node', 'packages': ('@angular/core',), 'imports': ('@angular',),
+                'files': ('angular.json', '.angular-cli.json')},
+    'React Native': {'ecosystem': 'node', 'extends': 'React', 'packages': ('react-native', 'expo'),
+                     'imports': ('react-native', 'expo'), 'files': ('metro.config.js', 'eas.json')},
+    'React': {'ecosystem': 'node', 'packages': ('react', 'react-dom', 'react-scripts'),
+              'imports': ('react', 'react-dom')},
+    'Vue.js': {'ecosystem': 'node', 'packages': ('vue', '@vue/cli-service'), 'imports': ('vue',),
+               'files': ('vue.config.js',)},
+    'Svelte': {'ecosystem': 'node', 'packages': ('svelte',), 'imports': ('svelte',)},
+    'SolidJS': {'ecosystem': 'node', 'packages': ('solid-js',), 'imports': ('solid-js',)},
+    'Ember.js': {'ecosystem': 'node', 'packages': ('ember-source', 'ember-cli'), 'imports': ('@ember', 'ember'),
+                 'files': ('ember-cli-build.js',)},
+    'Electron': {'ecosystem': 'node', 'packages': ('electron',), 'imports': ('electron',),
+                 'files': ('electron-builder.yml', 'electron-builder.json', 'forge.config.js')},
+    'NestJS': {'ecosystem': 'node', 'packages': ('@nestjs/core',), 'imports': ('@nestjs',),
+               'files': ('nest-cli.json',)},
+    'Express': {'ecosystem': 'node', 'packages': ('express',), 'imports': ('express',)},
+    'Fastify': {'ecosystem': 'node', 'packages': ('fastify',), 'imports': ('fastify',)},
+    'Koa': {'ecosystem': 'node', 'packages': ('koa',), 'imports': ('koa',)},
+    'Hapi': {'ecosystem': 'node', 'packages': ('@hapi/hapi', 'hapi'), 'imports': ('@hapi/hapi', 'hapi')},
+    'Meteor': {'ecosystem': 'node', 'imports': ('meteor',), 'files': ('.meteor/release', '.meteor/packages')},
+    # JVM (Java, Kotlin, Scala)
+    'Spring Boot': {'ecosystem': 'jvm', 'extends': 'Spring',
+                    'packages': ('org.springframework.boot', 'spring-boot-starter', 'spring-boot-starter-web',
+                                 'spring-boot-starter-webflux', 'spring-boot-starter-actuator',
+                                 'spring-boot-starter-data-jpa', 'spring-boot-starter-security'),
+                    'imports': ('org.springframework.boot',)},
+    'Spring': {'ecosystem': 'jvm', 'packages': ('spring-webmvc', 'spring-webflux', 'spring-context'),
+               'imports': ('org.springframework',)},
+    'Quarkus': {'ecosystem': 'jvm',
+                'packages': ('io.quarkus', 'quarkus-core', 'quarkus-arc', 'quarkus-resteasy',
+                             'quarkus-resteasy-reactive', 'quarkus-rest'),
+                'imports': ('io.quarkus',)},
+    'Micronaut': {'ecosystem': 'jvm',
+                  'packages': ('io.micronaut.application', 'micronaut-runtime', 'micronaut-inject',
+                               'micronaut-http-server-netty'),
+                  'imports': ('io.micronaut',)},
+    'Ktor': {'ecosystem': 'jvm', 'packages': ('io.ktor.plugin', 'ktor-server-core', 'ktor-server-netty'),
+             'imports': ('io.ktor',)},
+    'Vert.x': {'ecosystem': 'jvm', 'packages': ('vertx-core', 'vertx-web'), 'imports': ('io.vertx',)},
+    'Dropwizard': {'ecosystem': 'jvm', 'packages': ('dropwizard-core',), 'imports': ('io.dropwizard',)},
+    'Play': {'ecosystem': 'jvm', 'imports': ('play.api', 'play.mvc'), 'files': ('conf/routes',)},
+    'Jakarta EE': {'ecosystem': 'jvm', 'packages': ('jakarta.jakartaee-api', 'jakartaee-api', 'javaee-api'),
+                   'imports': ('jakarta.ws.rs', 'javax.ws.rs', 'jakarta.servlet', 'javax.servlet')},
+    'Android': {'ecosystem': 'jvm', 'packages': ('com.android.application', 'com.android.library'),
+                'imports': ('android', 'androidx'), 'files': ('AndroidManifest.xml',)},
+    # Go (les modules de go.mod sont aussi les chemins importés)
+    'Gin': {'ecosystem': 'go', 'packages': ('github.com/gin-gonic/gin',), 'imports': ('github.com/gin-gonic/gin',)},
+    'Echo': {'ecosystem': 'go', 'packages': ('github.com/labstack/echo', 'github.com/labstack/echo/v4'),
+             'imports': ('github.com/labstack/echo', 'github.com/labstack/echo/v4')},
+    'Fiber': {'ecosystem': 'go', 'packages': ('github.com/gofiber/fiber', 'github.com/gofiber/fiber/v2'),
+              'imports': ('github.com/gofiber/fiber', 'github.com/gofiber/fiber/v2')},
+    'Chi': {'ecosystem': 'go', 'packages': ('github.com/go-chi/chi', 'github.com/go-chi/chi/v5'),
+            'imports': ('github.com/go-chi/chi', 'github.com/go-chi/chi/v5')},
+    'Gorilla Mux': {'ecosystem': 'go', 'packages': ('github.com/gorilla/mux',), 'imports': ('github.com/gorilla/mux',)},
+    'Beego': {'ecosystem': 'go', 'packages': ('github.com/beego/beego/v2', 'github.com/astaxie/beego'),
+              'imports': ('github.com/beego/beego/v2', 'github.com/astaxie/beego')},
+    'Buffalo': {'ecosystem': 'go', 'packages': ('github.com/gobuffalo/buffalo',),
+                'imports': ('github.com/gobuffalo/buffalo',)},
+    'Revel': {'ecosystem': 'go', 'packages': ('github.com/revel/revel',), 'imports': ('github.com/revel/revel',)},
+    # Rust (crates : "-" et "_" sont équivalents)
+    'Actix Web': {'ecosystem': 'rust', 'packages': ('actix-web',), 'imports': ('actix_web',)},
+    'Axum': {'ecosystem': 'rust', 'packages': ('axum',), 'imports': ('axum',)},
+    'Rocket': {'ecosystem': 'rust', 'packages': ('rocket',), 'imports': ('rocket',), 'files': ('Rocket.toml',)},
+    'Warp': {'ecosystem': 'rust', 'packages': ('warp',), 'imports': ('warp',)},
+    'Tide': {'ecosystem': 'rust', 'packages': ('tide',), 'imports': ('tide',)},
+    'Tauri': {'ecosystem': 'rust', 'packages': ('tauri',), 'imports': ('tauri',), 'files': ('tauri.conf.json',)},
+    'Leptos': {'ecosystem': 'rust', 'packages': ('leptos',), 'imports': ('leptos',)},
+    'Yew': {'ecosystem': 'rust', 'packages': ('yew',), 'imports': ('yew',)},
+    # PHP
+    'Laravel': {'ecosystem': 'php', 'packages': ('laravel/framework', 'laravel/lumen-framework'),
+                'imports': ('illuminate',), 'files': ('artisan',)},
+    'Symfony': {'ecosystem': 'php', 'packages': ('symfony/framework-bundle', 'symfony/symfony'),
+                'imports': ('symfony',), 'files': ('symfony.lock', 'bin/console')},
+    'Drupal': {'ecosystem': 'php', 'packages': ('drupal/core', 'drupal/core-recommended'), 'imports': ('drupal',)},
+    'WordPress': {'ecosystem': 'php', 'packages': ('johnpbloch/wordpress', 'roots/wordpress'),
+                  'files': ('wp-config.php', 'wp-config-sample.php', 'wp-login.php')},
+    'CodeIgniter': {'ecosystem': 'php', 'packages': ('codeigniter4/framework',), 'imports': ('codeigniter',),
+                    'files': ('spark',)},
+    'CakePHP': {'ecosystem': 'php', 'packages': ('cakephp/cakephp',), 'imports': ('cake',)},
+    'Slim': {'ecosystem': 'php', 'packages': ('slim/slim',), 'imports': ('slim',)},
+    'Yii': {'ecosystem': 'php', 'packages': ('yiisoft/yii2',), 'imports': ('yii',)},
+    'Laminas': {'ecosystem': 'php', 'packages': ('laminas/laminas-mvc',), 'imports': ('laminas',)},
+    # Ruby
+    'Ruby on Rails': {'ecosystem': 'ruby', 'packages': ('rails', 'railties'), 'imports': ('rails',),
+                      'files': ('bin/rails', 'config/routes.rb', 'config/application.rb')},
+    'Hanami': {'ecosystem': 'ruby', 'packages': ('hanami',), 'imports': ('hanami',)},
+    'Sinatra': {'ecosystem': 'ruby', 'packages': ('sinatra',), 'imports': ('sinatra',)},
+    'Grape': {'ecosystem': 'ruby', 'packages': ('grape',), 'imports': ('grape',)},
+    'Roda': {'ecosystem': 'ruby', 'packages': ('roda',), 'imports': ('roda',)},
+}
+
+# Fichiers de code examinés, par écosystème
+ECOSYSTEM_EXTENSIONS = {
+    'python': ('.py',),
+    'node': ('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.mts', '.cts', '.vue', '.svelte', '.astro'),
+    'jvm': ('.java', '.kt', '.kts', '.scala', '.groovy'),
+    'go': ('.go',),
+    'rust': ('.rs',),
+    'php': ('.php',),
+    'ruby': ('.rb',),
+}
+EXTENSION_ECOSYSTEMS = {ext: ecosystem for ecosystem, exts in ECOSYSTEM_EXTENSIONS.items() for ext in exts}
+
+# Modules importés (motifs bytes appliqués sans décoder le fichier) et
+# séparateur de leurs composantes. Le motif ne dépend pas des signatures :
+# chaque module trouvé est ensuite cherché dans un dictionnaire.
+IMPORT_PATTERNS = {
+    'python': (re.compile(rb'^[ \t]*(?:from|import)[ \t]+([\w.]+)', re.MULTILINE), '.'),
+    'node': (re.compile(rb'(?:\bfrom|\brequire\s*\(|\bimport\s*\(|^[ \t]*import)\s*["\']([^"\'\n]+)["\']',
+                        re.MULTILINE), '/'),
+    'jvm': (re.compile(rb'^[ \t]*import[ \t]+(?:static[ \t]+)?([\w.]+)', re.MULTILINE), '.'),
+    'go': (re.compile(rb'^[ \t]*(?:import[ \t]+)?(?:[\w.]+[ \t]+)?"([\w.~/-]+)"[ \t]*(?://.*)?$', re.MULTILINE), '/'),
+    'rust': (re.compile(rb'^[ \t]*(?:pub(?:\([\w: ]+\))?[ \t]+)?(?:use|extern[ \t]+crate)[ \t]+(?:::)?(\w+)',
+                        re.MULTILINE), '::'),
+    'php': (re.compile(rb'^[ \t]*use[ \t]+\\?([\w\\]+)', re.MULTILINE), '\\'),
+    'ruby': (re.compile(rb'^[ \t]*require[ \t(]+["\']([^"\']+)["\']', re.MULTILINE), '/'),
+}
+
+# Probabilité qu'un indice désigne à lui seul le framework ; les indices
+# se combinent comme des événements indépendants (1 - Π(1 - p)). Chaque
+# fichier qui importe le framework compte, jusqu'à IMPORT_EVIDENCE_FILES.
+EVIDENCE_WEIGHTS = {'package': 0.6, 'file': 0.5, 'import': 0.3}
+IMPORT_EVIDENCE_FILES = 5
+# Indices (paquets, fichiers) listés par framework dans le résultat
+EVIDENCE_SAMPLES = int(os.getenv("FRAMEWORK_EVIDENCE_SAMPLES", 5))
+
+ORDER = {name: position for position, name in enumerate(FRAMEWORKS)}
+
+
+def normalize(ecosystem, name):
+    """Forme canonique d'un nom de paquet ou de module dans son écosystème."""
+    name = name.lower()
+    if ecosystem == 'python':
+        return re.sub(r'[-_.]+', '-', name)
+    if ecosystem == 'rust':
+        return name.replace('-', '_')
+    return name
+
+
+def _index(kind, key=lambda ecosystem, token: (ecosystem, normalize(ecosystem, token))):
+    # {clé: (frameworks...)} : une recherche par clé, quel que soit le nombre de signatures
+    index = {}
+    for name, signature in FRAMEWORKS.items():
+        for token in signature.get(kind, ()):
+            k = key(signature['ecosystem'], token)
+            index[k] = index.get(k, ()) + (name,)
+    return index
+
+
+PACKAGES = _index('packages')
+IMPORTS = _index('imports', key=lambda ecosystem, token: (ecosystem, token.lower()))
+FILES = _index('files', key=lambda ecosystem, token: token)
+
+
+def import_frameworks(ecosystem, module):
+    """Frameworks du plus long préfixe de `module` (composante par composante) présent dans les signatures."""
+    _, separator = IMPORT_PATTERNS[ecosystem]
+    module = module.lower()
+    while module:
+        found = IMPORTS.get((ecosystem, module))
+        if found:
+            return found
+        module = module.rpartition(separator)[0]
+    return ()
+
+
+def imported_frameworks(path, buffer):
+    """Frameworks importés par un fichier de code (bytes ou mmap), en un seul passage."""
+    ecosystem = EXTENSION_ECOSYSTEMS[path[path.rfind('.'):].lower()]
+    pattern, _ = IMPORT_PATTERNS[ecosystem]
+    found, seen = set(), set()
+    for match in pattern.finditer(buffer):
+        module = match.group(1)
+        if module not in seen:
+            seen.add(module)
+            found.update(import_frameworks(ecosystem, module.decode('utf-8', 'replace')))
+    return frozenset(found)
+
+
+def file_frameworks(path):
+    """Frameworks dont `path` est un fichier de configuration caractéristique."""
+    found = FILES.get(path.rsplit('/', 1)[-1], ())
+    if '/' in path:
+        found += FILES.get(path, ())
+    return found
+
+
+def rank(manifests, paths, imports):
+    """Frameworks identifiés, par confiance décroissante.
+
+    `manifests` : {manifeste: (écosystème, noms des dépendances)} ; `paths` :
+    chemins des fichiers de l'arbre ; `imports` : {chemin: frameworks importés}
+    (imported_frameworks). Chaque framework indique sa confiance (0 à 1) et
+    les indices retenus.
+    """
+    evidence = {}
+
+    def entry(name):
+        return evidence.setdefault(name, {'packages': [], 'files': [], 'import_files': 0})
+
+    for manifest, (ecosystem, names) in manifests.items():
+        for name in names:
+            for framework in PACKAGES.get((ecosystem, normalize(ecosystem, name)), ()):
+                entry(framework)['packages'].append(f"{manifest}: {name}")
+    for path in paths:
+        for framework in file_frameworks(path):
+            entry(framework)['files'].append(path)
+    for frameworks in imports.values():
+        for framework in frameworks:
+            entry(framework)['import_files'] += 1
+
+    missed = {}
+    for name, found in evidence.items():
+        missed[name] = (1 - EVIDENCE_WEIGHTS['import']) ** min(found['import_files'], IMPORT_EVIDENCE_FILES)
+        if found['packages']:
+            missed[name] *= 1 - EVIDENCE_WEIGHTS['package']
+        if found['files']:
+            missed[name] *= 1 - EVIDENCE_WEIGHTS['file']
+
+    ranked = []
+    for name, found in evidence.items():
+        # Next.js n'est jamais classé après React, qu'il utilise
+        probability = missed[name] * missed.get(FRAMEWORKS[name].get('extends'), 1.0)
+        ranked.append({
+            'name': name,
+            'ecosystem': FRAMEWORKS[name]['ecosystem'],
+            'confidence': round(1 - probability, 2),
+            'evidence': {
+                'packages': found['packages'][:EVIDENCE_SAMPLES],
+                'files': sorted(found['files'])[:EVIDENCE_SAMPLES],
+                'import_files': found['import_files'],
+            },
+        })
+    ranked.sort(key=lambda framework: (-framework['confidence'], ORDER[framework['name']]))
+    return ranked
@@ -0,0 +1,288 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+
+import yaml
+
+from complexity import METRICS
+from logs import get_logger
+
+logger = get_logger("health")
+
+# Fichier YAML de règles supplémentaires du Health Score (vide : aucune)
+HEALTH_RULES_FILE = os.getenv("HEALTH_RULES_FILE", "")
+
+# Catégories du Health Score et leur score maximal, dans l'ordre du résultat
+DEFAULT_CATEGORIES = [
+    {"name": "tests", "max": 20},
+    {"name": "documentation", "max": 15},
+    {"name": "structure", "max": 15},
+    {"name": "best_practices", "max": 20},
+    {"name": "security", "max": 15},
+    {"name": "dependencies", "max": 15},
+    {"name": "maintainability", "max": 10},
+]
+
+# Règles par défaut, au même format que HEALTH_RULES_FILE. Une règle a une
+# seule condition parmi :
+#   exists: chemin           fichier ou dossier présent
+#   glob: motif              au moins un fichier correspondant ({count})
+#   contains: {file|glob, any: [...]}
+#                            l'une des chaînes apparaît (insensible à la casse)
+#   files_with: fait         fichiers dont le fait de la passe commune sur le
+#                            contenu est non nul ({count}, {path}, {value})
+#   metric: {name, min|max}  métrique de complexité du code dans l'intervalle
+#                            ({value} ; fausse si la métrique est inconnue)
+# `points` (par fichier avec per_file, plafonné par max_points), `detail`
+# (une fois), `detail_each` (par chaîne trouvée ou par fichier) et
+# `otherwise` (si la condition est fausse) complètent la règle.
+DEFAULT_RULES = [
+    {"category": "tests", "exists": "tests", "points": 10, "detail": "Dossier tests/ présent"},
+    {"category": "tests", "exists": "test", "points": 10, "detail": "Dossier test/ présent"},
+    {"category": "tests", "files_with": "tests", "points": 2, "per_file": True, "max_points": 10,
+     "detail_each": ["Fichier de test trouvé: {path}", "  - Contient {value} fonction(s) de test"],
+     "otherwise": "Aucun fichier de test trouvé"},
+    {"category": "documentation", "exists": "README.md", "points": 5, "detail": "README.md présent"},
+    {"category": "documentation", "exists": "docs", "points": 5, "detail": "Dossier docs présent"},
+    {"category": "documentation", "files_with": "documented", "points": 5,
+     "detail": "Fichiers avec documentation: {count}"},
+    {"category": "structure", "exists": "src", "points": 5, "detail": "Dossier src présent"},
+    {"category": "structure", "exists": "tests", "points": 5, "detail": "Dossier tests présent"},
+    {"category": "structure", "exists": "docs", "points": 5, "detail": "Dossier docs présent"},
+    {"category": "best_practices", "exists": ".gitignore", "points": 5, "detail": ".gitignore présent"},
+    {"category": "best_practices", "exists": "requirements.txt", "points": 5, "detail": "requirements.txt présent"},
+    {"category": "best_practices", "exists": "setup.py", "points": 5, "detail": "setup.py présent"},
+    {"category": "best_practices", "exists": "Dockerfile", "points": 5, "detail": "Dockerfile présent"},
+    {"category": "security", "exists": ".env.example", "points": 5, "detail": ".env.example présent"},
+    {"category": "security", "contains": {"file": "requirements.txt", "any": ["cryptography", "pyjwt"]},
+     "points": 5, "detail_each": ["{match} présent"]},
+    {"category": "dependencies", "contains": {"file": "requirements.txt", "any": ["=="]},
+     "points": 5, "detail": "Versions spécifiées"},
+    {"category": "dependencies", "contains": {"file": "requirements.txt", "any": ["fastapi"]},
+     "points": 5, "detail": "FastAPI présent"},
+    {"category": "dependencies", "contains": {"file": "requirements.txt", "any": ["pytest"]},
+     "points": 5, "detail": "pytest présent"},
+    {"category": "maintainability", "metric": {"name": "average_complexity", "max": 5}, "points": 5,
+     "detail": "Complexité cyclomatique moyenne: {value}"},
+    {"category": "maintainability", "metric": {"name": "average_maintainability", "min": 50}, "points": 5,
+     "detail": "Indice de maintenabilité moyen: {value}"},
+]
+
+CONDITIONS = ("exists", "glob", "contains", "files_with", "metric")
+_RULE_KEYS = {"category", "points", "per_file", "max_points", "detail", "detail_each", "otherwise", *CONDITIONS}
+
+
+@dataclass(frozen=True)
+class Rule:
+    category: str
+    condition: str          # l'une de CONDITIONS
+    target: str             # chemin, motif ou nom du fait
+    points: int
+    needles: tuple = ()     # contains : chaînes recherchées
+    in_glob: bool = False   # contains : `target` est un motif
+    bounds: tuple = None    # metric : (min, max), None si non borné
+    per_file: bool = False
+    max_points: int = None
+    detail: str = None
+    detail_each: tuple = ()
+    otherwise: str = None
+
+
+def parse_rule(spec, categories, facts, metrics=()):
+    """Rule décrite par un dict (DEFAULT_RULES ou YAML) ; lève ValueError si elle est invalide."""
+    if not isinstance(spec, dict) or set(spec) - _RULE_KEYS:
+        raise ValueError(f"Règle invalide : {spec!r}")
+    conditions = [name for name in CONDITIONS if name in spec]
+    if len(conditions) != 1:
+        raise ValueError(f"Une seule condition parmi {', '.join(CONDITIONS)} attendue : {spec!r}")
+    if spec.get("category") not in categories:
+        raise ValueError(f"Catégorie inconnue : {spec.get('category')!r}")
+    if not isinstance(spec.get("points"), int):
+        raise ValueError(f"`points` entier attendu : {spec!r}")
+    condition, needles, in_glob, bounds = conditions[0], (), False, None
+    target = spec[condition]
+    if condition == "contains":
+        if not isinstance(target, dict) or not isinstance(target.get("any"), list) or \
+                len({"file", "glob"} & set(target)) != 1:
+            raise ValueError(f"contains : `file` ou `glob` et une liste `any` attendus : {spec!r}")
+        needles = tuple(str(needle) for needle in target["any"])
+        in_glob = "glob" in target
+        target = target["glob" if in_glob else "file"]
+    if condition == "metric":
+        if not isinstance(target, dict) or set(target) - {"name", "min", "max"} or \
+                not {"min", "max"} & set(target) or target.get("name") not in metrics:
+            raise ValueError(f"metric : `name` parmi {', '.join(metrics)} et `min` ou `max` attendus : {spec!r}")
+        bounds = (target.get("min"), target.get("max"))
+        target = target["name"]
+    if condition == "files_with" and target not in facts:
+        raise ValueError(f"files_with : fait inconnu {target!r} (connus : {', '.join(sorted(facts))})")
+    if not isinstance(target, str):
+        raise ValueError(f"Chemin ou motif attendu : {spec!r}")
+    detail_each = spec.get("detail_each", ())
+    return Rule(
+        category=spec["category"], condition=condition, target=target, points=spec["points"],
+        needles=needles, in_glob=in_glob, bounds=bounds, per_file=bool(spec.get("per_file")),
+        max_points=spec.get("max_points"), detail=spec.get("detail"),
+        detail_each=(detail_each,) if isinstance(detail_each, str) else tuple(detail_each),
+        otherwise=spec.get("otherwise"),
+    )
+
+
+class HealthPlan:
+    """Règles du Health Score compilées : leurs entrées sont lues en une seule passe.
+
+    Les chemins précis (existence, chaînes recherchées, un seul parcours par
+    fichier pour toutes les règles) forment `read_paths`, que l'analyse
+    incrémentale peut reprendre ; les motifs sont évalués en un seul parcours
+    de l'arbre. Les faits par fichier, dont les chaînes recherchées dans les
+    fichiers des motifs (règle 'needles', voir select_needles), viennent de
+    la passe commune sur le contenu.
+    """
+
+    def __init__(self, categories, rules, fingerprint=None):
+        self.categories = {category["name"]: category["max"] for category in categories}
+        self.rules = rules
+        # Empreinte des règles personnalisées (None : règles par défaut)
+        self.fingerprint = fingerprint
+        self.paths = sorted({rule.target for rule in rules if rule.condition == "exists"})
+        self.needles = {}
+        self.globs = {}
+        for rule in rules:
+            if rule.condition == "contains" and not rule.in_glob:
+                self.needles.setdefault(rule.target, set()).update(rule.needles)
+            elif rule.condition == "glob" or rule.in_glob:
+                self.globs.setdefault(rule.target, set()).update(rule.needles)
+
+    @property
+    def content_patterns(self):
+        """Fichiers et motifs dont le contenu est lu (à extraire lors d'un checkout partiel)."""
+        return sorted(set(self.needles) | {pattern for pattern, needles in self.globs.items() if needles})
+
+    def read_paths(self, snapshot):
+        """Existence des chemins et chaînes trouvées dans chaque fichier désigné."""
+        exists = {path: snapshot.exists(path) for path in self.paths}
+        found = {
+            path: snapshot.find_needles(path, *sorted(needles)) if snapshot.is_file(path) else set()
+            for path, needles in self.needles.items()
+        }
+        return exists, found
+
+    def select_needles(self, entry):
+        """Chaînes à rechercher dans `entry` pour les motifs `contains` (sélecteur de la passe commune)."""
+        needles = set()
+        for pattern, pattern_needles in self.globs.items():
+            if pattern_needles and fnmatchcase(entry.path, pattern):
+                needles |= pattern_needles
+        return tuple(sorted(needles)) if needles else False
+
+    def match_globs(self, snapshot, facts):
+        """Fichiers de chaque motif, en un parcours de l'arbre, et chaînes trouvées dans chacun.
+
+        Les chaînes sont celles relevées par la passe commune (`facts`) : les
+        fichiers ne sont pas relus.
+        """
+        matches, found = {pattern: [] for pattern in self.globs}, {}
+        if not self.globs:
+            return matches, found
+        for entry in snapshot.iter_files():
+            for pattern in self.globs:
+                if fnmatchcase(entry.path, pattern):
+                    matches[pattern].append(entry.path)
+            if facts.get(entry.path, {}).get('needles'):
+                found[entry.path] = set(facts[entry.path]['needles'])
+        return matches, found
+
+    def _evaluate(self, rule, exists, found, matches, glob_found, facts, metrics):
+        # (condition remplie, éléments pour detail_each, champs de `detail`)
+        if rule.condition == "exists":
+            return exists[rule.target], [], {}
+        if rule.condition == "metric":
+            value, (low, high) = metrics.get(rule.target), rule.bounds
+            ok = value is not None and (low is None or value >= low) and (high is None or value <= high)
+            return ok, [], {"value": value}
+        if rule.condition == "contains":
+            if rule.in_glob:
+                hits = {needle for path in matches[rule.target] for needle in rule.needles
+                        if needle.lower() in glob_found.get(path, ())}
+            else:
+                hits = {needle for needle in rule.needles if needle.lower() in found[rule.target]}
+            items = [{"match": needle} for needle in rule.needles if needle in hits]
+            return bool(items), items, {"count": len(items)}
+        if rule.condition == "glob":
+            items = [{"path": path} for path in matches[rule.target]]
+        else:
+            items = [{"path": path, "value": file_facts[rule.target]}
+                     for path, file_facts in facts.items() if file_facts.get(rule.target)]
+        return bool(items), items, {"count": len(items)}
+
+    def evaluate(self, snapshot, facts, read=None, metrics=None):
+        """Score et détails de chaque catégorie.
+
+        `read` : résultat de read_paths déjà obtenu ; `metrics` : synthèse de
+        la complexité du code (complexity.summarize).
+        """
+        exists, found = read if read is not None else self.read_paths(snapshot)
+        matches, glob_found = self.match_globs(snapshot, facts)
+        scores = {name: 0 for name in self.categories}
+        details = {name: [] for name in self.categories}
+        for rule in self.rules:
+            ok, items, fields = self._evaluate(rule, exists, found, matches, glob_found, facts, metrics or {})
+            if not ok:
+                if rule.otherwise:
+                    details[rule.category].append(rule.otherwise)
+                continue
+            points = rule.points * len(items) if rule.per_file else rule.points
+            if rule.max_points is not None:
+                points = min(points, rule.max_points)
+            scores[rule.category] += points
+            if rule.detail:
+                details[rule.category].append(rule.detail.format(**fields))
+            for item in items:
+                details[rule.category].extend(template.format(**fields, **item) for template in rule.detail_each)
+
+        result = {
+            name: {"score": min(scores[name], maximum), "max": maximum, "details": details[name]}
+            for name, maximum in self.categories.items()
+        }
+        total = sum(category["score"] for category in result.values())
+        max_score = sum(self.categories.values())
+        return {
+            "total_score": total,
+            "max_score": max_score,
+            "percentage": (total / max_score) * 100 if max_score else 0,
+            "details": result,
+        }
+
+
+def build_plan(path=HEALTH_RULES_FILE, facts=(), metrics=METRICS):
+    """Plan des règles par défaut et de celles du fichier YAML `path` (catégories et règles).
+
+    Les catégories du fichier s'ajoutent aux catégories par défaut (ou en
+    changent le maximum). Lève ValueError si le fichier est invalide.
+    """
+    categories = [dict(category) for category in DEFAULT_CATEGORIES]
+    specs, fingerprint = list(DEFAULT_RULES), None
+    if path:
+        with open(path, "rb") as f:
+            content = f.read()
+        fingerprint = hashlib.sha256(content).hexdigest()[:12]
+        try:
+            custom = yaml.safe_load(content) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path} : YAML invalide ({e})")
+        if not isinstance(custom, dict):
+            raise ValueError(f"{path} : `categories` et `rules` attendus")
+        for category in custom.get("categories") or []:
+            if not isinstance(category, dict) or not isinstance(category.get("max"), int):
+                raise ValueError(f"{path} : catégorie invalide {category!r}")
+            existing = next((c for c in categories if c["name"] == category.get("name")), None)
+            if existing is not None:
+                existing["max"] = category["max"]
+            else:
+                categories.append({"name": category["name"], "max": category["max"]})
+        specs += custom.get("rules") or []
+        logger.info("%d règles du Health Score chargées depuis %s", len(custom.get("rules") or []), path)
+    names = {category["name"] for category in categories}
+    rules = [parse_rule(spec, names, facts, metrics) for spec in specs]
+    return HealthPlan(categories, rules, fingerprint=fingerprint)
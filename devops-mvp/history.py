@@ -0,0 +1,147 @@
+import heapq
+import os
+import subprocess
+
+from fetching import is_partial
+from logs import get_logger
+from workers import check_deadline
+
+logger = get_logger("history")
+
+# Nombre de blobs listés parmi les plus gros de l'historique
+SIZE_TOP_BLOBS = int(os.getenv("SIZE_TOP_BLOBS", 20))
+# Au-delà de cette taille (octets), une version de fichier fait de son chemin
+# un candidat à Git LFS ; de même pour un binaire dont l'ensemble des
+# versions dépasse ce seuil
+SIZE_LFS_MIN_BYTES = int(os.getenv("SIZE_LFS_MIN_BYTES", 1024 * 1024))
+# Seuls les blobs d'au moins cette taille sont cumulés par chemin, et au
+# plus SIZE_MAX_TRACKED_PATHS chemins (les plus lourds) : la mémoire reste
+# bornée quel que soit le nombre d'objets
+SIZE_TRACK_MIN_BYTES = int(os.getenv("SIZE_TRACK_MIN_BYTES", 64 * 1024))
+SIZE_MAX_TRACKED_PATHS = int(os.getenv("SIZE_MAX_TRACKED_PATHS", 100_000))
+
+# Extensions de fichiers binaires, qui ne se compressent ni ne se
+# différencient d'une version à l'autre
+BINARY_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.tif', '.tiff', '.webp', '.psd',
+    '.pdf', '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.tar', '.jar', '.war', '.whl',
+    '.exe', '.dll', '.so', '.dylib', '.a', '.lib', '.bin', '.iso', '.dmg',
+    '.mp3', '.mp4', '.mov', '.avi', '.wav', '.flac', '.ogg', '.webm',
+    '.onnx', '.pt', '.pth', '.h5', '.pkl', '.parquet', '.sqlite', '.db',
+})
+
+# Lignes lues entre deux vérifications de l'échéance du job
+_DEADLINE_EVERY = 10_000
+
+
+def count_objects(repo):
+    """Statistiques de `git count-objects -v`, tailles converties en octets."""
+    stats = {}
+    for line in repo.git.count_objects("-v").splitlines():
+        key, _, value = line.partition(":")
+        stats[key.strip()] = int(value)
+    return {
+        "objects": stats.get("count", 0) + stats.get("in-pack", 0),
+        "loose_objects": stats.get("count", 0),
+        "loose_bytes": stats.get("size", 0) * 1024,
+        "packs": stats.get("packs", 0),
+        "pack_bytes": stats.get("size-pack", 0) * 1024,
+        "garbage_bytes": stats.get("size-garbage", 0) * 1024,
+    }
+
+
+def _is_binary(path):
+    return os.path.splitext(path)[1].lower() in BINARY_EXTENSIONS
+
+
+def _prune(paths, keep):
+    # Chemins les plus lourds conservés ; un chemin retiré peut revenir,
+    # son cumul est alors sous-estimé
+    heaviest = heapq.nlargest(keep, paths.items(), key=lambda item: item[1][1])
+    paths.clear()
+    paths.update(heaviest)
+
+
+def iter_blobs(repo, revs=("--all",)):
+    """(sha, taille, taille sur disque, chemin) de chaque blob de l'historique, en flux.
+
+    rev-list alimente directement cat-file : aucune liste d'objets n'est
+    construite en mémoire. Dans un clone partiel, les blobs absents sont
+    ignorés (`--missing=allow-promisor`) au lieu d'être téléchargés.
+    """
+    env = {**os.environ, "GIT_DIR": repo.git_dir}
+    rev_list = subprocess.Popen(
+        ["git", "rev-list", "--objects", "--missing=allow-promisor", *revs, "--"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+    cat_file = subprocess.Popen(
+        ["git", "cat-file", "--batch-check=%(objecttype) %(objectname) %(objectsize) %(objectsize:disk) %(rest)"],
+        stdin=rev_list.stdout, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+    rev_list.stdout.close()
+    try:
+        for n, line in enumerate(cat_file.stdout):
+            if n % _DEADLINE_EVERY == 0:
+                check_deadline()
+            if not line.startswith(b"blob "):
+                continue
+            fields = line.rstrip(b"\n").split(b" ", 4)
+            path = fields[4].decode("utf-8", "replace") if len(fields) > 4 else ""
+            yield fields[1].decode(), int(fields[2]), int(fields[3]), path
+        if cat_file.wait() or rev_list.wait():
+            raise RuntimeError("Échec du parcours des objets git (rev-list/cat-file)")
+    finally:
+        for process in (cat_file, rev_list):
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        cat_file.stdout.close()
+
+
+def history_size(repo, top=SIZE_TOP_BLOBS, lfs_min_bytes=SIZE_LFS_MIN_BYTES,
+                 track_min_bytes=SIZE_TRACK_MIN_BYTES, max_paths=SIZE_MAX_TRACKED_PATHS):
+    """Taille du repository et de son historique : objets, plus gros blobs, candidats LFS.
+
+    Les blobs sont parcourus une seule fois, en flux ; seuls les `top` plus
+    gros et les chemins de plus de `track_min_bytes` sont conservés. Un
+    chemin est candidat à Git LFS si l'une de ses versions dépasse
+    `lfs_min_bytes`, ou si c'est un binaire dont les versions cumulées le
+    dépassent ; `growth_bytes` est ce que ses versions successives ajoutent
+    à l'historique.
+    """
+    largest = []          # tas (taille, sha, taille sur disque, chemin)
+    paths = {}            # {chemin: [versions, octets, octets sur disque, plus grosse version]}
+    blobs = blob_bytes = disk_bytes = 0
+    for sha, size, disk, path in iter_blobs(repo):
+        blobs += 1
+        blob_bytes += size
+        disk_bytes += disk
+        if len(largest) < top:
+            heapq.heappush(largest, (size, sha, disk, path))
+        elif size > largest[0][0]:
+            heapq.heapreplace(largest, (size, sha, disk, path))
+        if size >= track_min_bytes:
+            stats = paths.setdefault(path, [0, 0, 0, 0])
+            stats[0] += 1
+            stats[1] += size
+            stats[2] += disk
+            stats[3] = max(stats[3], size)
+            if len(paths) > max_paths:
+                _prune(paths, max_paths // 2)
+
+    candidates = [
+        {"path": path, "versions": versions, "growth_bytes": total, "growth_disk_bytes": disk,
+         "largest_bytes": biggest}
+        for path, (versions, total, disk, biggest) in paths.items()
+        if biggest >= lfs_min_bytes or (_is_binary(path) and total >= lfs_min_bytes)
+    ]
+    candidates.sort(key=lambda candidate: (-candidate["growth_disk_bytes"], candidate["path"]))
+    return {
+        "objects": count_objects(repo),
+        "history": {"blobs": blobs, "blob_bytes": blob_bytes, "blob_disk_bytes": disk_bytes},
+        "largest_blobs": [
+            {"path": path, "sha": sha, "size": size, "disk_size": disk}
+            for size, sha, disk, path in sorted(largest, reverse=True)
+        ],
+        "lfs_candidates": candidates[:top],
+        # Clone partiel : les blobs jamais récupérés ne sont pas comptés
+        "partial": is_partial(repo),
+    }
@@ -0,0 +1,80 @@
+import os
+import sys
+
+# Fichiers cités en exemple pour chaque module de l'index des imports
+IMPORT_SAMPLE_FILES = int(os.getenv("ANALYSIS_IMPORT_SAMPLE_FILES", 5))
+# Taille par défaut et maximale d'une page de GET /imports
+IMPORTS_PAGE_SIZE = int(os.getenv("IMPORTS_PAGE_SIZE", 100))
+IMPORTS_MAX_PAGE_SIZE = int(os.getenv("IMPORTS_MAX_PAGE_SIZE", 1000))
+
+STDLIB_MODULES = frozenset(sys.stdlib_module_names)
+
+CATEGORIES = ("stdlib", "third_party", "local")
+
+
+def top_level(name, path=''):
+    """Module de premier niveau d'un import (`a.b.c` -> `a`, `.a.b` -> `a`).
+
+    Un import relatif sans module (`from . import x`) désigne le package du
+    fichier `path` qui le contient : `.` dans `pkg/core.py` -> `pkg` ; à la
+    racine, le nom relatif lui-même est conservé.
+    """
+    module = name.lstrip('.').split('.', 1)[0]
+    if module or not name:
+        return module
+    directories = path.split('/')[:-1]
+    return directories[-len(name)] if len(directories) >= len(name) else name
+
+
+def local_modules(paths):
+    """Modules importables depuis le repository : fichiers .py et packages (dossiers avec __init__.py)."""
+    names = set()
+    for path in paths:
+        directory, _, name = path.rpartition('/')
+        if name == '__init__.py':
+            if directory:
+                names.add(directory.rsplit('/', 1)[-1])
+        elif name.endswith('.py'):
+            names.add(name[:-3])
+    return names
+
+
+def categorize(name, local):
+    # Un module du repository masque celui de la bibliothèque standard
+    if name.startswith('.') or top_level(name) in local:
+        return "local"
+    return "stdlib" if top_level(name) in STDLIB_MODULES else "third_party"
+
+
+def build_index(file_imports, local, sample=IMPORT_SAMPLE_FILES):
+    """Index des imports : {catégorie: {module: {"count": n, "files": [...]}}}.
+
+    `file_imports` itère sur (chemin, imports) dans l'ordre du snapshot ;
+    `count` est le nombre d'imports du module, `files` les `sample` premiers
+    fichiers qui l'importent. Les modules sont triés par nombre d'imports.
+    """
+    index = {category: {} for category in CATEGORIES}
+    for path, imports in file_imports:
+        for name in imports:
+            module = top_level(name, path)
+            entry = index[categorize(name, local)].setdefault(module, {"count": 0, "files": []})
+            entry["count"] += 1
+            # Les imports d'un même fichier se suivent
+            if len(entry["files"]) < sample and entry["files"][-1:] != [path]:
+                entry["files"].append(path)
+    return {
+        category: dict(sorted(modules.items(), key=lambda item: (-item[1]["count"], item[0])))
+        for category, modules in index.items()
+    }
+
+
+def import_page(file_imports, module=None, offset=0, limit=IMPORTS_PAGE_SIZE):
+    """Page du détail par fichier : fichiers ayant des imports (de `module` seulement, si précisé)."""
+    total, items = 0, []
+    for path, imports in file_imports:
+        if not imports or (module is not None and all(top_level(name, path) != module for name in imports)):
+            continue
+        if offset <= total < offset + limit:
+            items.append({"path": path, "imports": list(imports)})
+        total += 1
+    return {"total": total, "offset": offset, "limit": limit, "items": items}
@@ -0,0 +1,186 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from cache import normalize_repo_url
+from logs import get_logger
+from scanning import scan_contents
+from workers import Repo
+
+logger = get_logger("incremental")
+
+# Nombre de repositories dont le dernier état d'analyse est conservé en
+# mémoire pour l'analyse incrémentale (0 : désactivée)
+INCREMENTAL_MAX_REPOS = int(os.getenv("ANALYSIS_INCREMENTAL_MAX_REPOS", 32))
+
+# Clé du snapshot sous laquelle sont mémorisées les contributions par
+# fichier de la passe commune sur le contenu (main.content_facts)
+CONTENTS_KEY = 'contents'
+
+
+@dataclass
+class Baseline:
+    """État d'une analyse, repris pour analyser un commit suivant.
+
+    Les contributions par fichier sont des fonctions du seul fichier (chemin
+    et contenu) ; les vérifications au niveau du repository sont conservées
+    avec les chemins qu'elles ont consultés (voir run_check).
+    """
+    commit: str
+    version: str
+    facts: dict             # {chemin: {règle: valeur}}
+    sizes: dict             # {chemin: taille ou None}, tous les fichiers du snapshot
+    extension_counts: dict
+    total_size: int
+    unknown_sizes: int
+    checks: dict            # {nom: (AccessLog, résultat)}
+
+
+def run_check(snapshot, check):
+    """Résultat de `check(snapshot)`, avec les chemins qu'elle a consultés.
+
+    Lors d'une analyse incrémentale, le résultat est repris tel quel si
+    aucun de ces chemins n'a changé. Une vérification qui parcourt l'arbre
+    ou un résultat mémorisé est toujours recalculée.
+    """
+    def compute():
+        with snapshot.tracking() as log:
+            return log, check(snapshot)
+    return snapshot.memo(('check', check.__name__), compute)[1]
+
+
+def capture(snapshot, version):
+    """Baseline d'un snapshot analysé, None si la passe sur le contenu n'a pas eu lieu."""
+    memo = snapshot.memoized()
+    if CONTENTS_KEY not in memo or snapshot.commit is None:
+        return None
+    return Baseline(
+        commit=snapshot.commit,
+        version=version,
+        facts=memo[CONTENTS_KEY],
+        sizes={path: entry.size for path, entry in snapshot.files.items()},
+        extension_counts=snapshot.extension_counts(),
+        total_size=snapshot.total_size(),
+        unknown_sizes=snapshot.unknown_sizes(),
+        checks={key[1]: value for key, value in memo.items() if isinstance(key, tuple) and key[0] == 'check'},
+    )
+
+
+def changed_paths(repo_path, base, head):
+    """{chemin: statut} des fichiers ajoutés (A), modifiés (M/T) ou supprimés (D) entre deux commits."""
+    output = Repo(repo_path).git.diff("--name-status", "--no-renames", "-z", base, head, "--")
+    fields = output.split("\0")
+    return {fields[i + 1]: fields[i] for i in range(0, len(fields) - 1, 2)}
+
+
+def _extension(path):
+    return os.path.splitext(path.rsplit('/', 1)[-1])[1].lower()
+
+
+def apply(snapshot, baseline, changed, selectors):
+    """Prépare `snapshot` à partir de `baseline` : seuls les fichiers de `changed` sont relus.
+
+    Les contributions par fichier, le décompte des extensions et les tailles
+    sont mis à jour fichier par fichier ; les vérifications dont aucune
+    entrée n'a changé sont reprises. Renvoie le nombre de vérifications reprises.
+    """
+    fresh = scan_contents(snapshot, selectors, paths=sorted(changed))
+    # Même ordre que la passe complète : celui du snapshot
+    facts = {}
+    for path in snapshot.files:
+        value = fresh.get(path) if path in changed else baseline.facts.get(path)
+        if value is not None:
+            facts[path] = value
+    snapshot.seed(CONTENTS_KEY, facts)
+
+    counts = dict(baseline.extension_counts)
+    total_size, unknown_sizes = baseline.total_size, baseline.unknown_sizes
+    for path in changed:
+        if path in baseline.sizes:
+            ext = _extension(path)
+            counts[ext] -= 1
+            if not counts[ext]:
+                del counts[ext]
+            if baseline.sizes[path] is None:
+                unknown_sizes -= 1
+            else:
+                total_size -= baseline.sizes[path]
+        entry = snapshot.files.get(path)
+        if entry is not None:
+            counts[entry.ext] = counts.get(entry.ext, 0) + 1
+            if entry.size is None:
+                unknown_sizes += 1
+            else:
+                total_size += entry.size
+    snapshot.seed('extension_counts', counts)
+    snapshot.seed('total_size', total_size)
+    snapshot.seed('unknown_sizes', unknown_sizes)
+
+    reused = 0
+    for name, (log, result) in baseline.checks.items():
+        if not log.touched_by(changed):
+            snapshot.seed(('check', name), (log, copy.deepcopy(result)))
+            reused += 1
+    return reused
+
+
+class BaselineStore:
+    """Dernier état d'analyse de chaque repository (LRU en mémoire)."""
+
+    def __init__(self, max_repos=INCREMENTAL_MAX_REPOS):
+        self.max_repos = max_repos
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"incremental": 0, "full": 0, "diff_errors": 0}
+
+    def get(self, repo_url, version):
+        with self._lock:
+            baseline = self._entries.get(normalize_repo_url(repo_url))
+            if baseline is None or baseline.version != version:
+                return None
+            self._entries.move_to_end(normalize_repo_url(repo_url))
+            return baseline
+
+    def put(self, repo_url, baseline):
+        if baseline is None or self.max_repos <= 0:
+            return
+        key = normalize_repo_url(repo_url)
+        with self._lock:
+            self._entries[key] = baseline
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_repos:
+                self._entries.popitem(last=False)
+
+    def prepare(self, repo_url, snapshot, version, selectors):
+        """Applique au snapshot le dernier état connu du repository, si possible.
+
+        Renvoie le commit de référence, ou None si l'analyse doit être complète
+        (aucun état, même commit, commit de référence absent du clone...).
+        """
+        baseline = self.get(repo_url, version)
+        if baseline is None or snapshot.commit is None or baseline.commit == snapshot.commit:
+            self._count("full")
+            return None
+        try:
+            changed = changed_paths(snapshot.root, baseline.commit, snapshot.commit)
+        except Exception as e:
+            # Clone superficiel, historique réécrit : analyse complète
+            logger.info("Diff %s..%s impossible pour %s: %s", baseline.commit, snapshot.commit, repo_url, e)
+            self._count("diff_errors")
+            self._count("full")
+            return None
+        reused = apply(snapshot, baseline, changed, selectors)
+        self._count("incremental")
+        logger.info("Analyse incrémentale de %s depuis %s: %d fichiers modifiés, %d vérifications reprises",
+                    repo_url, baseline.commit, len(changed), reused)
+        return baseline.commit
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "repositories": len(self._entries), "max_repositories": self.max_repos}
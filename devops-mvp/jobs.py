@@ -0,0 +1,166 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Nombre de jobs terminés conservés pour GET /jobs/{id}
+JOB_RETENTION = 1000
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class Job:
+    """Analyse asynchrone d'un repository, observable par polling ou SSE.
+
+    Les étapes sont publiées depuis le thread du worker ; chaque abonné SSE
+    reçoit les événements via sa propre file asyncio (call_soon_threadsafe).
+    """
+
+    def __init__(self, key, repo_url):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.repo_url = repo_url
+        self.status = "queued"
+        self.commit = None
+        self.result = None
+        self.timed_out = False
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []
+        self.done = Future()
+        # Partagé par tous les abonnés : il ne doit jamais pouvoir être annulé
+        # (l'annulation d'un abonné ferait échouer les autres et finish)
+        self.done.set_running_or_notify_cancel()
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def _publish(self, event, data):
+        with self._lock:
+            item = (event, {**data, "job_id": self.id, "time": time.time()})
+            self.events.append(item)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    def start(self):
+        self.status = "running"
+        self._publish("status", {"status": self.status})
+
+    def stage_done(self, stage):
+        self._publish("stage", {"stage": stage, "elapsed": round(time.time() - self.created_at, 3)})
+
+    def finish(self, result, timed_out=False):
+        self.result = result
+        self.commit = result.get("commit")
+        self.timed_out = timed_out
+        self.status = "succeeded" if result.get("status") == "success" else "failed"
+        self.finished_at = time.time()
+        self._publish("done", {"status": self.status})
+        self.done.set_result(result)
+
+    def wait(self):
+        """Attente asyncio du résultat, propre à l'appelant.
+
+        L'annuler (client déconnecté, lot interrompu) n'affecte ni le job ni
+        les autres abonnés.
+        """
+        return asyncio.shield(asyncio.wrap_future(self.done))
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATUSES
+
+    def subscribe(self, loop, queue):
+        """Renvoie les événements déjà émis et abonne `queue` aux suivants."""
+        with self._lock:
+            self._subscribers.append((loop, queue))
+            return list(self.events)
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = [(l, q) for l, q in self._subscribers if q is not queue]
+
+    def to_dict(self, include_result=True):
+        data = {
+            "job_id": self.id,
+            "repo_url": self.repo_url,
+            "status": self.status,
+            "commit": self.commit,
+            "stages": [e[1]["stage"] for e in self.events if e[0] == "stage"],
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if include_result and self.finished:
+            data["result"] = self.result
+        return data
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class JobManager:
+    """Registre des jobs avec déduplication des jobs en cours (single-flight).
+
+    Deux demandes ayant la même clé (URL normalisée, commit, version) pendant
+    qu'un job est en cours partagent ce job.
+    """
+
+    def __init__(self, retention=JOB_RETENTION):
+        self.retention = retention
+        self._jobs = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "deduplicated": 0}
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_or_create(self, key, repo_url):
+        """Renvoie (job, créé) ; un job en cours pour `key` est réutilisé."""
+        with self._lock:
+            job = self._in_flight.get(key)
+            if job is not None and not job.finished:
+                self.stats["deduplicated"] += 1
+                return job, False
+            job = Job(key, repo_url)
+            self._in_flight[key] = job
+            self._register(job)
+            return job, True
+
+    def completed(self, key, repo_url, result):
+        """Job déjà terminé (résultat servi par le cache)."""
+        job = Job(key, repo_url)
+        with self._lock:
+            self._register(job)
+        job.finish(result)
+        return job
+
+    def release(self, job):
+        """Retire `job` des jobs en cours (terminé ou jamais soumis)."""
+        with self._lock:
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+
+    def discard(self, job):
+        self.release(job)
+        with self._lock:
+            self._jobs.pop(job.id, None)
+
+    def _register(self, job):
+        self._jobs[job.id] = job
+        self.stats["created"] += 1
+        # Purge des jobs terminés les plus anciens
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.retention:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._in_flight), "retained": len(self._jobs)}
@@ -0,0 +1,188 @@
+import re
+
+# Langages reconnus à l'extension. Les noms sont ceux du champ `language`
+# de l'analyse (generate_pipeline_config s'y réfère).
+LANGUAGES = {
+    'Python': ('.py', '.pyw', '.pyi'),
+    'JavaScript/TypeScript': ('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx'),
+    'Java': ('.java',),
+    'Kotlin': ('.kt', '.kts'),
+    'Scala': ('.scala',),
+    'Go': ('.go',),
+    'Ruby': ('.rb', '.rbw'),
+    'PHP': ('.php', '.phtml', '.php3', '.php4', '.php5', '.php7'),
+    'Rust': ('.rs',),
+    'C/C++': ('.c', '.cpp', '.cc', '.cxx', '.hpp', '.hh', '.hxx'),
+    'Objective-C': ('.mm',),
+    'C#': ('.cs',),
+    'Swift': ('.swift',),
+    'Perl': ('.pm',),
+    'Shell': ('.sh', '.bash', '.zsh'),
+    'HTML/CSS': ('.html', '.htm', '.css', '.scss', '.sass'),
+}
+
+EXTENSIONS = {ext: language for language, exts in LANGUAGES.items() for ext in exts}
+
+# Extensions partagées par plusieurs langages : (langage par défaut,
+# [(motif sur le contenu, langage)...]). Seuls ces fichiers sont lus.
+AMBIGUOUS = {
+    '.h': ('C/C++', [
+        (re.compile(rb'^\s*(?:@interface|@protocol|@end|#import)\b', re.MULTILINE), 'Objective-C'),
+    ]),
+    '.m': ('MATLAB', [
+        (re.compile(rb'^\s*(?:@interface|@implementation|@protocol|#import|#include)\b', re.MULTILINE), 'Objective-C'),
+    ]),
+    '.pl': ('Perl', [
+        (re.compile(rb'^\s*(?:use\s+(?:strict|warnings)\b|my\s+[$@%]|sub\s+\w+\s*\{)', re.MULTILINE), 'Perl'),
+        (re.compile(rb'^\s*:-|^\w+\([^)]*\)\s*:-', re.MULTILINE), 'Prolog'),
+    ]),
+}
+
+# Fichiers exclus par défaut de la répartition, comme le fait linguist :
+# code tiers embarqué et fichiers générés. `.gitattributes` peut les y
+# remettre (`-linguist-vendored`) ou en exclure d'autres.
+VENDORED = re.compile(
+    r'(?:^|/)(?:node_modules|bower_components|vendor|vendors|third[_-]party|venv|\.venv|site-packages|'
+    r'__pycache__|dist)/')
+GENERATED = re.compile(r'(?:\.min\.(?:js|css)|_pb2(?:_grpc)?\.py|\.pb\.go|\.designer\.cs)$')
+
+ATTRIBUTES = ('linguist-vendored', 'linguist-generated')
+
+
+def disambiguate(path, buffer):
+    """Langage d'un fichier à l'extension ambiguë, d'après son contenu (bytes ou mmap)."""
+    default, heuristics = AMBIGUOUS[path[path.rfind('.'):].lower()]
+    for pattern, language in heuristics:
+        if pattern.search(buffer):
+            return language
+    return default
+
+
+def _translate(glob):
+    out, i = [], 0
+    while i < len(glob):
+        if glob.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif glob.startswith('/**', i) and i + 3 == len(glob):
+            out.append('/.*')
+            i += 3
+        elif glob[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif glob[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif glob[i] == '[' and ']' in glob[i + 2:]:
+            end = glob.index(']', i + 2)
+            content = glob[i + 1:end]
+            out.append('[' + ('^' + content[1:] if content[:1] == '!' else content) + ']')
+            i = end + 1
+        else:
+            out.append(re.escape(glob[i]))
+            i += 1
+    return ''.join(out)
+
+
+def attribute_pattern(pattern, base=''):
+    """Motif .gitattributes compilé en regex sur le chemin complet, None s'il ne désigne aucun fichier.
+
+    Comme git : sans "/", le motif porte sur le nom du fichier à toute
+    profondeur sous le dossier `base` du .gitattributes ; sinon il est relatif
+    à ce dossier. Les motifs négatifs et ceux qui finissent par "/" (dossiers)
+    ne s'appliquent à aucun fichier.
+    """
+    if not pattern or pattern.startswith('!') or pattern.endswith('/'):
+        return None
+    prefix = '^' + (re.escape(base + '/') if base else '')
+    if '/' in pattern:
+        return re.compile(prefix + _translate(pattern.lstrip('/')) + '$')
+    return re.compile(prefix + '(?:.*/)?' + _translate(pattern) + '$')
+
+
+def parse_gitattributes(text, base=''):
+    """Règles linguist d'un fichier .gitattributes : [(regex, {attribut: bool ou None})].
+
+    `attr` et `attr=true` activent l'attribut, `-attr` et `attr=false` le
+    désactivent, `!attr` rend la décision aux motifs par défaut (None).
+    """
+    rules = []
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+        values = {}
+        for field in fields[1:]:
+            for name in ATTRIBUTES:
+                if field in (name, f'{name}=true'):
+                    values[name] = True
+                elif field in (f'-{name}', f'{name}=false'):
+                    values[name] = False
+                elif field == f'!{name}':
+                    values[name] = None
+        regex = attribute_pattern(fields[0], base) if values else None
+        if regex is not None:
+            rules.append((regex, values))
+    return rules
+
+
+def excluded(path, rules=()):
+    """Vrai si le fichier est du code tiers ou généré (motifs par défaut, puis .gitattributes)."""
+    decided = {}
+    # La dernière règle qui s'applique l'emporte
+    for regex, values in reversed(rules):
+        if len(decided) == len(ATTRIBUTES):
+            break
+        if regex.match(path):
+            for name, value in values.items():
+                decided.setdefault(name, value)
+    vendored = decided.get('linguist-vendored')
+    generated = decided.get('linguist-generated')
+    if vendored is None:
+        vendored = bool(VENDORED.search(path))
+    if generated is None:
+        generated = bool(GENERATED.search(path))
+    return vendored or generated
+
+
+def breakdown(entries, rules=(), detected=None):
+    """Répartition des langages : fichiers, octets et pourcentage de chacun.
+
+    `entries` : FileEntry de l'arbre ; `rules` : règles .gitattributes
+    (parse_gitattributes, des moins aux plus prioritaires) ; `detected` :
+    langage des fichiers ambigus déjà lus ({chemin: langage}). Les
+    pourcentages portent sur les octets, ou sur le nombre de fichiers si la
+    taille de certains est inconnue (blobs non récupérés) ; `basis` l'indique.
+    """
+    detected = detected or {}
+    stats = {}
+    sizes_known = True
+    for entry in entries:
+        language = EXTENSIONS.get(entry.ext)
+        if language is None:
+            if entry.ext not in AMBIGUOUS:
+                continue
+            language = detected.get(entry.path) or AMBIGUOUS[entry.ext][0]
+        if excluded(entry.path, rules):
+            continue
+        files_bytes = stats.setdefault(language, [0, 0])
+        files_bytes[0] += 1
+        if entry.size is None:
+            sizes_known = False
+        else:
+            files_bytes[1] += entry.size
+
+    basis = 'bytes' if sizes_known else 'files'
+    weight = (lambda item: item[1][1]) if sizes_known else (lambda item: item[1][0])
+    total = sum(weight(item) for item in stats.items())
+    languages = [
+        {
+            'name': name,
+            'files': files,
+            'bytes': size if sizes_known else None,
+            'percentage': round(weight((name, (files, size))) * 100 / total, 2) if total else 0.0,
+        }
+        # Le poids le plus fort d'abord, puis par nom (résultat déterministe)
+        for name, (files, size) in sorted(stats.items(), key=lambda item: (-weight(item), item[0]))
+    ]
+    return {'basis': basis, 'languages': languages}
@@ -3,10 +3,11 @@ import shutil
 import tempfile
 import subprocess
 from fastapi import FastAPI, HTTPException, Request, Form, UploadFile, File
-from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import List, Optional
 import git
 import yaml
 import json
@@ -14,8 +15,64 @@ from pathlib import Path
 from fastapi.templating import Jinja2Templates
 import time
 import re
+import asyncio
+from contextlib import ExitStack, nullcontext
+from starlette.concurrency import run_in_threadpool
+
+from cache import AnalysisCache, resolve_default_ref, resolve_head
+from batch import BATCH_MAX_REPOSITORIES, format_ndjson, run_batch
+from jobs import JobManager, format_sse
+from complexity import COMPLEXITY_PARALLEL_MIN_FILES, blob_id, complexity_cache, summarize
+from health import HEALTH_RULES_FILE, build_plan
+from history import history_size
+from imports import IMPORTS_MAX_PAGE_SIZE, IMPORTS_PAGE_SIZE, build_index, import_page, local_modules
+from incremental import BaselineStore, capture, run_check
+from frameworks import EXTENSION_ECOSYSTEMS, rank
+from fetching import (
+    FETCH_MODE, MAX_SOURCE_SIZE, checkout_for_analysis, default_branch, full_checkout, object_store, requires_files,
+    resolve_commit,
+)
+from languages import AMBIGUOUS, breakdown, parse_gitattributes
+from logs import get_logger
+from manifests import (
+    LOCKFILE_READERS, MANIFEST_READERS, STACK_MANIFEST_READERS, count_packages, dependency_names, parse_file,
+)
+from mirrors import history_mirrors, mirror_store
+from metrics import ANALYSES, BYTES_READ, CLEANUP_SECONDS, CLONE_SECONDS, FILES_SCANNED, STAGE_SECONDS, render_prometheus
+from ports import PORT_CONFIG_PATTERNS, file_kind, find_port_candidates
+from pipelines import build_workflow, detect_stack, render as render_workflow
+from profiling import AnalysisProfiler
+from publishing import PushRejected, commit_files, push_commit
+from responses import analysis_etag, encode_response, etag_matches, not_modified
+from scanning import scan_contents
+from snapshot import RepoSnapshot, as_snapshot
+from webhooks import PushCoalescer, on_branch, parse_push, verify_signature
+from workers import BACKGROUND, AnalysisPool, JobTimeout, PoolFull, check_deadline
 
 app = FastAPI(title="DevOps-as-a-Service MVP")
+logger = get_logger("analysis")
+
+# Version de l'analyseur : à incrémenter dès que le résultat d'analyse change,
+# elle fait partie de la clé du cache (complétée plus bas par l'empreinte
+# des règles personnalisées du Health Score)
+ANALYZER_VERSION = "11"
+
+analysis_cache = AnalysisCache()
+# Clones, parcours et lectures de fichiers sont bloquants : ils s'exécutent
+# dans ce pool borné et jamais dans la boucle d'événements
+analysis_pool = AnalysisPool()
+# Jobs d'analyse asynchrones ; un job en cours est partagé par les demandes
+# portant sur le même repository au même commit
+job_manager = JobManager()
+# Dernier état d'analyse de chaque repository : un nouveau commit n'est
+# analysé qu'à partir des fichiers modifiés depuis cet état (git diff)
+baselines = BaselineStore()
+# Analyses d'arrière-plan déclenchées par les push (priorité basse, une
+# seule par branche à la fois)
+push_coalescer = PushCoalescer(
+    lambda fn, *args: analysis_pool.submit(fn, *args, priority=BACKGROUND),
+    lambda repo_url, sha: warm_analysis(repo_url, sha),
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,172 +87,576 @@ BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
-class RepoRequest(BaseModel):
+class SetupCIRequest(BaseModel):
+    repo_url: str
+    # Branche à créer pour le workflow (par défaut : commit sur la branche par défaut)
+    branch: Optional[str] = None
+
+class AnalyzeJobRequest(BaseModel):
     repo_url: str
+    force: bool = False
+
+class BatchRequest(BaseModel):
+    repo_urls: List[str]
+    force: bool = False
+
+def pool_error_response(error):
+    if isinstance(error, PoolFull):
+        return JSONResponse(
+            status_code=429,
+            content={"status": "error", "message": str(error)},
+            headers={"Retry-After": str(error.retry_after)},
+        )
+    return JSONResponse(status_code=504, content={"status": "error", "message": str(error)})
 
 @app.post("/setup-ci")
-async def setup_ci(req: RepoRequest):
-    tmp_dir = tempfile.mkdtemp()
+async def setup_ci(req: SetupCIRequest):
     try:
-        repo = git.Repo.clone_from(req.repo_url, tmp_dir)
-        if os.path.exists(os.path.join(tmp_dir, "main.py")) or os.path.exists(os.path.join(tmp_dir, "app.py")):
-            stack = "python"
-        else:
-            raise HTTPException(status_code=400, detail="Stack non détectée")
+        return await analysis_pool.run(setup_ci_job, req.repo_url, req.branch)
+    except (PoolFull, JobTimeout) as e:
+        return pool_error_response(e)
 
-        workflow_dir = os.path.join(tmp_dir, ".github", "workflows")
-        os.makedirs(workflow_dir, exist_ok=True)
-        workflow_file = os.path.join(workflow_dir, "ci.yml")
+# Fichier du workflow généré et message du commit qui l'ajoute
+CI_WORKFLOW_PATH = ".github/workflows/ci.yml"
+CI_COMMIT_MESSAGE = "feat: add auto-generated CI workflow"
 
-        with open(workflow_file, "w") as f:
-            f.write(generate_github_action(stack))
+def setup_ci_job(repo_url, branch=None):
+    """Ajoute le workflow CI au HEAD de la branche par défaut et le pousse, sans checkout.
 
-        repo.git.add(A=True)
-        repo.git.commit(m="feat: add auto-generated CI workflow")
-        repo.git.push()
+    Le commit est créé dans un repository bare (miroir ou clone sans blobs,
+    voir fetching.object_store) par publishing.commit_files, puis poussé sur
+    la branche par défaut ou, avec `branch`, sur une nouvelle branche.
+    """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        with object_store(repo_url, os.path.join(tmp_dir, "repo.git")) as repo:
+            if branch is not None:
+                try:
+                    repo.git.check_ref_format("--branch", branch)
+                except git.GitCommandError:
+                    raise HTTPException(status_code=400, detail=f"Nom de branche invalide : {branch}")
+            base_ref = default_branch(repo)
+            parent = repo.git.rev_parse(base_ref)
+            # Seule la racine de l'arbre est listée (objets tree, aucun blob)
+            root = repo.git.ls_tree("--name-only", parent).splitlines()
+            if detect_stack(root) is None:
+                raise HTTPException(status_code=400, detail="Stack non détectée")
 
-        return {"message": "Workflow CI/CD généré et poussé avec succès."}
+            target = f"refs/heads/{branch}" if branch else base_ref
+            workflow = generate_github_action(root, branch=base_ref[len("refs/heads/"):])
+            commit = commit_files(repo, parent, {CI_WORKFLOW_PATH: workflow.encode("utf-8")}, CI_COMMIT_MESSAGE)
+            if commit is None:
+                return {"message": "Workflow CI/CD déjà à jour.", "branch": base_ref[len("refs/heads/"):],
+                        "commit": parent}
+            push_commit(repo, commit, target)
+            return {"message": "Workflow CI/CD généré et poussé avec succès.",
+                    "branch": target[len("refs/heads/"):], "commit": commit}
+    except PushRejected as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (HTTPException, JobTimeout):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        shutil.rmtree(tmp_dir)
-
-def generate_github_action(stack):
-    if stack == "python":
-        return """name: CI
-
-on:
-  push:
-    branches: [ main ]
-
-jobs:
-  build:
-    runs-on: ubuntu-latest
-    steps:
-    - uses: actions/checkout@v3
-    - name: Set up Python
-      uses: actions/setup-python@v4
-      with:
-        python-version: '3.10'
-    - name: Install dependencies
-      run: |
-        python -m pip install --upgrade pip
-        pip install -r requirements.txt
-    - name: Run tests
-      run: |
-        pytest || echo 'No tests found'
-    - name: Build Docker image
-      run: |
-        docker build -t myapp:latest .
-        docker images
-"""
-    return ""
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def generate_github_action(root, branch="main"):
+    """Workflow CI au format YAML pour un repository dont la racine contient `root`."""
+    return render_workflow(build_workflow(root, branch=branch))
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+@app.get("/cache/stats")
+async def cache_stats():
+    return {**analysis_cache.get_stats(), "complexity": complexity_cache.get_stats()}
+
+@app.get("/pool/stats")
+async def pool_stats():
+    return analysis_pool.get_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/incremental/stats")
+async def incremental_stats():
+    return baselines.get_stats()
+
+@app.get("/imports")
+async def list_imports(request: Request, repo_url: str, module: str = None, offset: int = 0,
+                       limit: int = IMPORTS_PAGE_SIZE):
+    """Imports de chaque fichier Python au dernier commit, par pages (détail de analysis["imports"]).
+
+    Le détail est conservé dans le cache avec le résultat d'analyse du même
+    commit ; l'analyse passe par start_analysis (cache, déduplication).
+    """
+    if offset < 0 or not 0 < limit <= IMPORTS_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"offset positif et limit entre 1 et {IMPORTS_MAX_PAGE_SIZE} attendus")
+    try:
+        job = await run_in_threadpool(start_analysis, repo_url)
+        result = await job.wait()
+        detail = await run_in_threadpool(cached_file_imports, repo_url, result)
+        if detail is None and result.get("status") == "success":
+            # Résultat en cache sans son détail (évincé entre-temps) : le
+            # commit est analysé à nouveau, une seule fois pour toutes les demandes
+            job = await run_in_threadpool(start_analysis, repo_url, True, result["commit"])
+            result = await job.wait()
+            detail = await run_in_threadpool(cached_file_imports, repo_url, result)
+    except PoolFull as e:
+        return pool_error_response(e)
+    if job.timed_out:
+        return JSONResponse(status_code=504, content=result)
+    if result.get("status") != "success":
+        return encode_response(request, result, status_code=500)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Détail des imports indisponible pour ce repository")
+    etag = analysis_etag(result["commit"], ANALYZER_VERSION)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    page = import_page(detail, module=module, offset=offset, limit=limit)
+    return encode_response(request, {"repo_url": repo_url, "commit": result["commit"], "module": module, **page},
+                           etag=etag)
+
+@app.get("/repository-size")
+async def repository_size(request: Request, repo_url: str):
+    """Taille du repository et de son historique : objets git, plus gros blobs, candidats à Git LFS."""
+    try:
+        result = await analysis_pool.run(repository_size_job, repo_url)
+    except (PoolFull, JobTimeout) as e:
+        return pool_error_response(e)
+    return encode_response(request, result, status_code=200 if result["status"] == "success" else 500)
+
+def repository_size_job(repo_url):
+    # L'historique complet (toutes les branches) n'est disponible que dans un
+    # miroir, quel que soit le mode de récupération des analyses ; les blobs
+    # de tout l'historique y sont lus, le miroir doit donc être complet
+    try:
+        with history_mirrors().using(repo_url) as mirror:
+            return {"status": "success", "repo_url": repo_url, **history_size(mirror)}
+    except JobTimeout:
+        raise
+    except Exception as e:
+        logger.error("Erreur lors de l'analyse de la taille de %s: %s", repo_url, e)
+        return {"status": "error", "message": str(e)}
+
+def imports_key(repo_url, commit):
+    # Détail par fichier des imports (GET /imports), à côté du résultat d'analyse du même commit
+    return AnalysisCache.make_key(repo_url, commit, f"{ANALYZER_VERSION}/imports")
+
+def cached_file_imports(repo_url, result):
+    """[(chemin, imports)] du commit analysé par `result`, None s'il n'est pas (ou plus) en cache."""
+    if result.get("status") != "success":
+        return None
+    return analysis_cache.get(imports_key(repo_url, result["commit"]))
+
+@app.get("/webhooks/stats")
+async def webhook_stats():
+    return push_coalescer.get_stats()
+
+@app.post("/webhooks/push", status_code=202)
+async def push_webhook(request: Request):
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=401, detail="Signature du webhook invalide")
+    if request.headers.get("X-GitHub-Event", "push") != "push":
+        return {"status": "ignored", "reason": "événement autre que push"}
+    try:
+        push = parse_push(json.loads(body))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if push.ref is not None and push.default_ref is None:
+        # Payload sans branche par défaut (générique) : elle est lue sur le remote
+        try:
+            push = on_branch(push, await run_in_threadpool(resolve_default_ref, push.repo_url))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Branche par défaut introuvable : {e}")
+    if push.skip:
+        return {"status": "ignored", "reason": push.skip}
+    try:
+        status = push_coalescer.push(push)
+    except PoolFull as e:
+        return pool_error_response(e)
+    return {"status": status, "repo_url": push.repo_url, "commit": push.sha}
+
+@app.get("/jobs/stats")
+async def jobs_stats():
+    return job_manager.get_stats()
+
+@app.post("/jobs/analyze", status_code=202)
+async def create_analysis_job(req: AnalyzeJobRequest):
+    try:
+        job = await run_in_threadpool(start_analysis, req.repo_url, req.force)
+    except PoolFull as e:
+        return pool_error_response(e)
+    return job.to_dict(include_result=False)
+
+@app.get("/jobs/{job_id}")
+async def get_analysis_job(request: Request, job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    # Un job terminé avec succès ne change plus : les interrogations suivantes reçoivent 304
+    etag = result_etag(job.result) if job.finished else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    return encode_response(request, job.to_dict(), etag=etag)
+
+@app.get("/jobs/{job_id}/events")
+async def analysis_job_events(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+
+    async def stream():
+        queue = asyncio.Queue()
+        past = job.subscribe(asyncio.get_running_loop(), queue)
+        try:
+            for event, data in past:
+                yield format_sse(event, data)
+                if event == "done":
+                    return
+            while True:
+                event, data = await queue.get()
+                yield format_sse(event, data)
+                if event == "done":
+                    return
+        finally:
+            job.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
 @app.post("/analyze-repo")
-async def analyze_repository(repo_url: str = Form(...)):
+async def analyze_repository(request: Request, repo_url: str = Form(...), force: bool = Form(False),
+                             profile: bool = Form(False)):
+    if profile or request.headers.get("X-Profile") == "1":
+        # Analyse dédiée, hors cache et hors déduplication, pour mesurer ce repository
+        try:
+            return await analysis_pool.run(profile_analysis, repo_url)
+        except (PoolFull, JobTimeout) as e:
+            return pool_error_response(e)
+    return await wait_for_analysis(request, repo_url, force)
+
+@app.get("/analyze-repo")
+async def analyze_repository_get(request: Request, repo_url: str, force: bool = False):
+    """Variante GET de /analyze-repo : avec If-None-Match, 304 si le HEAD n'a pas changé."""
+    head = None
+    if not force and request.headers.get("If-None-Match"):
+        # Seul le HEAD distant est consulté (git ls-remote) : ni cache, ni job
+        head = await run_in_threadpool(resolve_head_or_none, repo_url)
+        if head and etag_matches(request, analysis_etag(head, ANALYZER_VERSION)):
+            return not_modified(analysis_etag(head, ANALYZER_VERSION))
+    return await wait_for_analysis(request, repo_url, force, head)
+
+async def wait_for_analysis(request, repo_url, force, head=None):
+    # Enveloppe synchrone du job asynchrone, utilisée par templates/index.html
+    try:
+        job = await run_in_threadpool(start_analysis, repo_url, force, head)
+    except PoolFull as e:
+        return pool_error_response(e)
+    result = await job.wait()
+    if job.timed_out:
+        return JSONResponse(status_code=504, content=result)
+    return encode_response(request, result, etag=result_etag(result))
+
+def result_etag(result):
+    if result and result.get("status") == "success" and result.get("commit"):
+        return analysis_etag(result["commit"], ANALYZER_VERSION)
+    return None
+
+@app.post("/analyze-batch")
+async def analyze_batch(req: BatchRequest):
+    if len(req.repo_urls) > BATCH_MAX_REPOSITORIES:
+        raise HTTPException(status_code=400, detail=f"Au plus {BATCH_MAX_REPOSITORIES} repositories par lot")
+
+    async def analyze(repo_url):
+        # Le pool est partagé avec les autres clients : on attend qu'une place se libère
+        while True:
+            try:
+                job = await run_in_threadpool(start_analysis, repo_url, req.force)
+                break
+            except PoolFull as e:
+                await asyncio.sleep(e.retry_after)
+        return await job.wait()
+
+    async def stream():
+        async for item in run_batch(req.repo_urls, analyze):
+            yield format_ndjson(item)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def resolve_head_or_none(repo_url):
+    try:
+        return resolve_head(repo_url)
+    except Exception as e:
+        # L'erreur éventuelle sera remontée par le clone
+        logger.warning("Impossible de résoudre HEAD pour %s: %s", repo_url, e)
+        return None
+
+def start_analysis(repo_url, force=False, head=None):
+    """Renvoie le job analysant `repo_url` : servi par le cache, partagé ou nouveau.
+
+    `head` : commit déjà résolu par l'appelant (sinon, git ls-remote) ; c'est
+    ce commit, celui de la clé du job et du cache, qui est analysé.
+    """
+    if head is None:
+        head = resolve_head_or_none(repo_url)
+    key = AnalysisCache.make_key(repo_url, head or "unresolved", ANALYZER_VERSION)
+    if head and not force:
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            result = {"status": "success", "analysis": cached, "commit": head, "cached": True}
+            return job_manager.completed(key, repo_url, result)
+
+    job, created = job_manager.get_or_create(key, repo_url)
+    if created:
+        try:
+            # force : analyse complète, sans reprendre l'état du commit précédent.
+            # Le commit de la clé est celui analysé, même si un push est arrivé
+            # depuis sa résolution
+            analysis_pool.submit(run_analysis_job, job, not force, head)
+        except PoolFull:
+            job_manager.discard(job)
+            raise
+    return job
+
+def warm_analysis(repo_url, sha):
+    """Analyse d'arrière-plan après un push : préremplit le cache pour `sha`.
+
+    Le SHA (éventuellement abrégé) est d'abord résolu en SHA complet, celui
+    des clés de cache des demandes interactives, et c'est ce commit précis
+    qui est analysé, même si d'autres push sont arrivés depuis. Le job n'est
+    enregistré qu'au démarrage : une demande interactive arrivée entre-temps
+    a sa propre analyse, en priorité haute, et celle-ci est alors servie par
+    le cache.
+    """
+    sha = resolve_commit(repo_url, sha)
+    key = AnalysisCache.make_key(repo_url, sha, ANALYZER_VERSION)
+    if analysis_cache.get(key) is not None:
+        return "cached"
+    job, created = job_manager.get_or_create(key, repo_url)
+    if not created:
+        return "deduplicated"
+    run_analysis_job(job, rev=sha)
+    return job.status
+
+def run_analysis_job(job, incremental=True, rev=None):
+    job.start()
+    try:
+        # Le cache a déjà été consulté par start_analysis
+        job.finish(analyze_repository_job(job.repo_url, force=True, on_stage=job.stage_done,
+                                          incremental=incremental, rev=rev))
+    except JobTimeout as e:
+        job.finish({"status": "error", "message": str(e)}, timed_out=True)
+        raise
+    except Exception as e:
+        job.finish({"status": "error", "message": str(e)})
+        raise
+    finally:
+        job_manager.release(job)
+
+def profile_analysis(repo_url):
+    with AnalysisProfiler() as profiler:
+        result = analyze_repository_job(repo_url, force=True, profiler=profiler, incremental=False)
+    result["profile"] = profiler.report()
+    return result
+
+def analyze_repository_job(repo_url, force=False, on_stage=None, profiler=None, incremental=None, rev=None):
+    """Analyse `repo_url` au commit `rev` (SHA complet) ou, par défaut, à son HEAD distant."""
     temp_dir = None
+    checkout = ExitStack()
     try:
+        # Résultat déjà calculé pour ce commit ? (git ls-remote, sans clone)
+        if not force:
+            try:
+                head = rev or resolve_head(repo_url)
+            except Exception as e:
+                # L'erreur éventuelle sera remontée par le clone
+                logger.warning("Impossible de résoudre HEAD pour %s: %s", repo_url, e)
+                head = None
+            if head:
+                cached = analysis_cache.get(AnalysisCache.make_key(repo_url, head, ANALYZER_VERSION))
+                if cached is not None:
+                    ANALYSES.inc(status="cached")
+                    return {"status": "success", "analysis": cached, "commit": head, "cached": True}
+        
         # Créer un dossier temporaire unique
         temp_dir = tempfile.mkdtemp(prefix="repo_analysis_")
         repo_name = repo_url.split("/")[-1].replace(".git", "")
         local_path = os.path.join(temp_dir, repo_name)
         
-        print(f"Clonage du repository {repo_url} vers {local_path}")
+        logger.info("Clonage du repository %s vers %s", repo_url, local_path)
         
-        # Cloner avec fetch_depth=0 pour récupérer tout l'historique
-        repo = git.Repo.clone_from(repo_url, local_path, depth=None)
+        # Worktree sur le miroir local (ou clone superficiel) : seuls les
+        # fichiers déclarés par les détecteurs (@requires_files) sont
+        # récupérés. Le snapshot est partagé par tous les détecteurs.
+        with CLONE_SECONDS.time(mode=FETCH_MODE), profiler.stage("clone") if profiler else nullcontext():
+            snapshot = checkout.enter_context(checkout_for_analysis(repo_url, local_path, rev=rev))
+        if on_stage:
+            on_stage("clone")
         
         # Vérifier si le clonage a réussi
         if not os.path.exists(local_path):
             return {"status": "error", "message": "Échec du clonage du repository"}
         
-        # Récupérer la branche principale
-        try:
-            repo.git.checkout('main')
-        except:
-            try:
-                repo.git.checkout('master')
-            except:
-                print("Impossible de changer de branche")
-        
-        print(f"Contenu du dossier {local_path}:")
-        for root, dirs, files in os.walk(local_path):
-            # Ignorer le dossier .git
-            if '.git' in root:
-                continue
-                
-            print(f"\nDossier: {root}")
-            if files:
-                print("Fichiers:", files)
-                # Afficher les extensions des fichiers
-                extensions = set(os.path.splitext(f)[1] for f in files)
-                if extensions:
-                    print("Extensions trouvées:", extensions)
+        logger.info("Snapshot de %s: %d fichiers, %d dossiers", repo_url, len(snapshot.files), len(snapshot.dirs))
         
-        # Analyser la structure du projet
-        analysis = {
-            "language": detect_language(local_path),
-            "framework": detect_framework(local_path),
-            "dependencies": detect_dependencies(local_path),
-            "port": detect_port(local_path),
-            "suggested_pipeline": generate_pipeline_config(local_path),
-            "health_score": calculate_health_score(local_path),
-            "cloud_costs": analyze_cloud_costs(local_path)
-        }
+        # Analyse incrémentale (par défaut, sauf si force) : seuls les fichiers
+        # modifiés depuis le dernier commit analysé sont relus
+        if incremental is None:
+            incremental = not force
+        base = baselines.prepare(repo_url, snapshot, ANALYZER_VERSION, CONTENT_SELECTORS) if incremental else None
+        analysis = analyze_snapshot(snapshot, on_stage=on_stage, profiler=profiler)
+        FILES_SCANNED.observe(len(snapshot.files))
+        BYTES_READ.observe(snapshot.bytes_read)
+        ANALYSES.inc(status="success")
         
-        print(f"Analyse terminée: {analysis}")
+        logger.info("Analyse terminée pour %s au commit %s", repo_url, snapshot.commit)
+        analysis_cache.put(AnalysisCache.make_key(repo_url, snapshot.commit, ANALYZER_VERSION), analysis)
+        analysis_cache.put(imports_key(repo_url, snapshot.commit),
+                           [[path, list(imports)] for path, imports in _file_imports(content_facts(snapshot))])
+        baselines.put(repo_url, capture(snapshot, ANALYZER_VERSION))
         
-        return {"status": "success", "analysis": analysis}
+        result = {"status": "success", "analysis": analysis, "commit": snapshot.commit, "cached": False}
+        if base:
+            result["incremental_from"] = base
+        return result
+    except JobTimeout:
+        ANALYSES.inc(status="timeout")
+        raise
     except Exception as e:
-        print(f"Erreur lors de l'analyse: {str(e)}")
+        ANALYSES.inc(status="error")
+        logger.error("Erreur lors de l'analyse de %s: %s", repo_url, e)
         return {"status": "error", "message": str(e)}
     finally:
-        # Nettoyage du dossier temporaire
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-                print(f"Dossier temporaire {temp_dir} supprimé avec succès")
-            except Exception as e:
-                print(f"Erreur lors de la suppression du dossier temporaire: {str(e)}")
+        with CLEANUP_SECONDS.time(), profiler.stage("cleanup") if profiler else nullcontext():
+            checkout.close()
+            # Nettoyage du dossier temporaire
+            if temp_dir and os.path.exists(temp_dir):
+                try:
+                    shutil.rmtree(temp_dir)
+                    logger.debug("Dossier temporaire %s supprimé", temp_dir)
+                except Exception as e:
+                    logger.warning("Erreur lors de la suppression du dossier temporaire %s: %s", temp_dir, e)
+
+# Étapes de l'analyse, dans l'ordre : chacune reçoit le snapshot et les
+# résultats des étapes précédentes (langage et framework sont réutilisés
+# par detect_port et generate_pipeline_config). Le deuxième élément est le
+# nom de l'événement de progression publié à la fin de l'étape.
+ANALYSIS_STAGES = [
+    # Renseigne aussi analysis["languages"] (répartition par langage)
+    ("language", "language", lambda snapshot, analysis: _language_stage(snapshot, analysis)),
+    # Renseigne aussi analysis["frameworks"] (frameworks classés par confiance)
+    ("framework", "framework", lambda snapshot, analysis: _framework_stage(snapshot, analysis)),
+    # Renseigne aussi analysis["lockfiles"] (paquets verrouillés par lockfile)
+    # et analysis["imports"] (index des imports du code)
+    ("dependencies", "dependencies", lambda snapshot, analysis: _dependencies_stage(snapshot, analysis)),
+    # Renseigne aussi analysis["ports"] (tous les candidats et leur provenance)
+    ("port", "port", lambda snapshot, analysis: _port_stage(snapshot, analysis)),
+    ("suggested_pipeline", "pipeline", lambda snapshot, analysis: generate_pipeline_config(
+        snapshot, language=analysis["language"], framework=analysis["framework"])),
+    ("complexity", "complexity", lambda snapshot, analysis: analyze_complexity(snapshot)),
+    ("health_score", "health", lambda snapshot, analysis: calculate_health_score(snapshot)),
+    ("cloud_costs", "costs", lambda snapshot, analysis: analyze_cloud_costs(snapshot)),
+]
+
+def analyze_snapshot(snapshot, on_stage=None, profiler=None):
+    analysis = {}
+    for key, event, stage in ANALYSIS_STAGES:
+        # Le job s'arrête entre deux étapes si son échéance est dépassée
+        check_deadline()
+        with STAGE_SECONDS.time(stage=event), profiler.stage(event, snapshot) if profiler else nullcontext():
+            analysis[key] = stage(snapshot, analysis)
+        if on_stage:
+            on_stage(event)
+    return analysis
+
+# Dossiers ignorés lors de l'analyse du code Python
+CODE_IGNORED_DIRS = ('venv', '.venv', '__pycache__')
+TEST_IGNORED_DIRS = ('venv', '.venv', '__pycache__', 'site-packages')
+PORT_IGNORED_DIRS = ('venv', '.venv', '__pycache__', 'site-packages', 'node_modules')
+# Code tiers embarqué : ses imports et fichiers de configuration ne décrivent pas le projet
+FRAMEWORK_IGNORED_DIRS = ('venv', '.venv', '__pycache__', 'site-packages', 'node_modules', 'bower_components', 'vendor')
+
+def is_test_file(entry):
+    return (
+        entry.name.startswith('test_') or
+        entry.name.endswith('_test.py') or
+        'tests/' in entry.path or
+        'test/' in entry.path
+    )
+
+# Fichiers lus par la passe commune sur le contenu (scanning.scan_contents) :
+# pour chaque règle, les fichiers auxquels elle s'applique. Framework,
+# dépendances, ports, tests et documentation en consomment les résultats.
+CONTENT_SELECTORS = {
+    'framework': lambda entry: entry.ext in EXTENSION_ECOSYSTEMS and not entry.under(FRAMEWORK_IGNORED_DIRS),
+    'imports': lambda entry: entry.ext == '.py' and not entry.under(CODE_IGNORED_DIRS),
+    'tests': lambda entry: entry.ext == '.py' and not entry.under(TEST_IGNORED_DIRS) and is_test_file(entry),
+    'documented': lambda entry: entry.ext == '.py',
+    'ports': lambda entry: file_kind(entry) == 'code' and not entry.under(PORT_IGNORED_DIRS),
+    'language': lambda entry: entry.ext in AMBIGUOUS,
+}
+
+# Règles du Health Score ; des règles personnalisées changent les résultats :
+# leur empreinte entre dans la version de l'analyseur (clés du cache, ETag)
+health_plan = build_plan(HEALTH_RULES_FILE, facts=CONTENT_SELECTORS)
+if health_plan.fingerprint:
+    ANALYZER_VERSION = f"{ANALYZER_VERSION}+{health_plan.fingerprint}"
+# Chaînes des règles `contains` sur motif : relevées par la passe commune
+if any(health_plan.globs.values()):
+    CONTENT_SELECTORS['needles'] = health_plan.select_needles
+
+def content_facts(path):
+    """Résultats par fichier de la passe commune, calculés une fois par snapshot."""
+    snapshot = as_snapshot(path)
+    return snapshot.memo('contents', lambda: scan_contents(snapshot, CONTENT_SELECTORS))
+
+def gitattributes_rules(snapshot):
+    """Règles linguist des fichiers .gitattributes, de la racine aux dossiers les plus profonds."""
+    paths = [path for path in snapshot.files if path == '.gitattributes' or path.endswith('/.gitattributes')]
+    rules = []
+    for path in sorted(paths, key=lambda path: (path.count('/'), path)):
+        text = snapshot.read_text(path)
+        if text:
+            rules.extend(parse_gitattributes(text, base=path.rpartition('/')[0]))
+    return rules
+
+@requires_files(".gitattributes", "*/.gitattributes")
+@requires_files(*(f"*{ext}" for ext in AMBIGUOUS), max_size=MAX_SOURCE_SIZE)
+def language_breakdown(path):
+    """Fichiers, octets et part de chaque langage (voir languages.breakdown).
+
+    Seules les métadonnées de l'arbre sont utilisées, sauf pour les
+    fichiers à l'extension ambiguë, départagés par la passe commune sur le
+    contenu.
+    """
+    snapshot = as_snapshot(path)
+    def compute():
+        detected = {rel: facts['language'] for rel, facts in content_facts(snapshot).items() if 'language' in facts}
+        return breakdown(snapshot.files.values(), gitattributes_rules(snapshot), detected)
+    return snapshot.memo('languages', compute)
 
 def detect_language(path):
-    print(f"\nDétection du langage dans {path}")
-    
-    # Dictionnaire des extensions par langage
-    language_extensions = {
-        'Python': ['.py', '.pyc', '.pyo', '.pyd', '.pyw', '.pyi'],
-        'JavaScript/TypeScript': ['.js', '.jsx', '.ts', '.tsx'],
-        'Java': ['.java', '.class', '.jar'],
-        'Go': ['.go'],
-        'Ruby': ['.rb', '.rbw'],
-        'PHP': ['.php', '.phtml', '.php3', '.php4', '.php5', '.php7'],
-        'Rust': ['.rs'],
-        'C/C++': ['.c', '.cpp', '.cc', '.cxx', '.h', '.hpp'],
-        'C#': ['.cs'],
-        'HTML/CSS': ['.html', '.htm', '.css', '.scss', '.sass'],
-    }
-    
-    # Compter les fichiers par extension
-    extension_count = {}
-    for root, _, files in os.walk(path):
-        if '.git' in root:
-            continue
-        for file in files:
-            ext = os.path.splitext(file)[1].lower()
-            extension_count[ext] = extension_count.get(ext, 0) + 1
-    
-    print(f"Extensions trouvées: {extension_count}")
-    
-    # Détecter le langage principal
-    for lang, exts in language_extensions.items():
-        count = sum(extension_count.get(ext, 0) for ext in exts)
-        if count > 0:
-            print(f"Langage détecté: {lang} ({count} fichiers)")
-            return lang
+    snapshot = as_snapshot(path)
+    return snapshot.memo('language', lambda: _detect_language(snapshot))
+
+def _language_stage(snapshot, analysis):
+    analysis["languages"] = language_breakdown(snapshot)
+    return detect_language(snapshot)
+
+def _detect_language(snapshot):
+    logger.debug("Détection du langage dans %s", snapshot.root)
+    
+    # Langage le plus représenté (en octets, ou en fichiers si des tailles
+    # sont inconnues), hors code tiers et fichiers générés
+    languages = language_breakdown(snapshot)
+    if languages["languages"]:
+        primary = languages["languages"][0]
+        logger.debug("Langage détecté: %s (%.1f %% des %s)", primary["name"], primary["percentage"],
+                     "octets" if languages["basis"] == "bytes" else "fichiers")
+        return primary["name"]
     
     # Vérifier les fichiers de configuration spécifiques
     config_files = {
@@ -210,687 +671,262 @@ def detect_language(path):
     
     for lang, files in config_files.items():
         for file in files:
-            if os.path.exists(os.path.join(path, file)):
-                print(f"Fichier de configuration trouvé pour {lang}: {file}")
+            if snapshot.exists(file):
+                logger.debug("Fichier de configuration trouvé pour %s: %s", lang, file)
                 return lang
     
-    print("Aucun langage détecté")
+    logger.debug("Aucun langage détecté")
     return "Unknown"
 
+def stack_manifests(snapshot):
+    """Dépendances déclarées dans les manifestes de chaque écosystème : {manifeste: (écosystème, noms)}."""
+    manifests = {}
+    for name, (ecosystem, reader) in STACK_MANIFEST_READERS.items():
+        names = parse_file(snapshot, name, reader, reduce=dependency_names)
+        if names:
+            manifests[name] = (ecosystem, names)
+    return manifests
+
+@requires_files(*STACK_MANIFEST_READERS)
+@requires_files(*(f"*{ext}" for ext in EXTENSION_ECOSYSTEMS), max_size=MAX_SOURCE_SIZE)
+def detect_frameworks(path):
+    """Frameworks identifiés, par confiance décroissante (voir frameworks.rank).
+
+    Manifestes, fichiers de configuration de l'arbre et modules importés par
+    le code (relevés par la passe commune sur le contenu) : chaque fichier
+    est lu une fois, quel que soit le nombre de signatures.
+    """
+    snapshot = as_snapshot(path)
+    def compute():
+        logger.debug("Détection des frameworks dans %s", snapshot.root)
+        imports = {rel: facts['framework'] for rel, facts in content_facts(snapshot).items() if facts.get('framework')}
+        paths = (entry.path for entry in snapshot.files.values() if not entry.under(FRAMEWORK_IGNORED_DIRS))
+        return rank(run_check(snapshot, stack_manifests), paths, imports)
+    return snapshot.memo('frameworks', compute)
+
 def detect_framework(path):
-    print(f"\nDétection du framework dans {path}")
-    
-    # Détection basée sur les fichiers de configuration
-    if os.path.exists(os.path.join(path, "requirements.txt")):
-        print("Analyse du fichier requirements.txt")
-        with open(os.path.join(path, "requirements.txt")) as f:
-            content = f.read().lower()
-            if "django" in content:
-                return "Django"
-            elif "flask" in content:
-                return "Flask"
-            elif "fastapi" in content:
-                return "FastAPI"
-            elif "pyramid" in content:
-                return "Pyramid"
-            elif "tornado" in content:
-                return "Tornado"
-    
-    # Détection basée sur la structure des fichiers
-    for root, _, files in os.walk(path):
-        if '.git' in root:
-            continue
-            
-        # Détection FastAPI
-        if any(f.endswith('.py') for f in files):
-            for file in files:
-                if file.endswith('.py'):
-                    try:
-                        with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                            content = f.read().lower()
-                            if 'fastapi' in content and 'app = fastapi' in content:
-                                return "FastAPI"
-                            elif 'flask' in content and 'app = flask' in content:
-                                return "Flask"
-                            elif 'django' in content and 'django.setup()' in content:
-                                return "Django"
-                    except Exception as e:
-                        print(f"Erreur lors de la lecture du fichier {file}: {str(e)}")
-    
-    # Détection basée sur la structure des dossiers
-    if os.path.exists(os.path.join(path, "manage.py")):
-        return "Django"
-    elif os.path.exists(os.path.join(path, "app.py")) or os.path.exists(os.path.join(path, "main.py")):
-        # Vérifier le contenu pour déterminer le framework
-        try:
-            with open(os.path.join(path, "main.py"), 'r', encoding='utf-8') as f:
-                content = f.read().lower()
-                if 'fastapi' in content:
-                    return "FastAPI"
-                elif 'flask' in content:
-                    return "Flask"
-        except:
-            pass
-    
-    print("Aucun framework détecté")
-    return "Unknown"
+    """Framework principal : le plus probable de detect_frameworks, "Unknown" à défaut."""
+    frameworks = detect_frameworks(path)
+    if not frameworks:
+        logger.debug("Aucun framework détecté")
+        return "Unknown"
+    return frameworks[0]["name"]
+
+def _framework_stage(snapshot, analysis):
+    analysis["frameworks"] = detect_frameworks(snapshot)
+    return detect_framework(snapshot)
 
+@requires_files(*MANIFEST_READERS, *LOCKFILE_READERS)
 def detect_dependencies(path):
-    print(f"\nDétection des dépendances dans {path}")
+    snapshot = as_snapshot(path)
+    logger.debug("Détection des dépendances dans %s", snapshot.root)
+    # Manifestes, repris d'un commit à l'autre s'ils n'ont pas changé (les
+    # imports du code sont indexés séparément par detect_imports)
+    dependencies = list(run_check(snapshot, manifest_dependencies))
+    logger.debug("%d dépendances trouvées", len(dependencies))
+    return dependencies
+
+def _file_imports(facts):
+    # Imports relevés par la passe commune, dans l'ordre du snapshot
+    return ((path, file_facts['imports']) for path, file_facts in facts.items() if 'imports' in file_facts)
+
+@requires_files("*.py", max_size=MAX_SOURCE_SIZE)
+def detect_imports(path):
+    """Index des imports Python par module : bibliothèque standard, tiers et modules du projet."""
+    snapshot = as_snapshot(path)
+    local = local_modules(entry.path for entry in snapshot.iter_files(ext='.py', exclude_dirs=CODE_IGNORED_DIRS))
+    return build_index(_file_imports(content_facts(snapshot)), local)
+
+def manifest_dependencies(snapshot):
+    # Python (requirements.txt), Node.js (package.json) puis Java (pom.xml),
+    # lus par blocs (voir manifests.py)
     dependencies = []
-    
-    # Python dependencies
-    if os.path.exists(os.path.join(path, "requirements.txt")):
-        print("Analyse du fichier requirements.txt")
-        try:
-            with open(os.path.join(path, "requirements.txt")) as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        # Extraire le nom et la version
-                        if '==' in line:
-                            name, version = line.split('==')
-                            dependencies.append(f"{name}=={version}")
-                        elif '>=' in line:
-                            name, version = line.split('>=')
-                            dependencies.append(f"{name}>={version}")
-                        elif '<=' in line:
-                            name, version = line.split('<=')
-                            dependencies.append(f"{name}<={version}")
-                        else:
-                            dependencies.append(line)
-        except Exception as e:
-            print(f"Erreur lors de la lecture de requirements.txt: {str(e)}")
-    
-    # Node.js dependencies
-    if os.path.exists(os.path.join(path, "package.json")):
-        print("Analyse du fichier package.json")
-        try:
-            with open(os.path.join(path, "package.json")) as f:
-                package_data = json.load(f)
-                if "dependencies" in package_data:
-                    for pkg, ver in package_data["dependencies"].items():
-                        dependencies.append(f"{pkg}@{ver}")
-                if "devDependencies" in package_data:
-                    for pkg, ver in package_data["devDependencies"].items():
-                        dependencies.append(f"{pkg}@{ver} (dev)")
-        except json.JSONDecodeError as e:
-            print(f"Erreur lors de la lecture de package.json: {str(e)}")
-    
-    # Java dependencies
-    if os.path.exists(os.path.join(path, "pom.xml")):
-        print("Analyse du fichier pom.xml")
-        try:
-            with open(os.path.join(path, "pom.xml")) as f:
-                content = f.read()
-                # Simple regex pour extraire les dépendances Maven
-                import re
-                deps = re.findall(r'<dependency>.*?<artifactId>(.*?)</artifactId>.*?<version>(.*?)</version>.*?</dependency>', content, re.DOTALL)
-                dependencies.extend([f"{dep[0]}@{dep[1]}" for dep in deps])
-        except Exception as e:
-            print(f"Erreur lors de la lecture de pom.xml: {str(e)}")
-    
-    # Détection des dépendances dans le code Python
-    for root, _, files in os.walk(path):
-        if '.git' in root or 'venv' in root or '__pycache__' in root:
-            continue
-        for file in files:
-            if file.endswith('.py'):
-                try:
-                    with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        # Détecter les imports
-                        import_lines = re.findall(r'^(?:from|import)\s+([\w\.]+)', content, re.MULTILINE)
-                        for imp in import_lines:
-                            if imp not in ['os', 'sys', 're', 'json', 'datetime', 'time']:  # Ignorer les imports standards
-                                dependencies.append(f"{imp} (importé dans {file})")
-                except Exception as e:
-                    print(f"Erreur lors de la lecture du fichier {file}: {str(e)}")
-    
-    print(f"Dépendances trouvées: {dependencies}")
+    for name, reader in MANIFEST_READERS.items():
+        dependencies.extend(parse_file(snapshot, name, reader) or ())
     return dependencies
 
-def detect_port(path):
-    print(f"\nDétection du port dans {path}")
-    port = None
-    
-    # Chercher dans les fichiers Python
-    for root, _, files in os.walk(path):
-        if '.git' in root or 'venv' in root or '__pycache__' in root:
-            continue
-        for file in files:
-            if file.endswith('.py'):
-                try:
-                    with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        # Chercher les patterns courants de définition de port
-                        port_patterns = [
-                            r'port\s*=\s*(\d+)',
-                            r'PORT\s*=\s*(\d+)',
-                            r'port\s*:\s*(\d+)',
-                            r'PORT\s*:\s*(\d+)',
-                            r'listen\(.*?,\s*(\d+)\)',
-                            r'bind\(.*?,\s*(\d+)\)',
-                            r'run\(.*?port\s*=\s*(\d+)',
-                            r'uvicorn\.run\(.*?port\s*=\s*(\d+)',
-                            r'flask\.run\(.*?port\s*=\s*(\d+)',
-                            r'django\.runserver\(.*?port\s*=\s*(\d+)'
-                        ]
-                        for pattern in port_patterns:
-                            matches = re.findall(pattern, content)
-                            if matches:
-                                port = int(matches[0])
-                                print(f"Port trouvé dans {file}: {port}")
-                                return port
-                except Exception as e:
-                    print(f"Erreur lors de la lecture du fichier {file}: {str(e)}")
-    
-    # Chercher dans les fichiers de configuration
-    config_files = [
-        'config.py', 'settings.py', '.env', 'docker-compose.yml', 'docker-compose.yaml',
-        'dockerfile', 'Dockerfile', 'nginx.conf', 'apache.conf'
-    ]
-    
-    for config_file in config_files:
-        config_path = os.path.join(path, config_file)
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Chercher les patterns de port dans les fichiers de configuration
-                    port_patterns = [
-                        r'PORT\s*=\s*(\d+)',
-                        r'port\s*=\s*(\d+)',
-                        r'port:\s*(\d+)',
-                        r'expose\s*(\d+)',
-                        r'EXPOSE\s*(\d+)',
-                        r'listen\s*(\d+)',
-                        r'LISTEN\s*(\d+)'
-                    ]
-                    for pattern in port_patterns:
-                        matches = re.findall(pattern, content)
-                        if matches:
-                            port = int(matches[0])
-                            print(f"Port trouvé dans {config_file}: {port}")
-                            return port
-            except Exception as e:
-                print(f"Erreur lors de la lecture de {config_file}: {str(e)}")
-    
-    # Port par défaut selon le framework détecté
-    framework = detect_framework(path)
-    default_ports = {
-        'FastAPI': 8000,
-        'Flask': 5000,
-        'Django': 8000,
-        'Node.js': 3000,
-        'React': 3000,
-        'Vue.js': 8080,
-        'Angular': 4200
-    }
-    
-    if framework in default_ports:
-        port = default_ports[framework]
-        print(f"Port par défaut pour {framework}: {port}")
-    else:
-        port = 8000  # Port par défaut générique
-        print(f"Port par défaut générique: {port}")
-    
-    return port
+def locked_packages(snapshot):
+    """Lockfiles présents à la racine et nombre de paquets qu'ils verrouillent."""
+    lockfiles = []
+    for name, (ecosystem, reader) in LOCKFILE_READERS.items():
+        summary = parse_file(snapshot, name, reader, reduce=count_packages)
+        if summary is not None:
+            lockfiles.append({"path": name, "ecosystem": ecosystem, **summary})
+    return lockfiles
 
-def generate_pipeline_config(path):
-    language = detect_language(path)
-    framework = detect_framework(path)
-    
-    # Configuration de base
-    config = {
-        "name": "CI/CD Pipeline",
-        "on": {
-            "push": {
-                "branches": ["main"]
-            },
-            "pull_request": {
-                "branches": ["main"]
-            }
-        },
-        "jobs": {
-            "build": {
-                "runs-on": "ubuntu-latest",
-                "steps": [
-                    {
-                        "uses": "actions/checkout@v3"
-                    }
-                ]
-            }
-        }
-    }
-    
-    # Ajout des étapes spécifiques selon le langage
-    if language == "Python":
-        config["jobs"]["build"]["steps"].extend([
-            {
-                "name": "Set up Python",
-                "uses": "actions/setup-python@v4",
-                "with": {
-                    "python-version": "3.9"
-                }
-            },
-            {
-                "name": "Install dependencies",
-                "run": "pip install -r requirements.txt"
-            },
-            {
-                "name": "Run tests",
-                "run": "python -m pytest"
-            }
-        ])
-    elif language == "JavaScript/TypeScript":
-        config["jobs"]["build"]["steps"].extend([
-            {
-                "name": "Set up Node.js",
-                "uses": "actions/setup-node@v3",
-                "with": {
-                    "node-version": "16"
-                }
-            },
-            {
-                "name": "Install dependencies",
-                "run": "npm install"
-            },
-            {
-                "name": "Run tests",
-                "run": "npm test"
-            }
-        ])
-    elif language == "Java":
-        config["jobs"]["build"]["steps"].extend([
-            {
-                "name": "Set up JDK",
-                "uses": "actions/setup-java@v3",
-                "with": {
-                    "java-version": "11",
-                    "distribution": "adopt"
-                }
-            },
-            {
-                "name": "Build with Maven",
-                "run": "mvn -B package --file pom.xml"
-            }
-        ])
-    
-    # Ajout d'une étape de build Docker si un Dockerfile est présent
-    if os.path.exists(os.path.join(path, "Dockerfile")):
-        config["jobs"]["build"]["steps"].extend([
-            {
-                "name": "Build Docker image",
-                "run": "docker build -t app:latest ."
-            }
-        ])
-    
-    return config
+def _dependencies_stage(snapshot, analysis):
+    analysis["lockfiles"] = run_check(snapshot, locked_packages)
+    analysis["imports"] = detect_imports(snapshot)
+    return detect_dependencies(snapshot)
 
-def calculate_health_score(path):
-    print(f"\nCalcul du Health Score pour {path}")
-    score = 0
-    max_score = 100
-    details = {}
-    
-    # 1. Vérification des tests (20 points)
-    test_score = check_tests(path)
-    score += test_score
-    details['tests'] = {
-        'score': test_score,
-        'max': 20,
-        'details': check_test_details(path)
-    }
-    
-    # 2. Vérification de la documentation (15 points)
-    doc_score = check_documentation(path)
-    score += doc_score
-    details['documentation'] = {
-        'score': doc_score,
-        'max': 15,
-        'details': check_doc_details(path)
-    }
-    
-    # 3. Vérification de la structure du projet (15 points)
-    structure_score = check_project_structure(path)
-    score += structure_score
-    details['structure'] = {
-        'score': structure_score,
-        'max': 15,
-        'details': check_structure_details(path)
-    }
-    
-    # 4. Vérification des bonnes pratiques (20 points)
-    practices_score = check_best_practices(path)
-    score += practices_score
-    details['best_practices'] = {
-        'score': practices_score,
-        'max': 20,
-        'details': check_practices_details(path)
-    }
-    
-    # 5. Vérification de la sécurité (15 points)
-    security_score = check_security(path)
-    score += security_score
-    details['security'] = {
-        'score': security_score,
-        'max': 15,
-        'details': check_security_details(path)
-    }
-    
-    # 6. Vérification des dépendances (15 points)
-    deps_score = check_dependencies_health(path)
-    score += deps_score
-    details['dependencies'] = {
-        'score': deps_score,
-        'max': 15,
-        'details': check_deps_details(path)
-    }
-    
-    return {
-        'total_score': score,
-        'max_score': max_score,
-        'percentage': (score / max_score) * 100,
-        'details': details
-    }
+@requires_files(*PORT_CONFIG_PATTERNS)
+@requires_files("*.py", max_size=MAX_SOURCE_SIZE)
+def detect_ports(path):
+    """Tous les ports trouvés avec leur provenance, par confiance décroissante."""
+    snapshot = as_snapshot(path)
+    def compute():
+        code_ports = {rel: facts['ports'] for rel, facts in content_facts(snapshot).items() if 'ports' in facts}
+        return find_port_candidates(snapshot, exclude_dirs=PORT_IGNORED_DIRS, code_ports=code_ports)
+    return snapshot.memo('ports', compute)
 
-def check_tests(path):
-    print(f"\nVérification des tests dans {path}")
-    score = 0
-    test_files = []
-    ignored_dirs = ['venv', '.git', '__pycache__', 'site-packages']
-    
-    # Vérifier la présence de dossiers de test
-    if os.path.exists(os.path.join(path, "tests")):
-        score += 10
-        print("Dossier tests/ trouvé")
-    if os.path.exists(os.path.join(path, "test")):
-        score += 10
-        print("Dossier test/ trouvé")
-    
-    # Parcourir les fichiers en ignorant les dossiers spécifiés
-    for root, dirs, files in os.walk(path):
-        # Ignorer les dossiers spécifiés
-        dirs[:] = [d for d in dirs if d not in ignored_dirs]
-        
-        for file in files:
-            if file.endswith('.py'):
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, path)
-                
-                # Vérifier si c'est un fichier de test
-                is_test_file = (
-                    file.startswith('test_') or 
-                    file.endswith('_test.py') or 
-                    'tests/' in relative_path or 
-                    'test/' in relative_path
-                )
-                
-                if is_test_file:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            # Vérifier si le fichier contient des fonctions de test
-                            if 'def test_' in content:
-                                test_files.append(relative_path)
-                                print(f"Fichier de test trouvé: {relative_path}")
-                    except Exception as e:
-                        print(f"Erreur lors de la lecture du fichier {file_path}: {str(e)}")
-    
-    # Calculer le score basé sur le nombre de fichiers de test
-    if test_files:
-        score += min(len(test_files) * 2, 10)  # Maximum 10 points pour les fichiers de test
-        print(f"Nombre de fichiers de test trouvés: {len(test_files)}")
-    
-    return min(score, 20)
+# Port par défaut selon le framework, si aucun fichier n'en déclare
+DEFAULT_PORTS = {
+    'FastAPI': 8000,
+    'Flask': 5000,
+    'Django': 8000,
+    'Starlette': 8000,
+    'Litestar': 8000,
+    'Sanic': 8000,
+    'Quart': 5000,
+    'Tornado': 8888,
+    'Streamlit': 8501,
+    'Dash': 8050,
+    'Gradio': 7860,
+    'Node.js': 3000,
+    'React': 3000,
+    'Next.js': 3000,
+    'Nuxt': 3000,
+    'Remix': 3000,
+    'Gatsby': 8000,
+    'SvelteKit': 5173,
+    'Svelte': 5173,
+    'Astro': 4321,
+    'Vue.js': 8080,
+    'Angular': 4200,
+    'NestJS': 3000,
+    'Express': 3000,
+    'Fastify': 3000,
+    'Koa': 3000,
+    'Hapi': 3000,
+    'Spring Boot': 8080,
+    'Spring': 8080,
+    'Quarkus': 8080,
+    'Micronaut': 8080,
+    'Ktor': 8080,
+    'Vert.x': 8080,
+    'Dropwizard': 8080,
+    'Play': 9000,
+    'Gin': 8080,
+    'Echo': 1323,
+    'Fiber': 3000,
+    'Chi': 8080,
+    'Gorilla Mux': 8080,
+    'Beego': 8080,
+    'Buffalo': 3000,
+    'Revel': 9000,
+    'Actix Web': 8080,
+    'Axum': 3000,
+    'Rocket': 8000,
+    'Warp': 3030,
+    'Laravel': 8000,
+    'Symfony': 8000,
+    'Ruby on Rails': 3000,
+    'Sinatra': 4567,
+    'Hanami': 2300,
+}
 
-def check_test_details(path):
-    print(f"\nDétails des tests dans {path}")
-    details = []
-    test_files = []
-    ignored_dirs = ['venv', '.git', '__pycache__', 'site-packages']
-    
-    # Vérifier les dossiers de test
-    if os.path.exists(os.path.join(path, "tests")):
-        details.append("Dossier tests/ présent")
-    if os.path.exists(os.path.join(path, "test")):
-        details.append("Dossier test/ présent")
-    
-    # Parcourir les fichiers en ignorant les dossiers spécifiés
-    for root, dirs, files in os.walk(path):
-        # Ignorer les dossiers spécifiés
-        dirs[:] = [d for d in dirs if d not in ignored_dirs]
-        
-        for file in files:
-            if file.endswith('.py'):
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, path)
-                
-                # Vérifier si c'est un fichier de test
-                is_test_file = (
-                    file.startswith('test_') or 
-                    file.endswith('_test.py') or 
-                    'tests/' in relative_path or 
-                    'test/' in relative_path
-                )
-                
-                if is_test_file:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            # Vérifier si le fichier contient des fonctions de test
-                            if 'def test_' in content:
-                                test_files.append(relative_path)
-                                details.append(f"Fichier de test trouvé: {relative_path}")
-                                # Compter le nombre de fonctions de test
-                                test_functions = content.count('def test_')
-                                if test_functions > 0:
-                                    details.append(f"  - Contient {test_functions} fonction(s) de test")
-                    except Exception as e:
-                        print(f"Erreur lors de la lecture du fichier {file_path}: {str(e)}")
-    
-    if not test_files:
-        details.append("Aucun fichier de test trouvé")
-    
-    return details
-
-def check_documentation(path):
-    score = 0
-    # Vérifier la présence de README
-    if os.path.exists(os.path.join(path, "README.md")):
-        score += 5
-    if os.path.exists(os.path.join(path, "docs")):
-        score += 5
-    
-    # Vérifier la documentation dans le code
-    doc_files = []
-    for root, _, files in os.walk(path):
-        if '.git' in root:
-            continue
-        for file in files:
-            if file.endswith('.py'):
-                try:
-                    with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        if '"""' in content or "'''" in content:
-                            doc_files.append(file)
-                except:
-                    pass
-    
-    if doc_files:
-        score += 5
-    
-    return min(score, 15)
+def detect_port(path, framework=None):
+    snapshot = as_snapshot(path)
+    candidates = detect_ports(snapshot)
+    if candidates:
+        best = candidates[0]
+        logger.debug("Port %d trouvé dans %s (%s)", best.port, best.source, best.kind)
+        return best.port
+    
+    # Port par défaut selon le framework détecté (mémorisé : pas de second parcours)
+    if framework is None:
+        framework = detect_framework(snapshot)
+    port = DEFAULT_PORTS.get(framework, 8000)
+    logger.debug("Port par défaut pour %s: %d", framework, port)
+    return port
 
-def check_doc_details(path):
-    details = []
-    
-    if os.path.exists(os.path.join(path, "README.md")):
-        details.append("README.md présent")
-    if os.path.exists(os.path.join(path, "docs")):
-        details.append("Dossier docs présent")
-    
-    doc_files = []
-    for root, _, files in os.walk(path):
-        if '.git' in root:
-            continue
-        for file in files:
-            if file.endswith('.py'):
-                try:
-                    with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        if '"""' in content or "'''" in content:
-                            doc_files.append(file)
-                except:
-                    pass
-    
-    if doc_files:
-        details.append(f"Fichiers avec documentation: {len(doc_files)}")
-    
-    return details
-
-def check_project_structure(path):
-    score = 0
-    # Vérifier la structure du projet
-    if os.path.exists(os.path.join(path, "src")):
-        score += 5
-    if os.path.exists(os.path.join(path, "tests")):
-        score += 5
-    if os.path.exists(os.path.join(path, "docs")):
-        score += 5
-    
-    return min(score, 15)
+def _port_stage(snapshot, analysis):
+    # Le port retenu et l'ensemble des candidats sont issus du même parcours
+    analysis["ports"] = [candidate.to_dict() for candidate in detect_ports(snapshot)]
+    return detect_port(snapshot, framework=analysis["framework"])
 
-def check_structure_details(path):
-    details = []
-    
-    if os.path.exists(os.path.join(path, "src")):
-        details.append("Dossier src présent")
-    if os.path.exists(os.path.join(path, "tests")):
-        details.append("Dossier tests présent")
-    if os.path.exists(os.path.join(path, "docs")):
-        details.append("Dossier docs présent")
-    
-    return details
-
-def check_best_practices(path):
-    score = 0
-    # Vérifier les bonnes pratiques
-    if os.path.exists(os.path.join(path, ".gitignore")):
-        score += 5
-    if os.path.exists(os.path.join(path, "requirements.txt")):
-        score += 5
-    if os.path.exists(os.path.join(path, "setup.py")):
-        score += 5
-    if os.path.exists(os.path.join(path, "Dockerfile")):
-        score += 5
-    
-    return min(score, 20)
+def root_files(snapshot):
+    """Noms des fichiers à la racine du repository."""
+    return [path for path in snapshot.files if "/" not in path]
 
-def check_practices_details(path):
-    details = []
-    
-    if os.path.exists(os.path.join(path, ".gitignore")):
-        details.append(".gitignore présent")
-    if os.path.exists(os.path.join(path, "requirements.txt")):
-        details.append("requirements.txt présent")
-    if os.path.exists(os.path.join(path, "setup.py")):
-        details.append("setup.py présent")
-    if os.path.exists(os.path.join(path, "Dockerfile")):
-        details.append("Dockerfile présent")
-    
-    return details
-
-def check_security(path):
-    score = 0
-    # Vérifier la sécurité
-    if os.path.exists(os.path.join(path, ".env.example")):
-        score += 5
-    if os.path.exists(os.path.join(path, "requirements.txt")):
-        try:
-            with open(os.path.join(path, "requirements.txt")) as f:
-                content = f.read().lower()
-                if "cryptography" in content or "pyjwt" in content:
-                    score += 5
-        except:
-            pass
-    
-    return min(score, 15)
+def generate_pipeline_config(path, language=None, framework=None):
+    """Workflow GitHub Actions suggéré (dict), voir pipelines.build_workflow.
 
-def check_security_details(path):
-    details = []
-    
-    if os.path.exists(os.path.join(path, ".env.example")):
-        details.append(".env.example présent")
-    
-    if os.path.exists(os.path.join(path, "requirements.txt")):
-        try:
-            with open(os.path.join(path, "requirements.txt")) as f:
-                content = f.read().lower()
-                if "cryptography" in content:
-                    details.append("cryptography présent")
-                if "pyjwt" in content:
-                    details.append("pyjwt présent")
-        except:
-            pass
-    
-    return details
+    Le gestionnaire de paquets et les clés de cache se déduisent des
+    fichiers de la racine, connus par l'arbre sans lire aucun contenu.
+    """
+    snapshot = as_snapshot(path)
+    if language is None:
+        language = detect_language(snapshot)
+    return build_workflow(root_files(snapshot), language=language)
 
-def check_dependencies_health(path):
-    score = 0
-    # Vérifier la santé des dépendances
-    if os.path.exists(os.path.join(path, "requirements.txt")):
-        try:
-            with open(os.path.join(path, "requirements.txt")) as f:
-                content = f.read()
-                # Vérifier si les versions sont spécifiées
-                if "==" in content:
-                    score += 5
-                # Vérifier si les dépendances sont à jour
-                if "fastapi" in content.lower():
-                    score += 5
-                if "pytest" in content.lower():
-                    score += 5
-        except:
-            pass
-    
-    return min(score, 15)
+def file_complexity(path):
+    """Métriques de complexité de chaque fichier Python, {chemin: complexity.measure(...)}.
 
-def check_deps_details(path):
-    details = []
-    
-    if os.path.exists(os.path.join(path, "requirements.txt")):
-        try:
-            with open(os.path.join(path, "requirements.txt")) as f:
-                content = f.read()
-                if "==" in content:
-                    details.append("Versions spécifiées")
-                if "fastapi" in content.lower():
-                    details.append("FastAPI présent")
-                if "pytest" in content.lower():
-                    details.append("pytest présent")
-        except:
-            pass
-    
-    return details
+    Les résultats sont conservés par SHA de blob (complexity_cache) : seuls
+    les fichiers jamais analysés sont compilés, en parallèle au-delà de
+    COMPLEXITY_PARALLEL_MIN_FILES fichiers. Hors arbre git, le SHA est
+    calculé depuis le contenu.
+    """
+    snapshot = as_snapshot(path)
+    def compute():
+        blobs, metrics, missing = {}, {}, []
+        for entry in snapshot.iter_files(ext='.py', exclude_dirs=CODE_IGNORED_DIRS):
+            if not snapshot.readable(entry.path):
+                continue
+            blob = snapshot.blob_ids.get(entry.path) or snapshot.scan(entry.path, blob_id)
+            if blob is None:
+                continue
+            blobs[entry.path] = blob
+            cached = complexity_cache.get(blob)
+            if cached is None:
+                missing.append(entry.path)
+            else:
+                metrics[entry.path] = cached
+        fresh = scan_contents(snapshot, {'complexity': lambda entry: True}, paths=missing,
+                              min_parallel=COMPLEXITY_PARALLEL_MIN_FILES)
+        for rel, facts in fresh.items():
+            metrics[rel] = facts['complexity']
+            complexity_cache.put(blobs[rel], facts['complexity'])
+        return {rel: metrics[rel] for rel in blobs if rel in metrics}
+    return snapshot.memo('complexity', compute)
+
+def analyze_complexity(path):
+    snapshot = as_snapshot(path)
+    return snapshot.memo('complexity_summary', lambda: summarize(file_complexity(snapshot)))
+
+def health_inputs(snapshot):
+    # Chemins précis lus par les règles : repris d'un commit à l'autre s'ils n'ont pas changé
+    return health_plan.read_paths(snapshot)
+
+@requires_files(*health_plan.content_patterns)
+@requires_files("*.py", max_size=MAX_SOURCE_SIZE)
+def calculate_health_score(path):
+    snapshot = as_snapshot(path)
+    logger.debug("Calcul du Health Score pour %s", snapshot.root)
+    # Toutes les règles (health.py et HEALTH_RULES_FILE) sont évaluées
+    # ensemble, à partir d'une seule lecture de chacune de leurs entrées
+    return health_plan.evaluate(snapshot, content_facts(snapshot), read=run_check(snapshot, health_inputs),
+                                metrics=analyze_complexity(snapshot))
 
 def analyze_cloud_costs(path):
-    print(f"\nAnalyse des coûts cloud pour {path}")
+    snapshot = as_snapshot(path)
+    logger.debug("Analyse des coûts cloud pour %s", snapshot.root)
     costs = {
-        "compute": analyze_compute_costs(path),
-        "storage": analyze_storage_costs(path),
-        "network": analyze_network_costs(path),
-        "database": analyze_database_costs(path),
+        "compute": run_check(snapshot, analyze_compute_costs),
+        "storage": run_check(snapshot, analyze_storage_costs),
+        "network": run_check(snapshot, analyze_network_costs),
+        "database": run_check(snapshot, analyze_database_costs),
         "recommendations": []
     }
     
     # Générer des recommandations basées sur l'analyse
-    costs["recommendations"] = generate_cost_recommendations(costs, path)
+    costs["recommendations"] = generate_cost_recommendations(costs, snapshot)
     
     return costs
 
-def analyze_compute_costs(path):
+@requires_files("Dockerfile")
+def analyze_compute_costs(snapshot):
     costs = {
         "estimated_monthly": 0,
         "details": [],
@@ -898,16 +934,12 @@ def analyze_compute_costs(path):
     }
     
     # Analyser les fichiers de configuration pour détecter les ressources de calcul
-    if os.path.exists(os.path.join(path, "Dockerfile")):
-        try:
-            with open(os.path.join(path, "Dockerfile"), 'r') as f:
-                content = f.read().lower()
-                # Détecter les ressources CPU/RAM
-                if "cpu" in content or "memory" in content:
-                    costs["details"].append("Configuration Docker détectée")
-                    costs["estimated_monthly"] += 50  # Estimation de base
-        except Exception as e:
-            print(f"Erreur lors de la lecture du Dockerfile: {str(e)}")
+    if snapshot.is_file("Dockerfile"):
+        content = (snapshot.read_text("Dockerfile") or "").lower()
+        # Détecter les ressources CPU/RAM
+        if "cpu" in content or "memory" in content:
+            costs["details"].append("Configuration Docker détectée")
+            costs["estimated_monthly"] += 50  # Estimation de base
     
     # Vérifier les fichiers de configuration cloud
     cloud_configs = {
@@ -918,47 +950,41 @@ def analyze_compute_costs(path):
     
     for provider, configs in cloud_configs.items():
         for config in configs:
-            if os.path.exists(os.path.join(path, config)):
+            if snapshot.exists(config):
                 costs["details"].append(f"Configuration {provider} détectée")
                 costs["estimated_monthly"] += 100  # Estimation de base
     
     # Si aucune configuration n'est détectée, estimer les coûts basés sur le type de projet
     if not costs["details"]:
-        if os.path.exists(os.path.join(path, "main.py")) or os.path.exists(os.path.join(path, "app.py")):
+        if snapshot.exists("main.py") or snapshot.exists("app.py"):
             costs["details"].append("Application Python détectée")
             costs["estimated_monthly"] = 30  # Coût estimé pour une petite application Python
-        elif os.path.exists(os.path.join(path, "package.json")):
+        elif snapshot.exists("package.json"):
             costs["details"].append("Application Node.js détectée")
             costs["estimated_monthly"] = 25  # Coût estimé pour une petite application Node.js
     
     return costs
 
-def analyze_storage_costs(path):
+def analyze_storage_costs(snapshot):
     costs = {
         "estimated_monthly": 0,
         "details": [],
         "optimization_potential": 0
     }
     
-    # Analyser la taille du projet
-    total_size = 0
-    for root, _, files in os.walk(path):
-        if '.git' in root:
-            continue
-        for file in files:
-            try:
-                total_size += os.path.getsize(os.path.join(root, file))
-            except:
-                pass
+    # Analyser la taille du projet (tailles collectées lors du parcours)
+    total_size = snapshot.total_size()
     
     # Convertir en GB et estimer les coûts
     size_gb = total_size / (1024 * 1024 * 1024)
     costs["estimated_monthly"] = size_gb * 0.023  # Coût moyen par GB
     costs["details"].append(f"Taille du projet: {size_gb:.2f} GB")
+    if not snapshot.sizes_complete:
+        costs["details"].append("Taille partielle: fichiers non récupérés lors du clone exclus")
     
     return costs
 
-def analyze_network_costs(path):
+def analyze_network_costs(snapshot):
     costs = {
         "estimated_monthly": 0,
         "details": [],
@@ -966,7 +992,7 @@ def analyze_network_costs(path):
     }
     
     # Vérifier les configurations réseau
-    if os.path.exists(os.path.join(path, "nginx.conf")):
+    if snapshot.exists("nginx.conf"):
         costs["details"].append("Configuration Nginx détectée")
         costs["estimated_monthly"] += 20
     
@@ -979,13 +1005,13 @@ def analyze_network_costs(path):
     
     for provider, configs in cloud_configs.items():
         for config in configs:
-            if os.path.exists(os.path.join(path, config)):
+            if snapshot.exists(config):
                 costs["details"].append(f"Configuration réseau {provider} détectée")
                 costs["estimated_monthly"] += 30
     
     return costs
 
-def analyze_database_costs(path):
+def analyze_database_costs(snapshot):
     costs = {
         "estimated_monthly": 0,
         "details": [],
@@ -1002,13 +1028,13 @@ def analyze_database_costs(path):
     
     for db, configs in db_configs.items():
         for config in configs:
-            if os.path.exists(os.path.join(path, config)):
+            if snapshot.exists(config):
                 costs["details"].append(f"Configuration {db} détectée")
                 costs["estimated_monthly"] += 50
     
     return costs
 
-def generate_cost_recommendations(costs, path):
+def generate_cost_recommendations(costs, snapshot):
     recommendations = []
     
     # Recommandations générales pour les projets locaux
@@ -1029,7 +1055,7 @@ def generate_cost_recommendations(costs, path):
         ])
     
     # Recommandations spécifiques basées sur le type de projet
-    if os.path.exists(os.path.join(path, "main.py")) or os.path.exists(os.path.join(path, "app.py")):
+    if snapshot.exists("main.py") or snapshot.exists("app.py"):
         recommendations.append({
             "category": "compute",
             "title": "Containerisation",
@@ -1081,8 +1107,11 @@ async def docker_page(request: Request):
 
 @app.post("/simulate-docker")
 async def simulate_docker(repo_url: str = Form(...), port: int = Form(...)):
-    async def generate_logs():
+    # Générateur synchrone : Starlette l'itère dans un thread, le clone et
+    # la lecture des sorties docker ne bloquent pas la boucle d'événements
+    def generate_logs():
         temp_dir = None
+        checkout = ExitStack()
         try:
             # Créer un dossier temporaire
             temp_dir = tempfile.mkdtemp(prefix="docker_sim_")
@@ -1090,7 +1119,7 @@ async def simulate_docker(repo_url: str = Form(...), port: int = Form(...)):
             local_path = os.path.join(temp_dir, repo_name)
             
             yield f"Clonage du repository {repo_url}...\n"
-            repo = git.Repo.clone_from(repo_url, local_path)
+            checkout.enter_context(full_checkout(repo_url, local_path))
             
             # Vérifier si un Dockerfile existe
             dockerfile_path = os.path.join(local_path, "Dockerfile")
@@ -1167,6 +1196,7 @@ CMD ["uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000"]
         except Exception as e:
             yield f"Erreur: {str(e)}\n"
         finally:
+            checkout.close()
             if temp_dir and os.path.exists(temp_dir):
                 try:
                     shutil.rmtree(temp_dir)
@@ -0,0 +1,561 @@
+import codecs
+import hashlib
+import json
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from logs import get_logger
+
+logger = get_logger("manifests")
+
+# Résultats de lecture conservés (par empreinte du contenu), d'une analyse
+# à l'autre et entre repositories
+PARSE_CACHE_ENTRIES = int(os.getenv("ANALYSIS_MANIFEST_CACHE_ENTRIES", 1024))
+
+# Taille des blocs lus ; la mémoire utilisée par un lecteur est de l'ordre
+# d'un bloc, quelle que soit la taille du fichier
+CHUNK_BYTES = 256 * 1024
+# Un élément JSON (paquet d'un lockfile...) plus gros est considéré comme invalide
+MAX_ITEM_CHARS = 16 * 1024 * 1024
+
+_JSON_WHITESPACE = re.compile(r'[ \t\r\n]*')
+# Fin d'un nombre ou d'un littéral ; caractères qui comptent dans un
+# conteneur ; fin ou échappement dans une chaîne
+_JSON_SCALAR_END = re.compile(r'[ \t\r\n,:\]}]')
+_JSON_STRUCTURE = re.compile(r'["{}\[\]]')
+_JSON_STRING_END = re.compile(r'["\\]')
+_json_decoder = json.JSONDecoder()
+
+
+class _JsonText:
+    """Texte d'un document JSON lu par blocs, dont la partie déjà lue est libérée."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text, self.pos, self.eof = '', 0, False
+
+    def fill(self):
+        if self.eof:
+            raise ValueError("JSON invalide ou tronqué")
+        if len(self.text) - self.pos > MAX_ITEM_CHARS:
+            raise ValueError("JSON invalide (élément trop volumineux)")
+        chunk = self.stream.read(CHUNK_BYTES)
+        self.eof = not chunk
+        self.text = self.text[self.pos:] + self.decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+
+    def peek(self):
+        """Prochain caractère significatif ('' en fin de document)."""
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.eof:
+                return ''
+            self.fill()
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError("JSON invalide : %r attendu, %r trouvé" % (chars, char))
+        self.pos += 1
+        return char
+
+    def _item_end(self):
+        # Fin (exclue) de l'élément qui commence à `pos`, en lisant les blocs
+        # suivants au besoin. Profondeur et état « dans une chaîne » sont
+        # conservés d'un bloc à l'autre : chaque caractère n'est examiné qu'une
+        # fois, quelle que soit la taille de l'élément
+        first = self.text[self.pos]
+        if first not in '{["':
+            offset = 0
+            while True:
+                match = _JSON_SCALAR_END.search(self.text, self.pos + offset)
+                if match is not None:
+                    return match.start()
+                if self.eof:
+                    return len(self.text)
+                offset = len(self.text) - self.pos
+                self.fill()
+        depth, in_string, i = 0, first == '"', self.pos + 1
+        if not in_string:
+            depth = 1
+        while True:
+            if in_string:
+                match = _JSON_STRING_END.search(self.text, i)
+                if match is not None and match.group() == '"':
+                    in_string, i = False, match.end()
+                    if not depth:
+                        return i
+                    continue
+                if match is not None and match.end() < len(self.text):
+                    i = match.end() + 1    # caractère échappé
+                    continue
+                # Chaîne non terminée, ou échappement en fin de bloc
+                i = match.start() if match is not None else len(self.text)
+            else:
+                match = _JSON_STRUCTURE.search(self.text, i)
+                if match is not None:
+                    char, i = match.group(), match.end()
+                    if char == '"':
+                        in_string = True
+                    elif char in '{[':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if not depth:
+                            return i
+                    continue
+                i = len(self.text)
+            offset = i - self.pos
+            self.fill()
+            i = self.pos + offset
+
+    def value(self):
+        """Valeur suivante, décodée en une fois par le module json une fois complète."""
+        if not self.peek():
+            raise ValueError("JSON invalide ou tronqué")
+        end = self._item_end()
+        try:
+            value, end = _json_decoder.raw_decode(self.text[:end], self.pos)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON invalide : {e}")
+        self.pos = end
+        return value
+
+    def members(self):
+        """Clés d'un objet ou indices d'un tableau ; la valeur est lue par l'appelant."""
+        closing = '}' if self.expect('{[') == '{' else ']'
+        if self.peek() == closing:
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            if closing == '}':
+                key = self.value()
+                self.expect(':')
+                yield key
+            else:
+                yield index
+                index += 1
+            if self.expect(',' + closing) == closing:
+                return
+
+
+def json_sections(stream, sections):
+    """(section, clé, valeur) pour chaque élément des objets de premier niveau `sections`.
+
+    Le document est lu par blocs ; chaque élément est décodé séparément
+    (les autres sections sont parcourues élément par élément puis oubliées) :
+    la mémoire utilisée ne dépend que de la taille d'un élément. Lève
+    ValueError si le document est invalide.
+    """
+    text = _JsonText(stream)
+    for section in text.members():
+        if text.peek() not in '{[':
+            text.value()
+            continue
+        for key in text.members():
+            value = text.value()
+            if section in sections:
+                yield section, key, value
+
+
+def _lines(stream):
+    for line in stream:
+        yield line.decode('utf-8')
+
+
+# Manifestes : dépendances déclarées, au format de l'analyse
+
+_REQUIREMENT = re.compile(r'^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(.*)$')
+_REQUIREMENT_COMMENT = re.compile(r'(?:^|\s)#.*$')
+
+
+def read_requirements(stream):
+    """Dépendances de requirements.txt : nom, extras et contraintes de version.
+
+    Les marqueurs d'environnement (`; python_version < "3.8"`), options
+    (`-r`, `-e`, `--hash`...) et références directes (URL, chemins) ne sont
+    pas repris.
+    """
+    pending = ''
+    for line in _lines(stream):
+        line = pending + line.rstrip('\r\n')
+        pending = ''
+        if line.endswith('\\'):
+            pending = line[:-1] + ' '
+            continue
+        line = _REQUIREMENT_COMMENT.sub('', line).strip()
+        if not line or line.startswith('-'):
+            continue
+        match = _REQUIREMENT.match(line.split(' --', 1)[0])
+        if match is None:
+            continue
+        name, extras, spec = match.groups()
+        spec = spec.split(';', 1)[0].strip().strip('()').replace(' ', '')
+        if spec.startswith('@'):
+            spec = ''
+        elif spec and spec[0] not in '<>=!~':
+            continue
+        yield f"{name}{extras or ''}{spec}"
+
+
+def read_package_json(stream):
+    """Dépendances de package.json (`nom@version`, puis celles de développement)."""
+    dev = []
+    for section, name, version in json_sections(stream, ('dependencies', 'devDependencies')):
+        if section == 'dependencies':
+            yield f"{name}@{version}"
+        else:
+            dev.append(f"{name}@{version} (dev)")
+    yield from dev
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def read_pom(stream):
+    """Dépendances Maven de pom.xml (`artifactId@version`), lues par événements XML.
+
+    Chaque élément est retiré de l'arbre une fois lu : seule la dépendance
+    en cours reste en mémoire.
+    """
+    stack, depth = [], 0
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        tag = _local_name(elem.tag)
+        if event == 'start':
+            stack.append(elem)
+            depth += tag == 'dependency'
+            continue
+        stack.pop()
+        if tag == 'dependency':
+            depth -= 1
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in elem}
+            if fields.get('artifactId'):
+                yield f"{fields['artifactId']}@{fields['version']}" if fields.get('version') else fields['artifactId']
+        if not depth and stack:
+            stack[-1].remove(elem)
+
+
+# Lockfiles : paquets verrouillés (nom, version, dev)
+
+def _npm_tree(name, entry):
+    # lockfileVersion 1 : paquets imbriqués sous "dependencies"
+    if isinstance(entry, dict):
+        if isinstance(entry.get('version'), str):
+            yield name, entry['version'], entry.get('dev') is True
+        for child, child_entry in (entry.get('dependencies') or {}).items():
+            yield from _npm_tree(child, child_entry)
+
+
+def read_package_lock(stream):
+    """Paquets de package-lock.json / npm-shrinkwrap.json (lockfileVersion 1 à 3)."""
+    has_packages = False
+    for section, key, entry in json_sections(stream, ('packages', 'dependencies')):
+        if section == 'packages':
+            has_packages = True
+            # "node_modules/a/node_modules/@scope/b" ; "" : le projet lui-même ;
+            # sans version : lien vers un workspace
+            if key and isinstance(entry, dict) and isinstance(entry.get('version'), str):
+                yield key.rsplit('node_modules/', 1)[-1], entry['version'], entry.get('dev') is True
+        # Les versions 2 et 3 dupliquent l'arbre "dependencies" après
+        # "packages", qui fait alors foi
+        elif not has_packages:
+            yield from _npm_tree(key, entry)
+
+
+def read_pipfile_lock(stream):
+    """Paquets de Pipfile.lock (sections default et develop)."""
+    for section, name, entry in json_sections(stream, ('default', 'develop')):
+        if isinstance(entry, dict) and isinstance(entry.get('version'), str):
+            yield name, entry['version'].lstrip('='), section == 'develop'
+
+
+_YARN_VERSION = re.compile(r'^  version:? "?([^"\s]+)"?')
+
+
+def read_yarn_lock(stream):
+    """Paquets de yarn.lock (Yarn classique et Berry)."""
+    name = None
+    for line in _lines(stream):
+        if not line.strip() or line.startswith('#'):
+            continue
+        if not line[0].isspace():
+            # "@scope/a@^1.0.0", "@scope/a@^1.1.0": ou a@npm:^1.0.0:
+            spec = line.rstrip().rstrip(':').split(',')[0].strip().strip('"')
+            at = spec.find('@', 1)
+            name = spec[:at] if at > 0 and '@workspace:' not in spec else None
+            continue
+        match = _YARN_VERSION.match(line) if name else None
+        if match:
+            yield name, match.group(1), False
+            name = None
+
+
+_TOML_FIELD = re.compile(r'^(name|version|category)\s*=\s*"([^"]*)"')
+
+
+def read_toml_packages(stream):
+    """Paquets des tables [[package]] de poetry.lock et Cargo.lock."""
+    fields, in_header = None, False
+    for line in _lines(stream):
+        line = line.strip()
+        if line.startswith('['):
+            if line == '[[package]]':
+                if fields and 'name' in fields and 'version' in fields:
+                    yield fields['name'], fields['version'], fields.get('category') == 'dev'
+                fields = {}
+            # Les sous-tables ([package.dependencies]...) ne décrivent plus le paquet
+            in_header = line == '[[package]]'
+            continue
+        match = _TOML_FIELD.match(line) if in_header else None
+        if match:
+            fields[match.group(1)] = match.group(2)
+    if fields and 'name' in fields and 'version' in fields:
+        yield fields['name'], fields['version'], fields.get('category') == 'dev'
+
+
+def read_go_sum(stream):
+    """Modules de go.sum (les entrées `/go.mod` seules ne sont pas téléchargées)."""
+    for line in _lines(stream):
+        fields = line.split()
+        if len(fields) == 3 and not fields[1].endswith('/go.mod'):
+            yield fields[0], fields[1], False
+
+
+# Manifestes des autres écosystèmes, lus pour identifier la pile technique
+# (frameworks.py) : dépendances au même format (`nom`, `nom@version`)
+
+_GO_REQUIRE = re.compile(r'^(?:require\s+)?([^\s()]+)\s+(v[^\s]+)')
+
+
+def read_go_mod(stream):
+    """Modules requis par go.mod (directives `require` simples et en bloc)."""
+    in_block = False
+    for line in _lines(stream):
+        line = line.split('//', 1)[0].strip()
+        if in_block:
+            if line == ')':
+                in_block = False
+                continue
+        elif line.startswith('require') and line.endswith('('):
+            in_block = True
+            continue
+        elif not line.startswith('require '):
+            continue
+        match = _GO_REQUIRE.match(line)
+        if match:
+            yield f"{match.group(1)}@{match.group(2)}"
+
+
+_TOML_KEY = re.compile(r'^(["\']?)([A-Za-z0-9_.-]+)\1\s*=\s*(.*)$')
+_TOML_STRING = re.compile(r'"([^"]*)"|\'([^\']*)\'')
+_TOML_DEPENDENCY_TABLE = re.compile(r'(?:^|\.)(?:dependencies|dev-dependencies|build-dependencies|packages|dev-packages)$')
+_TOML_DEPENDENCY_HEADER = re.compile(r'(?:^|\.)(?:dependencies|dev-dependencies|build-dependencies)\.([A-Za-z0-9_-]+)$')
+
+
+def read_toml_dependencies(stream):
+    """Dépendances de Cargo.toml, pyproject.toml (PEP 621 et Poetry) et Pipfile.
+
+    Clés des tables de dépendances (`[dependencies]`, `[tool.poetry.dependencies]`,
+    `[packages]`...), tables `[dependencies.nom]` et chaînes des tableaux
+    `dependencies = [...]` de `[project]` et `[project.optional-dependencies]`.
+    """
+    table, in_array = '', False
+    for line in _lines(stream):
+        line = line.strip()
+        if in_array:
+            for match in _TOML_STRING.finditer(line):
+                yield match.group(1) or match.group(2)
+            in_array = ']' not in line
+            continue
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('['):
+            table = line.strip('[] ').replace(' ', '')
+            header = _TOML_DEPENDENCY_HEADER.search(table)
+            if header:
+                yield header.group(1)
+            continue
+        match = _TOML_KEY.match(line)
+        if match is None:
+            continue
+        name, value = match.group(2), match.group(3)
+        if _TOML_DEPENDENCY_TABLE.search(table):
+            if name != 'python':
+                yield name
+        elif (table == 'project' and name == 'dependencies') or table == 'project.optional-dependencies':
+            if value.startswith('['):
+                for string in _TOML_STRING.finditer(value):
+                    yield string.group(1) or string.group(2)
+                in_array = ']' not in value
+
+
+def read_composer_json(stream):
+    """Dépendances de composer.json (`vendor/paquet@contrainte`), extensions PHP exclues."""
+    for _, name, version in json_sections(stream, ('require', 'require-dev')):
+        if '/' in name:
+            yield f"{name}@{version}"
+
+
+_GRADLE_COORDINATES = re.compile(r'["\']([\w.-]+):([\w.-]+)(?::([^"\'@:]+))?["\']')
+_GRADLE_PLUGIN = re.compile(r'\bid\s*\(?\s*["\']([\w.-]+)["\']')
+
+
+def read_gradle(stream):
+    """Dépendances de build.gradle(.kts) (`artifactId@version`, comme pom.xml) et identifiants des plugins."""
+    for line in _lines(stream):
+        for match in _GRADLE_PLUGIN.finditer(line):
+            yield match.group(1)
+        for match in _GRADLE_COORDINATES.finditer(line):
+            _, artifact, version = match.groups()
+            yield f"{artifact}@{version}" if version else artifact
+
+
+_GEM = re.compile(r'^\s*gem\s*\(?\s*["\']([^"\']+)["\']')
+
+
+def read_gemfile(stream):
+    """Gems déclarées dans un Gemfile."""
+    for line in _lines(stream):
+        match = _GEM.match(line)
+        if match:
+            yield match.group(1)
+
+
+def dependency_names(dependencies):
+    """Noms des dépendances (`@scope/nom@1.0`, `nom[extra]>=1.0 (dev)`...), sans version ni extras."""
+    names = []
+    for dependency in dependencies:
+        head = dependency.split(' ', 1)[0]
+        at = head.find('@', 1)
+        if at > 0:
+            head = head[:at]
+        name = re.split(r'[\[<>=!~;]', head, 1)[0]
+        if name and name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+def count_packages(packages):
+    """Nombre de paquets verrouillés, dont ceux de développement."""
+    total = dev = 0
+    for _, _, is_dev in packages:
+        total += 1
+        dev += is_dev
+    return {"packages": total, "dev_packages": dev}
+
+
+# Manifestes lus à la racine du repository, dans l'ordre du résultat
+MANIFEST_READERS = {
+    "requirements.txt": read_requirements,
+    "package.json": read_package_json,
+    "pom.xml": read_pom,
+}
+
+# Manifestes lus à la racine pour identifier la pile technique : (écosystème
+# au sens de frameworks.py, lecteur)
+STACK_MANIFEST_READERS = {
+    "requirements.txt": ("python", read_requirements),
+    "pyproject.toml": ("python", read_toml_dependencies),
+    "Pipfile": ("python", read_toml_dependencies),
+    "package.json": ("node", read_package_json),
+    "pom.xml": ("jvm", read_pom),
+    "build.gradle": ("jvm", read_gradle),
+    "build.gradle.kts": ("jvm", read_gradle),
+    "go.mod": ("go", read_go_mod),
+    "Cargo.toml": ("rust", read_toml_dependencies),
+    "composer.json": ("php", read_composer_json),
+    "Gemfile": ("ruby", read_gemfile),
+}
+
+# Lockfiles lus à la racine du repository : (écosystème, lecteur)
+LOCKFILE_READERS = {
+    "package-lock.json": ("npm", read_package_lock),
+    "npm-shrinkwrap.json": ("npm", read_package_lock),
+    "yarn.lock": ("yarn", read_yarn_lock),
+    "poetry.lock": ("poetry", read_toml_packages),
+    "Pipfile.lock": ("pipenv", read_pipfile_lock),
+    "Cargo.lock": ("cargo", read_toml_packages),
+    "go.sum": ("go", read_go_sum),
+}
+
+
+class ParseCache:
+    """Résultats de lecture indexés par (lecteur, empreinte du contenu) (LRU)."""
+
+    def __init__(self, max_entries=PARSE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "max_entries": self.max_entries}
+
+
+parse_cache = ParseCache()
+
+
+def _digest(stream):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(CHUNK_BYTES), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_file(snapshot, rel, reader, reduce=tuple):
+    """reduce(reader(fichier)) pour le fichier `rel` du snapshot, mémorisé par empreinte du contenu.
+
+    L'empreinte est le SHA du blob git s'il est connu (snapshot issu de
+    l'arbre git, comme pour la complexité) : le fichier n'est alors lu que
+    s'il faut l'analyser. À défaut, c'est le SHA-256 du contenu. Le fichier
+    est lu par blocs, sans plafond de taille. Renvoie None si le fichier est
+    absent ou illisible, ou si son contenu est invalide.
+    """
+    with snapshot.stream(rel) as stream:
+        if stream is None:
+            return None
+        try:
+            blob = snapshot.blob_ids.get(rel)
+            if blob is not None:
+                key = (reader.__name__, reduce.__name__, 'blob', blob)
+            else:
+                key = (reader.__name__, reduce.__name__, 'sha256', _digest(stream))
+                stream.seek(0)
+            result = parse_cache.get(key)
+            if result is not None:
+                return result
+            result = reduce(reader(stream))
+        except (OSError, ValueError, SyntaxError) as e:
+            # ValueError : JSON ou UTF-8 invalide ; SyntaxError : XML invalide
+            logger.warning("Erreur lors de la lecture de %s: %s", rel, e)
+            return None
+    parse_cache.put(key, result)
+    return result
@@ -0,0 +1,123 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Bornes par défaut (secondes), proches de celles de prometheus_client
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (1024, 16 * 1024, 128 * 1024, 1024 ** 2, 8 * 1024 ** 2, 64 * 1024 ** 2, 512 * 1024 ** 2)
+COUNT_BUCKETS = (10, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+_registry = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Compteur monotone, au format texte Prometheus."""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Histogramme cumulatif (buckets, somme, nombre), au format texte Prometheus."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets)) + (float("inf"),)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(float(total))}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def render_prometheus():
+    """Toutes les métriques enregistrées, au format d'exposition texte 0.0.4."""
+    lines = []
+    for metric in list(_registry):
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+CLONE_SECONDS = Histogram(
+    "devops_clone_duration_seconds", "Durée du clone ou du checkout du repository (parcours inclus)", ["mode"])
+WALK_SECONDS = Histogram(
+    "devops_walk_duration_seconds", "Durée du parcours de l'arborescence (snapshot)")
+STAGE_SECONDS = Histogram(
+    "devops_stage_duration_seconds", "Durée de chaque détecteur de l'analyse", ["stage"])
+SCAN_SECONDS = Histogram(
+    "devops_content_scan_duration_seconds", "Durée de la passe de lecture du contenu des fichiers", ["mode"])
+BYTES_READ = Histogram(
+    "devops_bytes_read", "Octets lus par analyse", buckets=BYTES_BUCKETS)
+FILES_SCANNED = Histogram(
+    "devops_files_scanned", "Fichiers présents dans le snapshot analysé", buckets=COUNT_BUCKETS)
+CLEANUP_SECONDS = Histogram(
+    "devops_cleanup_duration_seconds", "Durée du nettoyage du dossier temporaire")
+ANALYSES = Counter(
+    "devops_analyses_total", "Analyses terminées par statut", ["status"])
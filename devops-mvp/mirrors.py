@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import git
+
+from cache import normalize_repo_url
+from workers import Repo, clone_repo, suspended_deadline
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrous limités au processus courant
+    fcntl = None
+
+MIRROR_ROOT = os.getenv("MIRROR_ROOT", os.path.join(tempfile.gettempdir(), "devops_mirrors"))
+MIRROR_MAX_BYTES = int(os.getenv("MIRROR_MAX_BYTES", 10 * 1024 ** 3))
+# Les miroirs sont partiels : l'historique (commits, arbres) est complet, les
+# blobs de plus de ANALYSIS_MAX_SOURCE_SIZE octets (même limite que les
+# fichiers analysés) sont récupérés à la demande puis conservés ; la taille
+# des autres se lit sans rien télécharger
+MIRROR_FILTER = os.getenv(
+    "MIRROR_FILTER", "blob:limit=%d" % (int(os.getenv("ANALYSIS_MAX_SOURCE_SIZE", 1024 * 1024)) + 1))
+# Miroirs complets (sans filtre), pour les analyses qui lisent tous les blobs
+# de l'historique (/repository-size) lorsque les miroirs partagés sont partiels
+FULL_MIRROR_ROOT = os.getenv("FULL_MIRROR_ROOT", MIRROR_ROOT + "-full")
+FULL_MIRROR_MAX_BYTES = int(os.getenv("FULL_MIRROR_MAX_BYTES", MIRROR_MAX_BYTES))
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+class _FileLock:
+    """Verrou inter-processus (flock) sur un fichier, partagé ou exclusif."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._local = None
+
+    def acquire(self, shared=False, blocking=True):
+        if fcntl is None:
+            with _local_locks_guard:
+                self._local = _local_locks.setdefault(self.path, threading.RLock())
+            return self._local.acquire(blocking)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self._fd, flags)
+        except BlockingIOError:
+            os.close(self._fd)
+            self._fd = None
+            return False
+        return True
+
+    def release(self):
+        if self._local is not None:
+            self._local.release()
+            self._local = None
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class MirrorStore:
+    """Un miroir bare par URL de repository, mis à jour par `git fetch` incrémental.
+
+    Chaque requête obtient un `git worktree` détaché sur le miroir au lieu
+    d'un clone. Pour chaque miroir, `<clé>.lock` sérialise les mises à jour
+    et `<clé>.use` est tenu en mode partagé tant qu'un worktree est en cours
+    d'utilisation : l'éviction LRU (budget disque) ne supprime que les
+    miroirs dont elle obtient ce verrou en mode exclusif.
+    """
+
+    def __init__(self, root=MIRROR_ROOT, max_bytes=MIRROR_MAX_BYTES, filter_spec=MIRROR_FILTER):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.filter_spec = filter_spec or None
+
+    def _key(self, repo_url):
+        return hashlib.sha1(normalize_repo_url(repo_url).encode("utf-8")).hexdigest()[:20]
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return {
+            "mirror": base + ".git",
+            "meta": base + ".json",
+            "lock": base + ".lock",
+            "use": base + ".use",
+        }
+
+    def mirror_path(self, repo_url):
+        return self._paths(self._key(repo_url))["mirror"]
+
+    def _write_meta(self, paths, repo_url):
+        meta = {
+            "url": repo_url,
+            "last_used": time.time(),
+            "size_bytes": _dir_size(paths["mirror"]),
+        }
+        tmp = paths["meta"] + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, paths["meta"])
+
+    def ensure(self, repo_url):
+        """Crée ou met à jour le miroir de `repo_url` et renvoie le git.Repo bare."""
+        os.makedirs(self.root, exist_ok=True)
+        key = self._key(repo_url)
+        paths = self._paths(key)
+        with _FileLock(paths["lock"]):
+            if os.path.isdir(paths["mirror"]):
+                repo = Repo(paths["mirror"])
+                if self.filter_spec and _partial_filter(repo) not in (None, self.filter_spec):
+                    # Miroir créé avec un autre filtre (blob:none) : les blobs
+                    # qu'il exclut sont récupérés en une fois pour tout l'historique
+                    repo.git.fetch("--refetch", "--prune", "--tags", f"--filter={self.filter_spec}", "origin")
+                    repo.git.config("remote.origin.partialclonefilter", self.filter_spec)
+                else:
+                    repo.git.fetch("--prune", "--tags", "origin")
+                repo.git.worktree("prune")
+            else:
+                tmp = paths["mirror"] + ".partial"
+                shutil.rmtree(tmp, ignore_errors=True)
+                options = {"bare": True}
+                if self.filter_spec:
+                    options["filter"] = self.filter_spec
+                repo = clone_repo(repo_url, tmp, **options)
+                # Branches locales = branches distantes ; les worktrees étant
+                # détachés, le fetch peut toujours mettre à jour les refs
+                repo.git.config("remote.origin.fetch", "+refs/heads/*:refs/heads/*")
+                os.replace(tmp, paths["mirror"])
+                repo = Repo(paths["mirror"])
+            self._write_meta(paths, repo_url)
+        self.evict(keep=key)
+        return repo
+
+    @contextmanager
+    def using(self, repo_url):
+        """Miroir à jour de `repo_url`, protégé de l'éviction pendant le bloc."""
+        os.makedirs(self.root, exist_ok=True)
+        use_lock = _FileLock(self._paths(self._key(repo_url))["use"])
+        use_lock.acquire(shared=True)
+        try:
+            yield self.ensure(repo_url)
+        finally:
+            use_lock.release()
+
+    @contextmanager
+    def worktree(self, repo_url, dest, checkout=True, rev="HEAD"):
+        """Worktree détaché de `rev` dans `dest`, supprimé à la sortie.
+
+        Avec `checkout=False`, l'index et le répertoire de travail restent vides
+        (le checkout partiel est alors à la charge de l'appelant).
+        """
+        paths = self._paths(self._key(repo_url))
+        with self.using(repo_url) as mirror:
+            with _FileLock(paths["lock"]):
+                sha = mirror.git.rev_parse(rev)
+                args = ["add", "--detach"]
+                if not checkout:
+                    args.append("--no-checkout")
+                mirror.git.worktree(*args, dest, sha)
+            try:
+                yield Repo(dest)
+            finally:
+                with suspended_deadline(), _FileLock(paths["lock"]):
+                    try:
+                        mirror.git.worktree("remove", "--force", dest)
+                    except git.GitCommandError:
+                        shutil.rmtree(dest, ignore_errors=True)
+                        mirror.git.worktree("prune")
+                    # Les blobs récupérés à la demande ont pu faire grossir le miroir
+                    self._write_meta(paths, repo_url)
+
+    def _list_mirrors(self):
+        mirrors = []
+        if not os.path.isdir(self.root):
+            return mirrors
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            try:
+                with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            mirrors.append((key, meta))
+        return mirrors
+
+    def total_bytes(self):
+        return sum(meta.get("size_bytes", 0) for _, meta in self._list_mirrors())
+
+    def evict(self, keep=None):
+        """Supprime les miroirs les moins récemment utilisés au-delà du budget disque."""
+        mirrors = sorted(self._list_mirrors(), key=lambda item: item[1].get("last_used", 0))
+        total = sum(meta.get("size_bytes", 0) for _, meta in mirrors)
+        evicted = []
+        for key, meta in mirrors:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            paths = self._paths(key)
+            use_lock = _FileLock(paths["use"])
+            # Miroir en cours d'utilisation : on passe au suivant
+            if not use_lock.acquire(blocking=False):
+                continue
+            try:
+                with _FileLock(paths["lock"]):
+                    shutil.rmtree(paths["mirror"], ignore_errors=True)
+                    os.remove(paths["meta"])
+            finally:
+                use_lock.release()
+            total -= meta.get("size_bytes", 0)
+            evicted.append(meta.get("url"))
+        return evicted
+
+
+def _partial_filter(repo):
+    """Filtre de clone partiel du miroir, None s'il est complet."""
+    try:
+        return repo.git.config("--get", "remote.origin.partialclonefilter")
+    except git.GitCommandError:
+        return None
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+mirror_store = MirrorStore()
+full_mirror_store = MirrorStore(root=FULL_MIRROR_ROOT, max_bytes=FULL_MIRROR_MAX_BYTES, filter_spec=None)
+
+
+def history_mirrors():
+    """Magasin de miroirs contenant tous les blobs : le partagé s'il est complet, sinon le dédié."""
+    return full_mirror_store if mirror_store.filter_spec else mirror_store
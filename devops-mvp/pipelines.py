@@ -0,0 +1,233 @@
+import yaml
+
+# Versions des actions et des outils utilisées par les workflows générés
+ACTIONS = {
+    'checkout': 'actions/checkout@v4',
+    'cache': 'actions/cache@v4',
+    'python': 'actions/setup-python@v5',
+    'node': 'actions/setup-node@v4',
+    'java': 'actions/setup-java@v4',
+    'go': 'actions/setup-go@v5',
+    'rust': 'dtolnay/rust-toolchain@stable',
+    'buildx': 'docker/setup-buildx-action@v3',
+    'docker_build': 'docker/build-push-action@v6',
+}
+PYTHON_VERSION = '3.11'
+NODE_VERSION = '20'
+JAVA_VERSION = '17'
+
+# Pile du workflow selon le langage principal de l'analyse
+LANGUAGE_STACKS = {
+    'Python': 'python',
+    'JavaScript/TypeScript': 'node',
+    'Java': 'jvm',
+    'Kotlin': 'jvm',
+    'Scala': 'jvm',
+    'Go': 'go',
+    'Rust': 'rust',
+}
+# À défaut de langage connu (setup-ci), fichiers de la racine désignant une
+# pile, par priorité
+STACK_FILES = (
+    ('pyproject.toml', 'python'), ('requirements.txt', 'python'), ('Pipfile', 'python'), ('setup.py', 'python'),
+    ('package.json', 'node'), ('pom.xml', 'jvm'), ('build.gradle', 'jvm'), ('build.gradle.kts', 'jvm'),
+    ('go.mod', 'go'), ('Cargo.toml', 'rust'), ('main.py', 'python'), ('app.py', 'python'),
+)
+
+
+def detect_stack(root_files, language=None):
+    """Pile du workflow ('python', 'node', 'jvm', 'go', 'rust'), None si elle est inconnue."""
+    if language in LANGUAGE_STACKS:
+        return LANGUAGE_STACKS[language]
+    return next((stack for name, stack in STACK_FILES if name in root_files), None)
+
+
+def _cache(name, paths, key_files, prefix):
+    # Clé dérivée des fichiers de verrouillage ; restore-keys reprend le
+    # dernier cache de la pile si ces fichiers ont changé
+    hashed = ", ".join(f"'{pattern}'" for pattern in key_files)
+    return {
+        'name': name,
+        'uses': ACTIONS['cache'],
+        'with': {
+            'path': "\n".join(paths),
+            'key': f"${{{{ runner.os }}}}-{prefix}-${{{{ hashFiles({hashed}) }}}}",
+            'restore-keys': f"${{{{ runner.os }}}}-{prefix}-",
+        },
+    }
+
+
+def _python_steps(files):
+    if 'poetry.lock' in files:
+        return [
+            {'name': 'Install Poetry', 'run': 'pipx install poetry'},
+            {'name': 'Set up Python', 'uses': ACTIONS['python'],
+             'with': {'python-version': PYTHON_VERSION, 'cache': 'poetry', 'cache-dependency-path': 'poetry.lock'}},
+            {'name': 'Install dependencies', 'run': 'poetry install --no-interaction'},
+            {'name': 'Run tests', 'run': 'poetry run python -m pytest'},
+        ]
+    if 'Pipfile.lock' in files:
+        return [
+            {'name': 'Set up Python', 'uses': ACTIONS['python'],
+             'with': {'python-version': PYTHON_VERSION, 'cache': 'pipenv', 'cache-dependency-path': 'Pipfile.lock'}},
+            {'name': 'Install dependencies', 'run': 'pip install pipenv\npipenv install --deploy --dev'},
+            {'name': 'Run tests', 'run': 'pipenv run python -m pytest'},
+        ]
+    setup = {'python-version': PYTHON_VERSION}
+    # Le cache pip de setup-python exige au moins un fichier de dépendances
+    dependency_files = [name for name in ('requirements.txt', 'requirements-dev.txt', 'pyproject.toml', 'setup.py')
+                        if name in files]
+    if dependency_files:
+        setup.update({'cache': 'pip', 'cache-dependency-path': "\n".join(dependency_files)})
+    install = ['python -m pip install --upgrade pip']
+    if 'requirements.txt' in files:
+        install.append('pip install -r requirements.txt')
+    elif 'pyproject.toml' in files or 'setup.py' in files:
+        install.append('pip install .')
+    if 'requirements-dev.txt' in files:
+        install.append('pip install -r requirements-dev.txt')
+    return [
+        {'name': 'Set up Python', 'uses': ACTIONS['python'], 'with': setup},
+        {'name': 'Install dependencies', 'run': "\n".join(install)},
+        {'name': 'Run tests', 'run': 'python -m pytest'},
+    ]
+
+
+# Gestionnaire de paquets Node.js selon le lockfile : (lockfile, installation reproductible)
+NODE_PACKAGE_MANAGERS = (
+    ('pnpm', 'pnpm-lock.yaml', 'pnpm install --frozen-lockfile'),
+    ('yarn', 'yarn.lock', 'yarn install --frozen-lockfile'),
+    ('npm', 'package-lock.json', 'npm ci'),
+    ('npm', 'npm-shrinkwrap.json', 'npm ci'),
+)
+
+
+def _node_steps(files):
+    setup = {'node-version': NODE_VERSION}
+    steps = []
+    manager, install = 'npm', 'npm install'
+    for name, lockfile, command in NODE_PACKAGE_MANAGERS:
+        if lockfile in files:
+            manager, install = name, command
+            setup.update({'cache': name, 'cache-dependency-path': lockfile})
+            break
+    if manager == 'pnpm':
+        # pnpm doit être disponible avant setup-node pour que son cache soit
+        # trouvé ; corepack respecte le champ packageManager de package.json
+        steps.append({'name': 'Enable pnpm', 'run': 'corepack enable'})
+    return steps + [
+        {'name': 'Set up Node.js', 'uses': ACTIONS['node'], 'with': setup},
+        {'name': 'Install dependencies', 'run': install},
+        {'name': 'Run tests', 'run': f'{manager} test'},
+    ]
+
+
+def _jvm_steps(files):
+    steps = [{'name': 'Set up JDK', 'uses': ACTIONS['java'],
+              'with': {'java-version': JAVA_VERSION, 'distribution': 'temurin'}}]
+    if 'pom.xml' in files:
+        return steps + [
+            _cache('Cache Maven packages', ['~/.m2/repository'], ['**/pom.xml'], 'maven'),
+            {'name': 'Build with Maven', 'run': 'mvn -B package --file pom.xml'},
+        ]
+    gradle = './gradlew' if 'gradlew' in files else 'gradle'
+    return steps + [
+        _cache('Cache Gradle packages', ['~/.gradle/caches', '~/.gradle/wrapper'],
+               ['**/*.gradle*', '**/gradle-wrapper.properties'], 'gradle'),
+        {'name': 'Build with Gradle', 'run': f'{gradle} build --no-daemon'},
+    ]
+
+
+def _go_steps(files):
+    setup = {'go-version-file': 'go.mod'} if 'go.mod' in files else {'go-version': 'stable'}
+    # Cache géré par actions/cache ci-dessous, pas en double par setup-go
+    setup['cache'] = False
+    return [
+        {'name': 'Set up Go', 'uses': ACTIONS['go'], 'with': setup},
+        _cache('Cache Go modules', ['~/go/pkg/mod', '~/.cache/go-build'], ['**/go.sum'], 'go'),
+        {'name': 'Build', 'run': 'go build ./...'},
+        {'name': 'Run tests', 'run': 'go test ./...'},
+    ]
+
+
+def _rust_steps(files):
+    locked = ' --locked' if 'Cargo.lock' in files else ''
+    return [
+        {'name': 'Set up Rust', 'uses': ACTIONS['rust']},
+        _cache('Cache Cargo', ['~/.cargo/registry/index', '~/.cargo/registry/cache', '~/.cargo/git/db', 'target'],
+               ['**/Cargo.lock'], 'cargo'),
+        {'name': 'Build', 'run': f'cargo build{locked}'},
+        {'name': 'Run tests', 'run': f'cargo test{locked}'},
+    ]
+
+
+STACK_STEPS = {
+    'python': _python_steps,
+    'node': _node_steps,
+    'jvm': _jvm_steps,
+    'go': _go_steps,
+    'rust': _rust_steps,
+}
+
+
+def _docker_steps():
+    # Buildx et cache des couches dans le cache GitHub Actions (type=gha)
+    return [
+        {'name': 'Set up Docker Buildx', 'uses': ACTIONS['buildx']},
+        {'name': 'Build Docker image', 'uses': ACTIONS['docker_build'],
+         'with': {'context': '.', 'push': False, 'tags': 'app:latest',
+                  'cache-from': 'type=gha', 'cache-to': 'type=gha,mode=max'}},
+    ]
+
+
+def build_workflow(root_files, language=None, branch='main'):
+    """Workflow GitHub Actions (dict) adapté à la pile du repository.
+
+    `root_files` : noms des fichiers de la racine, qui désignent le
+    gestionnaire de paquets et les lockfiles servant de clés de cache ;
+    `language` : langage principal de l'analyse, s'il est connu. Une
+    exécution en cours est annulée par un nouveau push sur la même
+    référence (groupe de concurrence).
+    """
+    files = set(root_files)
+    stack = detect_stack(files, language)
+    steps = [{'uses': ACTIONS['checkout']}]
+    if stack is not None:
+        steps.extend(STACK_STEPS[stack](files))
+    if 'Dockerfile' in files:
+        steps.extend(_docker_steps())
+    return {
+        'name': 'CI',
+        'on': {
+            'push': {'branches': [branch]},
+            'pull_request': {'branches': [branch]},
+        },
+        'concurrency': {
+            'group': '${{ github.workflow }}-${{ github.ref }}',
+            'cancel-in-progress': True,
+        },
+        'jobs': {
+            'build': {
+                'runs-on': 'ubuntu-latest',
+                'steps': steps,
+            },
+        },
+    }
+
+
+class _WorkflowDumper(yaml.SafeDumper):
+    pass
+
+
+def _represent_str(dumper, value):
+    # Scripts multilignes (run, path) en bloc littéral, lisibles tels quels
+    style = '|' if "\n" in value else None
+    return dumper.represent_scalar('tag:yaml.org,2002:str', value, style=style)
+
+
+_WorkflowDumper.add_representer(str, _represent_str)
+
+
+def render(workflow):
+    """Workflow au format YAML, dans l'ordre des clés du dict."""
+    return yaml.dump(workflow, Dumper=_WorkflowDumper, sort_keys=False, default_flow_style=False, width=1000)
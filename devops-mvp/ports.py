@@ -0,0 +1,274 @@
+import re
+from dataclasses import asdict, dataclass
+from fnmatch import fnmatchcase
+
+import yaml
+
+from fileaccess import count_newlines
+
+# Fichiers de configuration examinés par l'extracteur : type et motifs sur le
+# nom du fichier, à toute profondeur
+PORT_CONFIG_FILES = (
+    ('dockerfile', ('[Dd]ockerfile', '[Dd]ockerfile.*', '*.[Dd]ockerfile')),
+    ('compose', ('compose.yml', 'compose.yaml', 'docker-compose*.yml', 'docker-compose*.yaml')),
+    ('env', ('.env', '.env.*')),
+    ('procfile', ('Procfile',)),
+    ('proxy', ('nginx.conf', 'apache.conf')),
+)
+# Motifs @requires_files correspondants, à la racine et dans les dossiers : un
+# checkout partiel récupère exactement les fichiers retenus par file_kind
+PORT_CONFIG_PATTERNS = tuple(
+    pattern for _, names in PORT_CONFIG_FILES for name in names for pattern in (name, '*/' + name))
+
+# Fichiers Python susceptibles de démarrer un serveur ou de définir son port
+CODE_FILE_NAMES = frozenset({
+    'main.py', 'app.py', 'server.py', 'run.py', 'serve.py', 'wsgi.py', 'asgi.py',
+    'manage.py', '__main__.py', 'application.py', 'config.py', 'settings.py',
+})
+
+# Variables désignant le port d'écoute de l'application (.env, compose, ENV)
+PORT_VARIABLES = frozenset({'PORT', 'APP_PORT', 'SERVER_PORT', 'HTTP_PORT', 'WEB_PORT'})
+
+# Confiance accordée à chaque provenance : la configuration de déploiement
+# fait foi, une simple affectation `port = ...` dans le code beaucoup moins
+CONFIDENCE = {
+    'compose_ports': 0.95,
+    'dockerfile_expose': 0.9,
+    'dockerfile_cmd': 0.85,
+    'compose_expose': 0.85,
+    'compose_env': 0.8,
+    'dockerfile_env': 0.8,
+    'env': 0.8,
+    'code_env_default': 0.75,
+    'code_server': 0.7,
+    'procfile': 0.7,
+    'code_constant': 0.5,
+    'proxy_listen': 0.4,
+    'code_assignment': 0.3,
+}
+
+# Un seul motif compilé pour le code Python, appliqué en une passe par fichier
+# (motif bytes : il s'applique aussi bien à une projection mmap)
+_CODE_PORT = re.compile(rb"""
+      (?:environ\.get|getenv)\(\s*['"](?:[A-Z_]*_)?PORT['"]\s*,\s*['"]?(?P<env_default>\d{1,5})
+    | (?:\.run|runserver|\.listen|\.bind|serve)\s*\([^)\n]*?\bport\s*=\s*(?P<server>\d{1,5})
+    | (?:\.listen|\.bind)\s*\(\s*\(?\s*(?:['"][^'"\n]*['"]\s*,\s*)?(?P<listen>\d{1,5})\s*[,)]
+    | --port[=\s]+(?P<flag>\d{1,5})
+    | ^[ \t]*(?P<name>[A-Z_]*PORT|port)[ \t]*[:=][ \t]*(?P<assign>\d{1,5})\b
+""", re.VERBOSE | re.MULTILINE)
+
+_CODE_GROUPS = (
+    ('env_default', 'code_env_default'),
+    ('server', 'code_server'),
+    ('listen', 'code_server'),
+    ('flag', 'code_server'),
+)
+
+_COMMAND_PORT = re.compile(
+    r'(?:--port[=\s]+|(?:-b|--bind)[=\s]+\S*:|runserver\s+(?:\S*:)?)(\d{1,5})\b')
+_PROXY_LISTEN = re.compile(r'^\s*listen\s+(?:\S*:)?(\d{1,5})\b', re.IGNORECASE | re.MULTILINE)
+_ENV_LINE = re.compile(r'^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=\s*["\']?(\d{1,5})["\']?\s*$', re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class PortCandidate:
+    port: int
+    source: str         # chemin relatif du fichier
+    kind: str           # clé de CONFIDENCE
+    confidence: float
+    line: int = None    # None pour les fichiers parsés structurellement (YAML)
+    detail: str = None  # service compose, variable... le cas échéant
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _valid(port):
+    return 0 < port < 65536
+
+
+def _line_of(content, index):
+    return content.count('\n', 0, index) + 1
+
+
+def file_kind(entry):
+    """Type de fichier pour l'extracteur de ports, None s'il n'est pas candidat."""
+    name = entry.name
+    for kind, patterns in PORT_CONFIG_FILES:
+        if any(fnmatchcase(name, pattern) for pattern in patterns):
+            return kind
+    if entry.ext == '.py' and (name in CODE_FILE_NAMES or '/' not in entry.path):
+        return 'code'
+    return None
+
+
+def parse_code(path, content):
+    """Ports trouvés dans un fichier Python (str, bytes ou mmap)."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    candidates = []
+    line, position = 1, 0
+    for match in _CODE_PORT.finditer(content):
+        line += count_newlines(content, position, match.start())
+        position = match.start()
+        if match.group('assign'):
+            kind = 'code_constant' if match.group('name').isupper() else 'code_assignment'
+            port = int(match.group('assign'))
+        else:
+            group, kind = next((g, k) for g, k in _CODE_GROUPS if match.group(g))
+            port = int(match.group(group))
+        if _valid(port):
+            candidates.append(PortCandidate(port, path, kind, CONFIDENCE[kind], line))
+    return candidates
+
+
+def parse_dockerfile(path, content):
+    candidates = []
+    # Les instructions peuvent s'étendre sur plusieurs lignes (\ en fin de ligne)
+    pending, start = '', 1
+    for line_number, line in enumerate(content.splitlines(), 1):
+        if not pending:
+            start = line_number
+        stripped = line.strip()
+        if stripped.endswith('\\'):
+            pending += stripped[:-1] + ' '
+            continue
+        instruction, pending = pending + stripped, ''
+        keyword, _, args = instruction.partition(' ')
+        keyword = keyword.upper()
+        if keyword == 'EXPOSE':
+            for token in args.split():
+                port = token.split('/')[0]
+                if port.isdigit() and _valid(int(port)):
+                    candidates.append(PortCandidate(int(port), path, 'dockerfile_expose',
+                                                    CONFIDENCE['dockerfile_expose'], start))
+        elif keyword == 'ENV':
+            for name, value in re.findall(r'(\w+)(?:=|\s+)["\']?(\d{1,5})\b', args):
+                if name in PORT_VARIABLES and _valid(int(value)):
+                    candidates.append(PortCandidate(int(value), path, 'dockerfile_env',
+                                                    CONFIDENCE['dockerfile_env'], start, name))
+        elif keyword in ('CMD', 'ENTRYPOINT'):
+            # Forme exec (["uvicorn", "--port", "8000"]) ramenée à la forme shell
+            for value in _COMMAND_PORT.findall(args.replace('"', ' ').replace(',', ' ')):
+                if _valid(int(value)):
+                    candidates.append(PortCandidate(int(value), path, 'dockerfile_cmd',
+                                                    CONFIDENCE['dockerfile_cmd'], start))
+    return candidates
+
+
+class _ComposeLoader(yaml.SafeLoader):
+    """SafeLoader sans entiers sexagésimaux YAML 1.1 : `8080:80` reste une chaîne."""
+
+
+_ComposeLoader.yaml_implicit_resolvers = {
+    first: [(tag, regexp) for tag, regexp in resolvers if tag != 'tag:yaml.org,2002:int']
+    for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+}
+_ComposeLoader.add_implicit_resolver(
+    'tag:yaml.org,2002:int', re.compile(r'^[-+]?(?:0|[1-9][0-9_]*)$'), list('-+0123456789'))
+
+
+def _compose_container_port(spec):
+    """Port du conteneur d'une entrée `ports:` (syntaxes courte et longue)."""
+    if isinstance(spec, dict):
+        target = spec.get('target')
+        return int(target) if str(target).isdigit() else None
+    if isinstance(spec, int):
+        return spec
+    # "8080:80", "127.0.0.1:8080:80/tcp", "3000-3005" : on garde le dernier segment
+    container = str(spec).split('/')[0].rsplit(':', 1)[-1].split('-')[0]
+    return int(container) if container.isdigit() else None
+
+
+def parse_compose(path, content):
+    try:
+        data = yaml.load(content, Loader=_ComposeLoader)
+    except yaml.YAMLError:
+        return []
+    services = data.get('services') if isinstance(data, dict) else None
+    if not isinstance(services, dict):
+        return []
+    candidates = []
+    for service, config in services.items():
+        if not isinstance(config, dict):
+            continue
+        for spec in config.get('ports') or []:
+            port = _compose_container_port(spec)
+            if port and _valid(port):
+                candidates.append(PortCandidate(port, path, 'compose_ports', CONFIDENCE['compose_ports'],
+                                                detail=str(service)))
+        for spec in config.get('expose') or []:
+            port = str(spec).split('/')[0]
+            if port.isdigit() and _valid(int(port)):
+                candidates.append(PortCandidate(int(port), path, 'compose_expose', CONFIDENCE['compose_expose'],
+                                                detail=str(service)))
+        environment = config.get('environment') or {}
+        if isinstance(environment, list):
+            environment = dict(item.split('=', 1) for item in map(str, environment) if '=' in item)
+        for name, value in environment.items() if isinstance(environment, dict) else ():
+            if name in PORT_VARIABLES and str(value).isdigit() and _valid(int(value)):
+                candidates.append(PortCandidate(int(value), path, 'compose_env', CONFIDENCE['compose_env'],
+                                                detail=f"{service}.{name}"))
+    return candidates
+
+
+def parse_env(path, content):
+    candidates = []
+    for match in _ENV_LINE.finditer(content):
+        name, value = match.group(1), int(match.group(2))
+        if name in PORT_VARIABLES and _valid(value):
+            candidates.append(PortCandidate(value, path, 'env', CONFIDENCE['env'],
+                                            _line_of(content, match.start()), name))
+    return candidates
+
+
+def parse_procfile(path, content):
+    return [
+        PortCandidate(int(match.group(1)), path, 'procfile', CONFIDENCE['procfile'], _line_of(content, match.start()))
+        for match in _COMMAND_PORT.finditer(content) if _valid(int(match.group(1)))
+    ]
+
+
+def parse_proxy(path, content):
+    return [
+        PortCandidate(int(match.group(1)), path, 'proxy_listen', CONFIDENCE['proxy_listen'],
+                      _line_of(content, match.start()))
+        for match in _PROXY_LISTEN.finditer(content) if _valid(int(match.group(1)))
+    ]
+
+
+PARSERS = {
+    'dockerfile': parse_dockerfile,
+    'compose': parse_compose,
+    'env': parse_env,
+    'procfile': parse_procfile,
+    'proxy': parse_proxy,
+    'code': parse_code,
+}
+
+
+def find_port_candidates(snapshot, exclude_dirs=(), code_ports=None):
+    """Tous les ports trouvés, triés par confiance décroissante.
+
+    Seuls les fichiers candidats (file_kind) sont lus, chacun une seule fois ;
+    le code est parcouru sans copie (mmap au-delà du seuil de fileaccess).
+    `code_ports` ({chemin: candidats}) fournit les résultats de parse_code
+    déjà obtenus par la passe commune de lecture du contenu.
+    """
+    candidates = []
+    for entry in snapshot.iter_files(exclude_dirs=exclude_dirs):
+        kind = file_kind(entry)
+        if kind is None:
+            continue
+        if kind == 'code':
+            if code_ports is not None:
+                candidates.extend(code_ports.get(entry.path, ()))
+            else:
+                candidates.extend(snapshot.scan(entry.path, lambda buffer: parse_code(entry.path, buffer)) or [])
+            continue
+        content = snapshot.read_text(entry.path)
+        if content:
+            candidates.extend(PARSERS[kind](entry.path, content))
+    # Tri stable : à confiance égale, les fichiers les moins profonds d'abord
+    candidates.sort(key=lambda c: (-c.confidence, c.source.count('/'), c.source, c.line or 0))
+    return list(dict.fromkeys(candidates))
@@ -0,0 +1,149 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+# Nombre de fonctions listées dans le rapport (tri par temps cumulé)
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", 25))
+# Dossier des profils bruts (.prof, lisibles avec pstats ou snakeviz) ; vide :
+# aucun profil brut n'est écrit
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+# Profils bruts conservés dans PROFILE_DIR ; les plus anciens sont supprimés
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 20))
+
+# tracemalloc est global au processus : il reste actif tant qu'une analyse profilée tourne
+_tracemalloc_users = 0
+_tracemalloc_lock = threading.Lock()
+
+
+class AnalysisProfiler:
+    """Rapport de profilage d'une analyse (`profile=1` sur /analyze-repo).
+
+    Temps mural et CPU (du thread d'analyse) par étape, fichiers ouverts et
+    octets lus par chaque détecteur, fonctions les plus coûteuses (cProfile) et
+    pic mémoire (tracemalloc). Sans profileur, l'analyse n'exécute aucune de
+    ces mesures.
+    """
+
+    def __init__(self, top_n=PROFILE_TOP_N, profile_dir=None, max_files=None):
+        self.top_n = top_n
+        self.profile_dir = PROFILE_DIR if profile_dir is None else profile_dir
+        self.max_files = PROFILE_MAX_FILES if max_files is None else max_files
+        self.stages = []
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_memory_bytes = None
+        self.shared_tracemalloc = False
+        self._profile = None
+        self._profile_error = None
+
+    def __enter__(self):
+        global _tracemalloc_users
+        with _tracemalloc_lock:
+            if _tracemalloc_users == 0:
+                tracemalloc.start()
+            else:
+                # Pic partagé avec une autre analyse profilée en parallèle
+                self.shared_tracemalloc = True
+            _tracemalloc_users += 1
+        self._memory_start = tracemalloc.get_traced_memory()[0]
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError as e:  # un autre profileur est déjà actif
+            self._profile, self._profile_error = None, str(e)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        global _tracemalloc_users
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = time.thread_time() - self._cpu_start
+        if self._profile is not None:
+            self._profile.disable()
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak_memory_bytes = max(peak - self._memory_start, 0)
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0:
+                tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name, snapshot=None):
+        files_start = snapshot.files_read if snapshot is not None else 0
+        bytes_start = snapshot.bytes_read if snapshot is not None else 0
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                "stage": name,
+                "wall_seconds": round(time.perf_counter() - wall_start, 6),
+                "cpu_seconds": round(time.thread_time() - cpu_start, 6),
+                "files_opened": snapshot.files_read - files_start if snapshot is not None else 0,
+                "bytes_read": snapshot.bytes_read - bytes_start if snapshot is not None else 0,
+            })
+
+    def top_functions(self):
+        if self._profile is None:
+            return []
+        stats = pstats.Stats(self._profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        top = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in rows[:self.top_n]:
+            top.append({
+                "function": function,
+                "location": f"{os.path.basename(filename)}:{line}",
+                "calls": calls,
+                "total_seconds": round(total, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            })
+        return top
+
+    def dump(self):
+        """Écrit le profil brut dans PROFILE_DIR et renvoie son nom de fichier (None sans PROFILE_DIR).
+
+        Seuls les `max_files` profils les plus récents sont conservés. Le
+        chemin du dossier n'est jamais renvoyé au client.
+        """
+        if self._profile is None or not self.profile_dir:
+            return None
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"analysis_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.prof"
+        self._profile.dump_stats(os.path.join(self.profile_dir, name))
+        self._rotate()
+        return name
+
+    def _rotate(self):
+        profiles = []
+        for entry in os.scandir(self.profile_dir):
+            if entry.name.endswith(".prof") and entry.is_file():
+                try:
+                    profiles.append((entry.stat().st_mtime_ns, entry.name, entry.path))
+                except OSError:
+                    continue
+        for _, _, path in sorted(profiles, reverse=True)[self.max_files:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def report(self):
+        return {
+            "wall_seconds": round(self.wall_seconds, 6) if self.wall_seconds is not None else None,
+            "cpu_seconds": round(self.cpu_seconds, 6) if self.cpu_seconds is not None else None,
+            "stages": self.stages,
+            "files_opened": sum(stage["files_opened"] for stage in self.stages),
+            "bytes_read": sum(stage["bytes_read"] for stage in self.stages),
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "peak_memory_shared": self.shared_tracemalloc,
+            "top_functions": self.top_functions(),
+            "profiler_error": self._profile_error,
+            "raw_profile": self.dump(),
+        }
@@ -0,0 +1,80 @@
+import tempfile
+
+import git
+
+from logs import get_logger
+
+logger = get_logger("publishing")
+
+# Messages de `git push` signalant un refus sans échec du transport : la
+# branche a évolué depuis la lecture de son commit, ou existe déjà ailleurs
+_REJECTED = ("[rejected]", "non-fast-forward", "fetch first", "stale info")
+
+
+class PushRejected(Exception):
+    """La branche distante n'est pas un ancêtre du commit poussé (push jamais forcé)."""
+
+
+def _with_input(repo, command, *args, data):
+    # GitPython transmet `istream` tel quel à Popen : il faut un vrai descripteur
+    with tempfile.TemporaryFile() as stream:
+        stream.write(data)
+        stream.seek(0)
+        return getattr(repo.git, command)(*args, istream=stream)
+
+
+def _entries(repo, tree):
+    """{nom: "mode type sha"} des entrées directes de l'arbre `tree` (None : arbre vide)."""
+    entries = {}
+    if tree is None:
+        return entries
+    for record in repo.git.ls_tree("-z", tree).split("\0"):
+        if record:
+            meta, name = record.split("\t", 1)
+            entries[name] = meta
+    return entries
+
+
+def _update_tree(repo, tree, parts, blob, mode):
+    # Seuls les arbres des dossiers parents du fichier sont relus et réécrits ;
+    # `--missing` : les blobs de l'arbre ne sont ni vérifiés ni téléchargés
+    # (clone partiel)
+    entries = _entries(repo, tree)
+    name = parts[0]
+    if len(parts) == 1:
+        entries[name] = f"{mode} blob {blob}"
+    else:
+        current = entries.get(name, "").split()
+        subtree = current[2] if current and current[1] == "tree" else None
+        entries[name] = f"040000 tree {_update_tree(repo, subtree, parts[1:], blob, mode)}"
+    listing = "".join(f"{meta}\t{entry}\0" for entry, meta in entries.items())
+    return _with_input(repo, "mktree", "-z", "--missing", data=listing.encode("utf-8"))
+
+
+def commit_files(repo, parent, files, message, mode="100644"):
+    """Commit ajoutant ou remplaçant `files` ({chemin: contenu bytes}) sur le commit `parent`.
+
+    Le commit est construit directement dans la base d'objets (hash-object,
+    mktree, commit-tree), sans index ni répertoire de travail : le coût ne
+    dépend que de la profondeur des chemins, pas de la taille du
+    repository. Renvoie None si l'arbre est inchangé.
+    """
+    base = repo.git.rev_parse(f"{parent}^{{tree}}")
+    tree = base
+    for path, content in files.items():
+        blob = _with_input(repo, "hash_object", "-w", "--stdin", data=content)
+        tree = _update_tree(repo, tree, path.strip("/").split("/"), blob, mode)
+    if tree == base:
+        return None
+    return repo.git.commit_tree(tree, "-p", parent, "-m", message)
+
+
+def push_commit(repo, commit, ref):
+    """Pousse `commit` sur la référence distante `ref` (ex. refs/heads/main), sans jamais forcer."""
+    try:
+        repo.git.push("origin", f"{commit}:{ref}")
+    except git.GitCommandError as e:
+        if any(marker in (e.stderr or "") for marker in _REJECTED):
+            raise PushRejected(f"Push refusé sur {ref} : la branche distante a évolué") from e
+        raise
+    logger.info("Commit %s poussé sur %s", commit[:12], ref)
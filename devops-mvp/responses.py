@@ -0,0 +1,112 @@
+import gzip
+import json
+import os
+
+from fastapi.responses import Response
+
+# Encodeurs optionnels : utilisés s'ils sont installés
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Corps plus petits envoyés sans compression
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024))
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+# Par ordre de préférence, à qualité égale dans l'en-tête de la requête
+MEDIA_TYPES = [JSON] + ([MSGPACK, "application/x-msgpack"] if msgpack else [])
+COMPRESSORS = {}
+if brotli:
+    COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=5)
+COMPRESSORS["gzip"] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+
+VARY = "Accept, Accept-Encoding"
+
+
+def analysis_etag(commit, version):
+    """ETag (faible) d'un résultat d'analyse : il ne dépend que du commit et de la version de l'analyseur."""
+    return f'W/"{version}-{commit}"'
+
+
+def etag_matches(request, etag):
+    """Vrai si l'en-tête If-None-Match de la requête désigne `etag` (comparaison faible)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    weak = lambda tag: tag.strip().removeprefix("W/")
+    return weak(etag) in {weak(tag) for tag in header.split(",")}
+
+
+def negotiate(header, candidates):
+    """Élément de `candidates` préféré par un en-tête Accept ou Accept-Encoding, None si aucun.
+
+    Les qualités (`;q=`) et jokers (`*`, `type/*`) sont pris en compte ; à
+    qualité égale, l'ordre de `candidates` l'emporte.
+    """
+    if not header:
+        return None
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    def quality(candidate):
+        if candidate in accepted:
+            return accepted[candidate]
+        family = candidate.split("/", 1)[0] + "/*"
+        return accepted.get(family, accepted.get("*/*", accepted.get("*", 0.0)))
+
+    best = max(candidates, key=lambda candidate: (quality(candidate), -candidates.index(candidate)), default=None)
+    return best if best is not None and quality(best) > 0 else None
+
+
+def serialize(content, media_type=JSON):
+    if media_type != JSON:
+        return msgpack.packb(content, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_response(request, content, status_code=200, etag=None, headers=None):
+    """Réponse au format demandé par Accept (JSON ou MessagePack), compressée selon Accept-Encoding.
+
+    JSON est produit par orjson s'il est installé ; MessagePack et brotli ne
+    sont proposés que si les modules correspondants sont installés.
+    """
+    headers = {"Vary": VARY, **(headers or {})}
+    if etag:
+        headers["ETag"] = etag
+    media_type = negotiate(request.headers.get("accept"), MEDIA_TYPES) or JSON
+    body = serialize(content, media_type)
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate(request.headers.get("accept-encoding"), list(COMPRESSORS))
+        if encoding:
+            body = COMPRESSORS[encoding](body)
+            headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status_code, media_type=media_type, headers=headers)
+
+
+def not_modified(etag):
+    return Response(status_code=304, headers={"ETag": etag, "Vary": VARY})
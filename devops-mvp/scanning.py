@@ -0,0 +1,159 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+from complexity import measure
+from fileaccess import count_occurrences, scan_needles
+from frameworks import imported_frameworks
+from languages import disambiguate
+from logs import get_logger
+from metrics import SCAN_SECONDS
+from ports import parse_code
+from snapshot import RepoSnapshot
+from workers import check_deadline, current_deadline, job_deadline
+
+logger = get_logger("scanning")
+
+# Processus de lecture du contenu (1 : toujours en série)
+SCAN_WORKERS = int(os.getenv("ANALYSIS_SCAN_WORKERS", os.cpu_count() or 1))
+# En dessous de ce nombre de fichiers à lire, le démarrage et les échanges
+# entre processus coûtent plus que la lecture elle-même
+SCAN_PARALLEL_MIN_FILES = int(os.getenv("ANALYSIS_SCAN_PARALLEL_MIN_FILES", 5000))
+# Taille maximale d'un lot de fichiers confié à un processus
+SCAN_CHUNK_FILES = int(os.getenv("ANALYSIS_SCAN_CHUNK_FILES", 1000))
+
+# Imports Python (motif bytes, appliqué sans décoder le fichier)
+IMPORT_PATTERN = re.compile(rb'^(?:from|import)\s+([\w\.]+)', re.MULTILINE)
+DOCSTRING_MARKERS = ('"""', "'''")
+
+# Règles appliquées au contenu d'un fichier (bytes ou mmap). Elles sont
+# exécutées dans les processus de lecture : seuls leur nom et leur argument
+# éventuel circulent, et elles ne renvoient que des copies sérialisables.
+EXTRACTORS = {
+    'framework': imported_frameworks,
+    'imports': lambda path, buffer: tuple(
+        name.decode('utf-8', 'replace') for name in IMPORT_PATTERN.findall(buffer)),
+    'tests': lambda path, buffer: count_occurrences(buffer, b'def test_'),
+    'documented': lambda path, buffer: bool(scan_needles(buffer, DOCSTRING_MARKERS, stop_on_first=True)[0]),
+    'ports': lambda path, buffer: tuple(parse_code(path, buffer)),
+    'language': disambiguate,
+    'complexity': measure,
+    # Argument : chaînes recherchées (insensible à la casse), trouvées en minuscules
+    'needles': lambda path, buffer, needles: tuple(sorted(scan_needles(buffer, needles)[0])),
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _executor(workers):
+    """Pool de processus partagé par les analyses, créé au premier besoin."""
+    with _pools_lock:
+        if workers not in _pools:
+            # Pas de fork direct d'un serveur multi-thread : forkserver (qui
+            # précharge ce module) ou, à défaut, spawn
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context('spawn')
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return _pools[workers]
+
+
+def _discard_executor(workers):
+    with _pools_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract(rule, argument, path, buffer):
+    if argument is None:
+        return EXTRACTORS[rule](path, buffer)
+    return EXTRACTORS[rule](path, buffer, argument)
+
+
+def _visit(snapshot, items):
+    """Applique à chaque fichier ses règles, en une seule lecture du fichier."""
+    results = []
+    for path, _, rules in items:
+        check_deadline()
+        facts = snapshot.scan(path, lambda buffer: {
+            rule: _extract(rule, argument, path, buffer) for rule, argument in rules})
+        if facts is not None:
+            results.append((path, facts))
+    return results
+
+
+def _scan_chunk(root, items, deadline):
+    # Exécuté dans un processus de lecture : snapshot sans parcours limité au
+    # lot, sans cache de contenu (chaque fichier n'est lu qu'une fois). Le lot
+    # s'interrompt entre deux fichiers à l'échéance du job (JobTimeout)
+    snapshot = RepoSnapshot.from_tree(root, [(path, size) for path, size, _ in items], cache_bytes=0)
+    with job_deadline(deadline):
+        return _visit(snapshot, items), snapshot.files_read, snapshot.bytes_read
+
+
+def _scan_parallel(snapshot, items, workers):
+    # Lots contigus, au moins quatre par processus pour équilibrer la charge ;
+    # map rend les résultats dans l'ordre des lots : la fusion est déterministe.
+    # Une erreur (JobTimeout d'un lot) annule les lots qui n'ont pas démarré
+    size = max(1, min(SCAN_CHUNK_FILES, -(-len(items) // (workers * 4))))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    results = []
+    for chunk_results, files_read, bytes_read in _executor(workers).map(
+            _scan_chunk, repeat(snapshot.root), chunks, repeat(current_deadline())):
+        check_deadline()
+        results.extend(chunk_results)
+        snapshot.files_read += files_read
+        snapshot.bytes_read += bytes_read
+    return results
+
+
+def scan_contents(snapshot, selectors, workers=None, paths=None, min_parallel=None):
+    """Résultat des règles pour chaque fichier lu : {chemin: {règle: valeur}}.
+
+    `selectors` associe à chaque règle de EXTRACTORS un prédicat sur les
+    FileEntry ; un prédicat qui renvoie un tuple retient le fichier et
+    transmet ce tuple à la règle comme argument (chaînes recherchées dans ce
+    fichier, par exemple). Chaque fichier retenu par au moins une règle est
+    lu une seule fois ; au-delà de SCAN_PARALLEL_MIN_FILES fichiers, les
+    lectures sont réparties entre `workers` processus. Les fichiers binaires
+    ou illisibles sont absents du résultat, qui suit l'ordre du snapshot (ou
+    celui de `paths`, pour ne lire que ces fichiers). `min_parallel` remplace
+    SCAN_PARALLEL_MIN_FILES pour des règles plus coûteuses que la lecture.
+    """
+    workers = SCAN_WORKERS if workers is None else workers
+    min_parallel = SCAN_PARALLEL_MIN_FILES if min_parallel is None else min_parallel
+    if paths is None:
+        entries = snapshot.iter_files()
+    else:
+        entries = (snapshot.files[path] for path in paths if path in snapshot.files)
+    items = []
+    for entry in entries:
+        rules = []
+        for rule, select in selectors.items():
+            selection = select(entry)
+            if selection:
+                rules.append((rule, selection if isinstance(selection, tuple) else None))
+        if rules and snapshot.readable(entry.path):
+            items.append((entry.path, entry.size, tuple(rules)))
+
+    parallel = workers > 1 and len(items) >= min_parallel
+    with SCAN_SECONDS.time(mode="parallel" if parallel else "serial"):
+        if parallel:
+            try:
+                results = _scan_parallel(snapshot, items, workers)
+            except BrokenProcessPool as e:
+                logger.warning("Processus de lecture interrompu (%s), lecture en série", e)
+                _discard_executor(workers)
+                results = _visit(snapshot, items)
+        else:
+            results = _visit(snapshot, items)
+    logger.debug("Contenu de %d fichiers lu (%s)", len(items), "%d processus" % workers if parallel else "en série")
+    return dict(results)
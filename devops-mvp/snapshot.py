@@ -0,0 +1,421 @@
+import io
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from fileaccess import (
+    MMAP_THRESHOLD, READ_MAX_BYTES, SNIFF_BYTES, ContentCache, count_occurrences, looks_binary, mapped,
+    scan_needles,
+)
+from logs import get_logger
+from metrics import WALK_SECONDS
+
+logger = get_logger("snapshot")
+
+
+class _CountingReader(io.RawIOBase):
+    """Fichier brut dont les octets lus sont comptés dans le snapshot."""
+
+    def __init__(self, raw, snapshot):
+        self._raw = raw
+        self._snapshot = snapshot
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._raw.readinto(buffer)
+        self._snapshot.bytes_read += n or 0
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._raw.seek(offset, whence)
+
+    def tell(self):
+        return self._raw.tell()
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    path: str       # chemin relatif à la racine, séparateur "/"
+    name: str
+    ext: str        # extension en minuscules, "" si absente
+    size: int       # None si le blob n'a pas été récupéré (checkout partiel)
+    mtime: float
+
+    def under(self, dirs):
+        """Vrai si l'un des dossiers parents du fichier porte l'un des noms `dirs`."""
+        return any(part in dirs for part in self.path.split('/')[:-1])
+
+
+class AccessLog:
+    """Chemins consultés par un détecteur (voir RepoSnapshot.tracking)."""
+
+    def __init__(self):
+        self.paths = set()
+        # Vrai si le détecteur a parcouru l'arbre ou un résultat mémorisé
+        self.whole_tree = False
+
+    def touched_by(self, changed):
+        """Vrai si l'un des chemins `changed` ({chemin: statut git}) est consulté, ou ajouté
+        ou supprimé sous un dossier consulté (une modification ne change pas l'existence
+        des dossiers parents)."""
+        if self.whole_tree:
+            return True
+        for path, status in changed.items():
+            if path in self.paths:
+                return True
+            if status in ('A', 'D'):
+                parts = path.split('/')
+                if any('/'.join(parts[:i]) in self.paths for i in range(1, len(parts))):
+                    return True
+        return False
+
+
+class RepoSnapshot:
+    """Vue figée d'un repository construite en un seul parcours.
+
+    Le parcours (os.scandir) collecte les métadonnées de tous les fichiers ;
+    le contenu n'est lu qu'à la demande. Les lectures passent par une couche
+    commune (fileaccess) : binaires reconnus sur leurs premiers Ko et ignorés,
+    fichiers au-delà de READ_MAX_BYTES ignorés, gros fichiers parcourus via
+    mmap sans copie, petits fichiers conservés dans un cache borné en octets.
+    """
+
+    # Seul le dossier .git lui-même est exclu du parcours ; les autres
+    # exclusions (venv, __pycache__...) sont propres à chaque détecteur.
+    SKIPPED_DIRS = frozenset({'.git'})
+
+    def __init__(self, root, walk=True, cache_bytes=None):
+        self.root = os.path.abspath(root)
+        self.files = {}
+        self.dirs = set()
+        # Chemins présents sur disque ; None signifie "tous" (checkout complet)
+        self.checked_out = None
+        # SHA du commit analysé, renseigné lors du clone
+        self.commit = None
+        # SHA des blobs git par chemin, connus lorsque le snapshot vient de l'arbre git
+        self.blob_ids = {}
+        # Fichiers ouverts et octets effectivement lus par read_text
+        self.files_read = 0
+        self.bytes_read = 0
+        self._contents = ContentCache(cache_bytes)
+        self._binary = {}
+        self._memo = {}
+        self._access = None
+        if walk:
+            with WALK_SECONDS.time():
+                self._walk()
+
+    @classmethod
+    def from_tree(cls, root, entries, checked_out=None, cache_bytes=None, blob_ids=None):
+        """Snapshot construit depuis les métadonnées git (chemin, taille).
+
+        Utilisé pour les checkouts partiels : tous les fichiers de l'arbre sont
+        connus, mais seul le contenu de `checked_out` est lisible sur disque.
+        La taille vaut None pour les fichiers dont le blob n'a pas été récupéré.
+        """
+        snapshot = cls(root, walk=False, cache_bytes=cache_bytes)
+        for path, size in entries:
+            name = path.rsplit('/', 1)[-1]
+            snapshot.files[path] = FileEntry(
+                path=path,
+                name=name,
+                ext=os.path.splitext(name)[1].lower(),
+                size=size,
+                mtime=0.0,
+            )
+            parts = path.split('/')[:-1]
+            for i in range(1, len(parts) + 1):
+                snapshot.dirs.add('/'.join(parts[:i]))
+        if checked_out is not None:
+            snapshot.checked_out = set(checked_out)
+        if blob_ids is not None:
+            snapshot.blob_ids = blob_ids
+        return snapshot
+
+    def _walk(self):
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            try:
+                with os.scandir(abs_dir) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.SKIPPED_DIRS:
+                            self.dirs.add(rel)
+                            stack.append(rel)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        self.files[rel] = FileEntry(
+                            path=rel,
+                            name=entry.name,
+                            ext=os.path.splitext(entry.name)[1].lower(),
+                            size=st.st_size,
+                            mtime=st.st_mtime,
+                        )
+                except OSError:
+                    continue
+
+    def abspath(self, rel):
+        return os.path.join(self.root, *rel.split('/'))
+
+    @contextmanager
+    def tracking(self):
+        """Enregistre dans un AccessLog les chemins consultés pendant le bloc."""
+        log, previous = AccessLog(), self._access
+        self._access = log
+        try:
+            yield log
+        finally:
+            self._access = previous
+            if previous is not None:
+                previous.paths |= log.paths
+                previous.whole_tree |= log.whole_tree
+
+    def _touch(self, rel=None):
+        if self._access is not None:
+            if rel is None:
+                self._access.whole_tree = True
+            else:
+                self._access.paths.add(rel)
+
+    def exists(self, rel):
+        self._touch(rel)
+        return rel in self.files or rel in self.dirs
+
+    def is_file(self, rel):
+        self._touch(rel)
+        return rel in self.files
+
+    def is_dir(self, rel):
+        self._touch(rel)
+        return rel in self.dirs
+
+    def iter_files(self, ext=None, exclude_dirs=()):
+        """Itère sur les fichiers, filtrés par extension et dossiers exclus."""
+        self._touch()
+        exclude = set(exclude_dirs)
+        for entry in self.files.values():
+            if ext is not None and entry.ext != ext:
+                continue
+            if exclude and not exclude.isdisjoint(entry.path.split('/')[:-1]):
+                continue
+            yield entry
+
+    def _size(self, rel):
+        """Taille sur disque d'un fichier lisible, None s'il ne l'est pas."""
+        self._touch(rel)
+        if rel not in self.files or (self.checked_out is not None and rel not in self.checked_out):
+            return None
+        size = self.files[rel].size
+        if size is None:
+            try:
+                size = os.path.getsize(self.abspath(rel))
+            except OSError:
+                return None
+        if size > READ_MAX_BYTES:
+            logger.debug("Fichier %s ignoré (%d octets)", rel, size)
+            return None
+        return size
+
+    def readable(self, rel):
+        """Vrai si le contenu du fichier est sur disque et sous le plafond de lecture."""
+        return self._size(rel) is not None
+
+    def is_binary(self, rel):
+        """Vrai si les premiers Ko du fichier ne ressemblent pas à du texte."""
+        if rel not in self._binary:
+            head = b""
+            try:
+                with open(self.abspath(rel), 'rb') as f:
+                    head = f.read(SNIFF_BYTES)
+                self.files_read += 1
+                self.bytes_read += len(head)
+            except OSError:
+                pass
+            self._binary[rel] = looks_binary(head)
+        return self._binary[rel]
+
+    def read_bytes(self, rel):
+        """Contenu brut d'un fichier texte, None s'il est binaire, trop gros ou illisible."""
+        self._touch(rel)
+        content = self._contents.get(rel)
+        if content is not None:
+            return content
+        if self._size(rel) is None or self._binary.get(rel):
+            return None
+        try:
+            with open(self.abspath(rel), 'rb') as f:
+                content = f.read()
+        except OSError as e:
+            logger.debug("Erreur lors de la lecture du fichier %s: %s", rel, e)
+            return None
+        self.files_read += 1
+        self.bytes_read += len(content)
+        self._binary[rel] = looks_binary(content[:SNIFF_BYTES])
+        if self._binary[rel]:
+            return None
+        if len(content) <= MMAP_THRESHOLD:
+            self._contents.put(rel, content)
+        return content
+
+    def read_text(self, rel):
+        """Contenu texte (UTF-8) d'un fichier ; None si binaire, trop gros ou illisible.
+
+        Pour chercher dans des fichiers potentiellement volumineux, préférer
+        find_needles, contains_any, count ou scan, qui ne copient pas le contenu.
+        """
+        content = self.read_bytes(rel)
+        if content is None:
+            return None
+        try:
+            return content.decode('utf-8')
+        except UnicodeDecodeError as e:
+            logger.debug("Fichier %s non UTF-8: %s", rel, e)
+            return None
+
+    @contextmanager
+    def stream(self, rel):
+        """Fichier ouvert en lecture binaire, None s'il est absent ou illisible.
+
+        Destiné aux lecteurs qui parcourent le fichier par blocs sans le
+        charger en entier : le plafond READ_MAX_BYTES ne s'applique pas.
+        """
+        self._touch(rel)
+        if rel not in self.files or (self.checked_out is not None and rel not in self.checked_out):
+            yield None
+            return
+        try:
+            raw = open(self.abspath(rel), 'rb', buffering=0)
+        except OSError as e:
+            logger.debug("Erreur lors de la lecture du fichier %s: %s", rel, e)
+            yield None
+            return
+        self.files_read += 1
+        with io.BufferedReader(_CountingReader(raw, self)) as stream:
+            yield stream
+
+    @contextmanager
+    def _buffer(self, rel):
+        size = self._size(rel)
+        if size is None or size <= MMAP_THRESHOLD:
+            yield self.read_bytes(rel) if size is not None else None
+            return
+        if self.is_binary(rel):
+            yield None
+            return
+        mapping = mapped(self.abspath(rel))
+        try:
+            buffer = mapping.__enter__()
+        except OSError as e:
+            logger.debug("Erreur lors de la lecture du fichier %s: %s", rel, e)
+            yield None
+            return
+        self.files_read += 1
+        try:
+            yield buffer
+        finally:
+            mapping.__exit__(None, None, None)
+
+    def scan(self, rel, func):
+        """Renvoie func(contenu), contenu étant des bytes ou un mmap ; None si illisible.
+
+        Le mmap est fermé au retour : `func` ne doit renvoyer que des copies
+        (bytes, str, nombres), jamais le tampon ni des objets match.
+        """
+        with self._buffer(rel) as buffer:
+            if buffer is None:
+                return None
+            result = func(buffer)
+            if not isinstance(buffer, bytes):
+                self.bytes_read += len(buffer)
+            return result
+
+    def find_needles(self, rel, *needles):
+        """Chaînes de `needles` présentes dans le fichier (insensible à la casse, en minuscules).
+
+        La lecture s'arrête dès que toutes ont été trouvées.
+        """
+        with self._buffer(rel) as buffer:
+            if buffer is None:
+                return set()
+            found, scanned = scan_needles(buffer, needles)
+            if not isinstance(buffer, bytes):
+                self.bytes_read += scanned
+            return found
+
+    def contains_any(self, rel, *needles):
+        """Vrai si l'une des chaînes apparaît dans le fichier ; s'arrête à la première."""
+        with self._buffer(rel) as buffer:
+            if buffer is None:
+                return False
+            found, scanned = scan_needles(buffer, needles, stop_on_first=True)
+            if not isinstance(buffer, bytes):
+                self.bytes_read += scanned
+            return bool(found)
+
+    def count(self, rel, needle):
+        """Nombre d'occurrences (sensible à la casse) de `needle` dans le fichier."""
+        needle = needle.encode('utf-8')
+        return self.scan(rel, lambda buffer: count_occurrences(buffer, needle)) or 0
+
+    def findall(self, rel, pattern):
+        """pattern.findall (motif bytes) sur le contenu du fichier ; [] si illisible."""
+        return self.scan(rel, pattern.findall) or []
+
+    def memo(self, key, compute):
+        """Mémorise le résultat d'un détecteur pour la durée de vie du snapshot."""
+        # Un résultat mémorisé peut dépendre de tout l'arbre
+        self._touch()
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def seed(self, key, value):
+        """Fournit à l'avance le résultat mémorisé sous `key` (analyse incrémentale)."""
+        self._memo[key] = value
+
+    def memoized(self):
+        """Résultats mémorisés jusqu'ici, par clé."""
+        return dict(self._memo)
+
+    def extension_counts(self):
+        def compute():
+            counts = {}
+            for entry in self.files.values():
+                counts[entry.ext] = counts.get(entry.ext, 0) + 1
+            return counts
+        return self.memo('extension_counts', compute)
+
+    @property
+    def sizes_complete(self):
+        return self.unknown_sizes() == 0
+
+    def unknown_sizes(self):
+        """Nombre de fichiers dont la taille est inconnue (blob non récupéré)."""
+        return self.memo('unknown_sizes', lambda: sum(1 for entry in self.files.values() if entry.size is None))
+
+    def total_size(self):
+        """Taille cumulée des fichiers dont la taille est connue."""
+        return self.memo('total_size', lambda: sum(
+            entry.size for entry in self.files.values() if entry.size is not None))
+
+
+def as_snapshot(path_or_snapshot):
+    if isinstance(path_or_snapshot, RepoSnapshot):
+        return path_or_snapshot
+    return RepoSnapshot(path_or_snapshot)
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_mirrors(tmp_path, monkeypatch):
+    """Chaque test utilise son propre dossier de miroirs."""
+    from mirrors import full_mirror_store, mirror_store
+    monkeypatch.setattr(mirror_store, "root", str(tmp_path / "mirrors"))
+    monkeypatch.setattr(full_mirror_store, "root", str(tmp_path / "mirrors-full"))
+    return mirror_store
+
+
+@pytest.fixture
+def make_repo(tmp_path):
+    """Construit une arborescence à partir d'un dict {chemin relatif: contenu}."""
+    def _make(files, root=None):
+        root = root or tmp_path / "repo"
+        for rel, content in files.items():
+            target = root / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, bytes):
+                target.write_bytes(content)
+            else:
+                target.write_text(content, encoding="utf-8")
+        return str(root)
+    return _make
+
+
+def _git(*args, cwd):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def make_remote(tmp_path, make_repo):
+    """Crée un repository bare local (URL file://) contenant `files`."""
+    def _make(files, name="remote"):
+        work = make_repo(files, root=tmp_path / f"{name}_work")
+        _git("init", "-q", "-b", "main", cwd=work)
+        _git("add", "-A", cwd=work)
+        _git("commit", "-q", "-m", "initial", cwd=work)
+        bare = tmp_path / f"{name}.git"
+        _git("clone", "-q", "--bare", work, str(bare), cwd=tmp_path)
+        _git("config", "uploadpack.allowFilter", "true", cwd=bare)
+        return bare.as_uri()
+    return _make
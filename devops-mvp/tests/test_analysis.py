@@ -1,23 +1,123 @@
-def test_detect_language():
+import os
+import subprocess
+
+from history import history_size
+from main import (
+    analyze_cloud_costs,
+    analyze_complexity,
+    calculate_health_score,
+    detect_framework,
+    detect_language,
+)
+from snapshot import RepoSnapshot
+from workers import Repo
+
+
+def test_detect_language(make_repo):
     """Test de la détection du langage principal."""
-    assert True  # À implémenter
+    path = make_repo({"app.py": "print('hi')\n", "README.md": "# Demo\n"})
+    assert detect_language(path) == "Python"
 
-def test_detect_framework():
+def test_detect_framework(make_repo):
     """Test de la détection du framework utilisé."""
-    assert True  # À implémenter
+    path = make_repo({
+        "requirements.txt": "fastapi==0.104.1\n",
+        "main.py": "from fastapi import FastAPI\napp = FastAPI()\n",
+    })
+    assert detect_framework(path) == "FastAPI"
 
-def test_health_score_calculation():
+def test_health_score_calculation(make_repo):
     """Test du calcul du Health Score."""
-    assert True  # À implémenter
+    path = make_repo({
+        "README.md": "# Demo\n",
+        "requirements.txt": "fastapi==0.104.1\npytest==7.4.0\n",
+        "tests/test_app.py": "def test_a():\n    pass\n\ndef test_b():\n    pass\n",
+        "src/app.py": '"""Module."""\n',
+        ".gitignore": "*.pyc\n",
+    })
+    health = calculate_health_score(RepoSnapshot(path))
+    details = health["details"]
+    assert details["tests"]["score"] == 12
+    assert "  - Contient 2 fonction(s) de test" in details["tests"]["details"]
+    assert details["documentation"]["score"] == 10
+    assert details["structure"]["score"] == 10
+    assert details["best_practices"]["details"] == [".gitignore présent", "requirements.txt présent"]
+    assert details["dependencies"]["score"] == 15
+    assert health["total_score"] == sum(d["score"] for d in details.values())
 
-def test_cloud_costs_analysis():
+def test_cloud_costs_analysis(make_repo):
     """Test de l'analyse des coûts cloud."""
-    assert True  # À implémenter
+    path = make_repo({"main.py": "print('hi')\n", "nginx.conf": "listen 80;\n"})
+    costs = analyze_cloud_costs(path)
+    assert costs["compute"]["estimated_monthly"] == 30
+    assert costs["network"]["estimated_monthly"] == 20
+    assert any(r["title"] == "Containerisation" for r in costs["recommendations"])
 
-def test_repository_size_estimation():
+def test_repository_size_estimation(make_repo):
     """Test de l'estimation de la taille du repository."""
-    assert True  # À implémenter
+    path = make_repo({"src/app.py": "print('hi')\n" * 10})
+    git = lambda *args: subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args], cwd=path, check=True)
+    git("init", "-q")
+    # Deux versions d'un modèle binaire, puis sa suppression : il pèse encore sur l'historique
+    for version in range(2):
+        with open(os.path.join(path, "model.bin"), "wb") as f:
+            f.write(os.urandom(300_000 + version))
+        git("add", "-A")
+        git("commit", "-q", "-m", f"v{version}")
+    git("rm", "-q", "model.bin")
+    git("commit", "-q", "-m", "suppression")
+    git("gc", "-q")
+
+    size = history_size(Repo(path), top=2, lfs_min_bytes=500_000, track_min_bytes=1000)
+    assert size["objects"]["packs"] == 1 and size["objects"]["pack_bytes"] >= 600_000
+    assert size["history"]["blobs"] == 3
+    assert [(blob["path"], blob["size"]) for blob in size["largest_blobs"]] == [
+        ("model.bin", 300_001), ("model.bin", 300_000)]
+    # Aucune version ne dépasse le seuil, mais le binaire cumulé, si
+    assert size["lfs_candidates"] == [{
+        "path": "model.bin", "versions": 2, "growth_bytes": 600_001,
+        "growth_disk_bytes": size["lfs_candidates"][0]["growth_disk_bytes"], "largest_bytes": 300_001,
+    }]
+    assert size["lfs_candidates"][0]["growth_disk_bytes"] > 500_000
+    assert not size["partial"]
 
-def test_complexity_analysis():
+COMPLEX_CODE = """\
+def simple():
+    return 1
+
+
+class Parser:
+    def parse(self, items, strict=False):
+        for item in items:
+            if item and strict:
+                while item:
+                    item -= 1
+            elif item is None:
+                raise ValueError(item)
+            else:
+                continue
+        return [item for item in items if item]
+"""
+
+def test_complexity_analysis(make_repo):
     """Test de l'analyse de la complexité du code."""
-    assert True  # À implémenter 
\ No newline at end of file
+    path = make_repo({"app/parser.py": COMPLEX_CODE, "legacy.py": "print 'python 2'\n"})
+    complexity = analyze_complexity(RepoSnapshot(path))
+    assert complexity["files"] == 1 and complexity["functions"] == 2
+    assert complexity["parse_errors"] == 1 and complexity["unparsable"] == ["legacy.py"]
+    # for, if + and, while, elif, compréhension avec condition : 1 + 7
+    assert complexity["hotspots"][0] == {
+        "path": "app/parser.py", "function": "Parser.parse", "line": 6, "length": 10,
+        "complexity": 8, "rank": "B", "depth": 3,
+    }
+    assert complexity["max_complexity"] == 8 and complexity["average_complexity"] == 4.5
+    assert complexity["ranks"] == {"A": 1, "B": 1}
+    assert 0 < complexity["least_maintainable"][0]["maintainability"] == complexity["average_maintainability"] <= 100
+
+    health = calculate_health_score(RepoSnapshot(path))["details"]["maintainability"]
+    assert health["score"] == 10
+    assert health["details"] == [
+        "Complexité cyclomatique moyenne: 4.5",
+        f"Indice de maintenabilité moyen: {complexity['average_maintainability']}",
+    ]
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from batch import repo_host, run_batch
+from cache import AnalysisCache
+from jobs import JobManager
+
+
+def test_batch_streams_results_and_summary(make_remote, monkeypatch):
+    """Un repository en échec n'interrompt pas le lot ; le résumé agrège les résultats."""
+    monkeypatch.setattr(main, "job_manager", JobManager())
+    monkeypatch.setattr(main, "analysis_cache", AnalysisCache(db_path=""))
+    flask = make_remote({"app.py": "from flask import Flask\n", "requirements.txt": "flask==2.0\n"}, name="flask")
+    django = make_remote({"manage.py": "import django\n", "requirements.txt": "django==4.2\n"}, name="django")
+    missing = flask.replace("flask.git", "missing.git")
+
+    response = TestClient(main.app).post("/analyze-batch", json={"repo_urls": [flask, missing, django]})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    results = {line["repo_url"]: line for line in lines if line["type"] == "result"}
+    assert results[flask]["analysis"]["framework"] == "Flask"
+    assert results[django]["analysis"]["framework"] == "Django"
+    assert results[missing]["status"] == "error"
+
+    summary = lines[-1]
+    assert summary["type"] == "summary"
+    assert (summary["succeeded"], summary["failed"]) == (2, 1)
+    assert summary["frameworks"] == {"Flask": 1, "Django": 1}
+    assert sum(summary["health_histogram"].values()) == 2
+
+
+def test_batch_respects_global_and_per_host_limits():
+    running = {"total": 0, "max": 0, "hosts": {}, "host_max": {}}
+
+    async def analyze(repo_url):
+        host = repo_host(repo_url)
+        running["total"] += 1
+        running["hosts"][host] = running["hosts"].get(host, 0) + 1
+        running["max"] = max(running["max"], running["total"])
+        running["host_max"][host] = max(running["host_max"].get(host, 0), running["hosts"][host])
+        await asyncio.sleep(0.01)
+        running["total"] -= 1
+        running["hosts"][host] -= 1
+        if repo_url.endswith("boom"):
+            raise RuntimeError("boom")
+        return {"status": "success", "analysis": {}}
+
+    urls = [f"https://github.com/org/r{i}" for i in range(6)]
+    urls += [f"https://gitlab.com/org/r{i}" for i in range(6)] + ["https://gitlab.com/org/boom"]
+
+    async def collect():
+        return [item async for item in run_batch(urls, analyze, concurrency=3, per_host=2)]
+
+    items = asyncio.run(collect())
+    assert running["max"] <= 3
+    assert running["host_max"] == {"github.com": 2, "gitlab.com": 2}
+    assert len(items) == len(urls) + 1
+    assert items[-1]["failed"] == 1
@@ -0,0 +1,48 @@
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bench_detectors import compare  # noqa: E402
+from main import calculate_health_score, detect_imports, detect_language  # noqa: E402
+from snapshot import RepoSnapshot  # noqa: E402
+from synthetic import generate_repo  # noqa: E402
+
+
+def _digest(root):
+    digest = hashlib.sha1()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            digest.update(os.path.relpath(path, root).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def test_synthetic_repo_is_deterministic(tmp_path):
+    options = dict(files=200, depth=3, binary_files=2, vendor_files=20, large_files=1, large_file_kb=8)
+    first = generate_repo(str(tmp_path / "a"), **options)
+    second = generate_repo(str(tmp_path / "b"), **options)
+    assert first["languages"] == second["languages"]
+    assert _digest(tmp_path / "a") == _digest(tmp_path / "b")
+    assert _digest(tmp_path / "a") != _digest(generate_repo(str(tmp_path / "c"), seed=1, **options)["root"])
+
+
+def test_detectors_on_synthetic_repo(tmp_path):
+    info = generate_repo(str(tmp_path / "repo"), files=300, mix={"python": 1}, vendor_files=40)
+    snapshot = RepoSnapshot(info["root"])
+    assert detect_language(snapshot) == "Python"
+    # Les imports du vendoring (venv/) ne sont pas comptés comme dépendances du projet
+    assert not any("mod_" in module for module in detect_imports(snapshot)["third_party"])
+    tests = calculate_health_score(snapshot)["details"]["tests"]["details"]
+    assert not any("site-packages" in line for line in tests)
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"1k": {"walk": 0.1, "detect_port": 0.001}}
+    results = {"1k": {"walk": 0.2, "detect_port": 0.003, "end_to_end": 1.0}}
+    regressions = compare(results, baseline, threshold=0.5, min_delta=0.005)
+    assert regressions == [{"size": "1k", "measure": "walk", "baseline": 0.1, "value": 0.2}]
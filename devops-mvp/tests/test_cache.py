@@ -0,0 +1,85 @@
+import subprocess
+import time
+
+import pytest
+
+from cache import AnalysisCache, normalize_repo_url, resolve_head
+
+
+def test_normalize_repo_url():
+    """Les différentes écritures d'un même repository donnent la même clé."""
+    expected = "https://github.com/org/Repo"
+    assert normalize_repo_url("https://github.com/org/Repo.git") == expected
+    assert normalize_repo_url("https://GitHub.com/org/Repo/") == expected
+    assert normalize_repo_url("git@github.com:org/Repo.git") == expected
+    assert normalize_repo_url("file:///srv/git/repo.git") == "file:///srv/git/repo"
+
+def test_lru_eviction_and_stats():
+    """Au-delà de la capacité, l'entrée la moins récemment utilisée est évincée."""
+    cache = AnalysisCache(max_entries=2, ttl=None, db_path="")
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+
+def test_ttl_expiration():
+    """Une entrée expirée n'est plus servie."""
+    cache = AnalysisCache(max_entries=10, ttl=0.01, db_path="")
+    cache.put("a", {"v": 1})
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Le niveau SQLite est relu par une nouvelle instance."""
+    db_path = str(tmp_path / "cache.db")
+    AnalysisCache(max_entries=10, ttl=None, db_path=db_path).put("k", {"language": "Python"})
+    cache = AnalysisCache(max_entries=10, ttl=None, db_path=db_path)
+    assert cache.get("k") == {"language": "Python"}
+    assert cache.get_stats()["disk_hits"] == 1
+
+def test_analyze_repo_uses_cache(make_remote, monkeypatch):
+    """Une seconde analyse du même commit est servie par le cache, sauf avec force."""
+    from fastapi.testclient import TestClient
+    import main
+
+    monkeypatch.setattr(main, "analysis_cache", AnalysisCache(max_entries=10, ttl=None, db_path=""))
+    url = make_remote({"main.py": "from fastapi import FastAPI\napp = FastAPI()\n"})
+    client = TestClient(main.app)
+
+    first = client.post("/analyze-repo", data={"repo_url": url}).json()
+    assert first["status"] == "success" and first["cached"] is False
+    assert first["commit"] == resolve_head(url)
+
+    second = client.post("/analyze-repo", data={"repo_url": url}).json()
+    assert second["cached"] is True and second["analysis"] == first["analysis"]
+
+    forced = client.post("/analyze-repo", data={"repo_url": url, "force": "true"}).json()
+    assert forced["cached"] is False
+    assert client.get("/cache/stats").json()["hits"] == 1
+
+
+@pytest.mark.parametrize("mode", ["mirror", "sparse", "full"])
+def test_job_analyzes_the_commit_of_its_cache_key(make_remote, tmp_path, monkeypatch, mode):
+    """Un push arrivé entre la résolution du HEAD et le démarrage du job ne change pas le commit analysé."""
+    import main
+    from jobs import JobManager
+
+    monkeypatch.setattr("fetching.FETCH_MODE", mode)
+    monkeypatch.setattr(main, "analysis_cache", AnalysisCache(max_entries=10, ttl=None, db_path=""))
+    monkeypatch.setattr(main, "job_manager", JobManager())
+    url = make_remote({"main.py": "print(1)\n"})
+    resolved = resolve_head(url)
+    work = tmp_path / "remote_work"
+    (work / "package.json").write_text('{"dependencies": {"express": "4.0.0"}}')
+    for args in (["add", "-A"], ["commit", "-q", "-m", "second"], ["push", "-q", url, "HEAD:main"]):
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args], cwd=work, check=True)
+
+    result = main.start_analysis(url, head=resolved).done.result(timeout=60)
+    assert result["commit"] == resolved
+    cached = main.analysis_cache.get(AnalysisCache.make_key(url, resolved, main.ANALYZER_VERSION))
+    assert cached == result["analysis"]
+    assert not any(dependency.startswith("express") for dependency in cached["dependencies"])
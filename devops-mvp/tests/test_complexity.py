@@ -0,0 +1,46 @@
+import main
+import scanning
+from complexity import blob_id, complexity_cache
+from fetching import checkout_for_analysis
+from snapshot import RepoSnapshot
+
+
+def _count_parses(monkeypatch):
+    parsed = []
+    measure = scanning.EXTRACTORS['complexity']
+    monkeypatch.setitem(scanning.EXTRACTORS, 'complexity', lambda path, buffer: parsed.append(path) or measure(path, buffer))
+    return parsed
+
+
+def test_unchanged_blobs_are_never_parsed_again(make_repo, tmp_path, monkeypatch):
+    parsed = _count_parses(monkeypatch)
+    files = {"pkg/a.py": "def a(x):\n    return x or 1\n", "pkg/b.py": "def b():\n    pass\n"}
+    first = main.analyze_complexity(RepoSnapshot(make_repo(files, root=tmp_path / "origin")))
+    assert sorted(parsed) == ["pkg/a.py", "pkg/b.py"]
+
+    # Un fork avec un seul fichier modifié : seul celui-ci est compilé
+    fork = make_repo({**files, "pkg/b.py": "def b(y):\n    return y if y else 0\n"}, root=tmp_path / "fork")
+    second = main.analyze_complexity(RepoSnapshot(fork))
+    assert sorted(parsed) == ["pkg/a.py", "pkg/b.py", "pkg/b.py"]
+    assert first["functions"] == second["functions"] == 2
+    assert second["max_complexity"] == 2
+
+
+def test_blob_ids_come_from_the_git_tree(make_remote, tmp_path, monkeypatch):
+    content = "def handler(event):\n    return event\n"
+    url = make_remote({"handler.py": content})
+    with checkout_for_analysis(url, str(tmp_path / "clone")) as snapshot:
+        assert snapshot.blob_ids["handler.py"] == blob_id(content.encode())
+        main.analyze_complexity(snapshot)
+    assert complexity_cache.get(blob_id(content.encode()))["functions"][0][0] == "handler"
+
+
+def test_parallel_compilation_matches_serial(make_repo, monkeypatch):
+    files = {f"mod_{n}.py": "def f(x):\n" + "    if x:\n        x += 1\n" * n + "    return x\n" for n in range(1, 6)}
+    path = make_repo(files)
+    monkeypatch.setattr(complexity_cache, "max_entries", 0)
+    serial = main.analyze_complexity(RepoSnapshot(path))
+    monkeypatch.setattr(main, "COMPLEXITY_PARALLEL_MIN_FILES", 1)
+    monkeypatch.setattr(scanning, "SCAN_WORKERS", 2)
+    assert main.analyze_complexity(RepoSnapshot(path)) == serial
+    assert serial["max_complexity"] == 6
@@ -0,0 +1,85 @@
+import os
+
+import fetching
+from fetching import clone_for_analysis, is_required
+from workers import Repo
+
+
+def test_is_required_patterns():
+    """Motifs racine exacts, jokers traversant les dossiers et taille maximale."""
+    requirements = [("requirements.txt", None), ("*.py", 100)]
+    assert is_required("requirements.txt", 10, requirements)
+    assert not is_required("sub/requirements.txt", 10, requirements)
+    assert is_required("a/b/c.py", 100, requirements)
+    assert not is_required("a/b/c.py", 101, requirements)
+
+def test_sparse_clone_fetches_only_required_files(tmp_path, make_remote, monkeypatch):
+    """Le mode sparse ne matérialise que les fichiers déclarés par les détecteurs."""
+    url = make_remote({
+        "requirements.txt": "flask==3.0.0\n",
+        "app/server.py": "from flask import Flask\napp = Flask(__name__)\n",
+        "assets/logo.png": b"\x89PNG" + b"\0" * 4096,
+    })
+    local = str(tmp_path / "clone")
+    snapshot = clone_for_analysis(url, local, mode="sparse")
+
+    assert os.path.exists(os.path.join(local, "app", "server.py"))
+    assert not os.path.exists(os.path.join(local, "assets", "logo.png"))
+    # Le fichier reste connu via l'arbre git, sa taille via la base d'objets
+    assert snapshot.files["assets/logo.png"].size == 4100
+    assert snapshot.sizes_complete
+    assert snapshot.read_text("assets/logo.png") is None
+    assert "Flask" in snapshot.read_text("app/server.py")
+
+    # Blob plus gros que la limite du filtre : laissé sur le serveur, taille inconnue
+    monkeypatch.setattr(fetching, "BLOB_FILTER", "blob:limit=1000")
+    snapshot = clone_for_analysis(url, str(tmp_path / "limited"), mode="sparse")
+    assert snapshot.files["assets/logo.png"].size is None
+    assert snapshot.files["app/server.py"].size == 46
+    assert snapshot.unknown_sizes() == 1
+
+def test_oversized_sources_are_never_downloaded(tmp_path, make_remote, monkeypatch):
+    """La taille maximale d'un motif est appliquée avant le téléchargement des blobs."""
+    monkeypatch.setattr(fetching, "REQUIRED_FILES", [("requirements.txt", None), ("*.py", 100)])
+    monkeypatch.setattr(fetching, "BLOB_FILTER", "blob:limit=101")
+    url = make_remote({
+        "requirements.txt": "flask==3.0.0\n" * 30,
+        "small.py": "x = 1\n",
+        "big.py": "x = 1\n" * 50,
+    })
+    local = str(tmp_path / "clone")
+    snapshot = clone_for_analysis(url, local, mode="sparse")
+
+    repo = Repo(local)
+    assert fetching.filter_limit(repo) == 101
+    missing = repo.git.rev_list("--objects", "--no-walk", "--missing=print", "HEAD").split()
+    assert f"?{repo.git.rev_parse('HEAD:big.py')}" in missing
+    assert not os.path.exists(os.path.join(local, "big.py"))
+    assert snapshot.readable("small.py") and not snapshot.readable("big.py")
+    # Sans limite de taille, un fichier plus gros que le filtre est récupéré
+    assert snapshot.files["requirements.txt"].size == 390
+    assert snapshot.readable("requirements.txt")
+
+
+def test_sparse_and_full_clone_agree(tmp_path, make_remote):
+    """Les deux modes de récupération produisent la même analyse."""
+    from main import analyze_snapshot
+
+    url = make_remote({
+        "requirements.txt": "fastapi==0.104.1\npytest==7.4.0\n",
+        "main.py": "from fastapi import FastAPI\napp = FastAPI()\n",
+        "tests/test_main.py": "def test_ok():\n    assert True\n",
+        "Dockerfile": "FROM python:3.11\nEXPOSE 9000\n",
+    })
+    full = analyze_snapshot(clone_for_analysis(url, str(tmp_path / "full"), mode="full"))
+    sparse = analyze_snapshot(clone_for_analysis(url, str(tmp_path / "sparse"), mode="sparse"))
+    # Seul le stockage diffère : le mode sparse ignore la taille des blobs non récupérés
+    full["cloud_costs"].pop("storage")
+    sparse["cloud_costs"].pop("storage")
+    assert full == sparse
+
+def test_sparse_clone_without_required_files(tmp_path, make_remote):
+    """Un repository sans fichier requis donne un checkout vide mais un snapshot complet."""
+    url = make_remote({"docs/guide.md": "# Guide\n"})
+    snapshot = clone_for_analysis(url, str(tmp_path / "clone"), mode="sparse")
+    assert snapshot.is_dir("docs") and snapshot.is_file("docs/guide.md")
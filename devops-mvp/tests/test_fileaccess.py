@@ -0,0 +1,50 @@
+import snapshot as snapshot_module
+from fileaccess import SNIFF_BYTES, ContentCache, looks_binary
+from main import detect_framework, detect_imports
+from snapshot import RepoSnapshot
+
+
+def test_binary_files_are_sniffed_and_skipped(make_repo):
+    snapshot = RepoSnapshot(make_repo({
+        "model.py": b"\x00\x01\x02 app = FastAPI()" + bytes(range(256)),
+        "app.py": "from flask import Flask\napp = Flask(__name__)\n",
+    }))
+    assert snapshot.read_text("model.py") is None
+    assert snapshot.find_needles("model.py", "app = fastapi") == set()
+    assert detect_framework(snapshot) == "Flask"
+    assert looks_binary(b"plain text\n") is False
+
+
+def test_large_files_are_searched_through_mmap(make_repo, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "MMAP_THRESHOLD", 1024)
+    filler = "# " + "x" * 98 + "\n"
+    snapshot = RepoSnapshot(make_repo({
+        "big.py": "import requests\nAPP = FastAPI\n" + filler * 500 + "def test_a():\n    pass\ndef test_b(): pass\n",
+    }))
+    size = snapshot.files["big.py"].size
+    assert snapshot.find_needles("big.py", "app = fastapi") == {"app = fastapi"}
+    # Au-delà de l'en-tête examiné, la recherche s'arrête à la première occurrence
+    assert snapshot.bytes_read < SNIFF_BYTES + 100 < size
+    assert snapshot.count("big.py", "def test_") == 2
+    assert detect_imports(snapshot)["third_party"] == {"requests": {"count": 1, "files": ["big.py"]}}
+    # Rien n'est conservé en mémoire pour un fichier projeté
+    assert snapshot._contents.size == 0
+
+
+def test_files_above_the_cap_are_ignored(make_repo, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "READ_MAX_BYTES", 10)
+    snapshot = RepoSnapshot(make_repo({"main.py": "from fastapi import FastAPI\napp = FastAPI()\n"}))
+    assert snapshot.read_text("main.py") is None
+    assert not snapshot.contains_any("main.py", "fastapi")
+    assert snapshot.files_read == 0
+
+
+def test_content_cache_is_bounded():
+    cache = ContentCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.get("a")
+    cache.put("c", b"123")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345" and cache.get("c") == b"123"
+    assert cache.size == 8
@@ -0,0 +1,86 @@
+import io
+
+import pytest
+
+import frameworks
+import main
+from frameworks import import_frameworks, imported_frameworks
+from manifests import dependency_names, read_gemfile, read_go_mod, read_gradle, read_toml_dependencies
+from snapshot import RepoSnapshot
+
+
+def _names(reader, content):
+    return dependency_names(reader(io.BytesIO(content.encode("utf-8"))))
+
+
+def test_meta_framework_outranks_its_base(make_repo):
+    snapshot = RepoSnapshot(make_repo({
+        "package.json": '{"dependencies": {"next": "14.0.0", "react": "18.2.0", "react-dom": "18.2.0"}}',
+        "next.config.js": "module.exports = {}\n",
+        **{f"pages/p{n}.jsx": "import React from 'react'\nimport Link from 'next/link'\n" for n in range(6)},
+        "components/Button.tsx": "import { useState } from \"react\";\n",
+        # Code tiers : ni ses imports ni sa configuration ne comptent
+        "node_modules/express/index.js": "const x = require('koa')\n",
+        "node_modules/some-lib/angular.json": "{}",
+    }))
+    ranked = main.detect_frameworks(snapshot)
+    assert [framework["name"] for framework in ranked] == ["Next.js", "React"]
+    nextjs, react = ranked
+    assert nextjs["confidence"] > react["confidence"]
+    assert nextjs["evidence"] == {"packages": ["package.json: next"], "files": ["next.config.js"], "import_files": 6}
+    assert react["evidence"]["import_files"] == 7
+    assert main.detect_framework(snapshot) == "Next.js"
+    assert main.detect_port(snapshot) == 3000
+
+
+@pytest.mark.parametrize("files, expected, port", [
+    ({"go.mod": "module example.com/api\n\ngo 1.21\n\nrequire (\n\tgithub.com/gin-gonic/gin v1.9.1\n)\n",
+      "main.go": 'package main\n\nimport (\n\t"net/http"\n\n\t"github.com/gin-gonic/gin"\n)\n'}, "Gin", 8080),
+    ({"Cargo.toml": '[package]\nname = "api"\n\n[dependencies]\nactix-web = "4"\nserde = { version = "1" }\n',
+      "src/main.rs": "use actix_web::{web, App, HttpServer};\n"}, "Actix Web", 8080),
+    ({"composer.json": '{"require": {"php": "^8.1", "laravel/framework": "^10.0"}}', "artisan": "#!/usr/bin/env php\n",
+      "app/Http/Kernel.php": "<?php\nuse Illuminate\\Foundation\\Http\\Kernel as HttpKernel;\n"}, "Laravel", 8000),
+    ({"pom.xml": "<project><dependencies><dependency><groupId>org.springframework.boot</groupId>"
+                 "<artifactId>spring-boot-starter-web</artifactId></dependency></dependencies></project>",
+      "src/main/java/App.java": "import org.springframework.boot.SpringApplication;\n"
+                                "import org.springframework.web.bind.annotation.RestController;\n"}, "Spring Boot", 8080),
+    ({"Gemfile": "source 'https://rubygems.org'\ngem 'rails', '~> 7.1'\n", "config/routes.rb": "Rails.application\n"},
+     "Ruby on Rails", 3000),
+    ({"pyproject.toml": '[project]\nname = "svc"\ndependencies = [\n  "fastapi>=0.100",\n  "uvicorn",\n]\n',
+      "svc/app.py": "from fastapi import FastAPI\nfrom starlette.responses import Response\n"}, "FastAPI", 8000),
+])
+def test_stacks_of_each_ecosystem(make_repo, files, expected, port):
+    snapshot = RepoSnapshot(make_repo(files))
+    assert main.detect_framework(snapshot) == expected
+    assert main.detect_port(snapshot) == port
+
+
+def test_stack_manifest_readers():
+    go_mod = "module m\n\nrequire github.com/labstack/echo/v4 v4.11.0\nrequire (\n\tgolang.org/x/net v0.17.0 // indirect\n)\n"
+    assert _names(read_go_mod, go_mod) == ("github.com/labstack/echo/v4", "golang.org/x/net")
+    cargo = '[dependencies]\naxum = "0.7"\n\n[dependencies.tokio]\nversion = "1"\n\n[dev-dependencies]\nreqwest = "0.11"\n'
+    assert _names(read_toml_dependencies, cargo) == ("axum", "tokio", "reqwest")
+    poetry = '[tool.poetry.dependencies]\npython = "^3.11"\nDjango = "^4.2"\n\n[project.optional-dependencies]\n' \
+             'web = ["flask[async]>=2.0"]\n'
+    assert _names(read_toml_dependencies, poetry) == ("Django", "flask")
+    gradle = ('plugins {\n    id("org.springframework.boot") version "3.1.0"\n}\n'
+              'dependencies {\n    implementation "io.ktor:ktor-server-core:2.3.0"\n}\n')
+    assert _names(read_gradle, gradle) == ("org.springframework.boot", "ktor-server-core")
+    assert _names(read_gemfile, "gem 'sinatra'\n  gem \"puma\", require: false\n# gem 'rails'\n") == ("sinatra", "puma")
+
+
+def test_imports_are_matched_by_longest_prefix(monkeypatch):
+    assert import_frameworks("node", "@angular/core/testing") == ("Angular",)
+    assert import_frameworks("jvm", "org.springframework.boot.SpringApplication") == ("Spring Boot",)
+    assert import_frameworks("jvm", "org.springframework.context.ApplicationContext") == ("Spring",)
+    assert import_frameworks("python", "aiohttp") == ()
+    assert import_frameworks("python", "aiohttp.web") == ("aiohttp",)
+    # Chaque écosystème a ses propres noms : "rocket" n'est pas Rocket en Python
+    assert imported_frameworks("launch.py", b"import rocket\n") == frozenset()
+    source = b"import express from 'express'\nconst app = require(\"fastify\")()\n"
+    assert imported_frameworks("server.ts", source) == {"Express", "Fastify"}
+    # Le nombre de signatures ne change pas le parcours : un module, une recherche par préfixe
+    monkeypatch.setattr(frameworks, "IMPORTS", {**frameworks.IMPORTS, **{
+        ("node", f"pkg-{n}"): (f"Framework {n}",) for n in range(10_000)}})
+    assert imported_frameworks("server.ts", source + b"import x from 'pkg-42/sub'\n") == {
+        "Express", "Fastify", "Framework 42"}
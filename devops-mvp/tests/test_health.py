@@ -0,0 +1,92 @@
+import pytest
+
+import main
+import scanning
+from health import build_plan
+from snapshot import RepoSnapshot
+
+CUSTOM_RULES = """
+categories:
+  - name: ci
+    max: 10
+rules:
+  - category: ci
+    glob: ".github/workflows/*.yml"
+    points: 10
+    detail: "Workflows CI : {count}"
+    otherwise: "Aucun workflow CI"
+  - category: best_practices
+    contains: {glob: "*.py", any: [logging, sentry_sdk]}
+    points: 5
+    detail_each: "{match} utilisé"
+  - category: security
+    contains: {file: requirements.txt, any: [bandit]}
+    points: 5
+    detail: "bandit présent"
+"""
+
+
+def test_each_input_is_read_once_for_all_rules(make_repo):
+    snapshot = RepoSnapshot(make_repo({
+        "requirements.txt": "fastapi==0.104.1\npytest==7.4.0\ncryptography\n",
+        "tests/test_app.py": "def test_a():\n    pass\n",
+        ".env.example": "PORT=8000\n",
+    }))
+    main.content_facts(snapshot)
+    before = snapshot.files_read
+    health = main.calculate_health_score(snapshot)
+    # requirements.txt est consulté par trois catégories, mais lu une seule fois
+    assert snapshot.files_read == before + 1
+    assert health["details"]["security"] == {"score": 10, "max": 15,
+                                             "details": [".env.example présent", "cryptography présent"]}
+    assert health["details"]["dependencies"]["details"] == ["Versions spécifiées", "FastAPI présent", "pytest présent"]
+    assert health["details"]["tests"]["details"] == [
+        "Dossier tests/ présent", "Fichier de test trouvé: tests/test_app.py", "  - Contient 1 fonction(s) de test",
+    ]
+
+
+def test_custom_rules_from_yaml(make_repo, tmp_path, monkeypatch):
+    rules = tmp_path / "health.yml"
+    rules.write_text(CUSTOM_RULES, encoding="utf-8")
+    plan = build_plan(str(rules), facts=main.CONTENT_SELECTORS)
+    assert plan.fingerprint
+    assert plan.content_patterns == ["*.py", "requirements.txt"]
+
+    snapshot = RepoSnapshot(make_repo({
+        ".github/workflows/ci.yml": "on: push\n",
+        "app.py": "import logging\n",
+        "src/worker.py": "import sentry_sdk\nimport logging\n",
+        "requirements.txt": "flask\n",
+    }))
+    # Les chaînes des motifs sont relevées par la passe commune, en parallèle
+    # comme le reste ; l'évaluation ne relit aucun fichier
+    monkeypatch.setattr(scanning, "SCAN_PARALLEL_MIN_FILES", 1)
+    facts = scanning.scan_contents(snapshot, {**main.CONTENT_SELECTORS, "needles": plan.select_needles}, workers=2)
+    assert facts["src/worker.py"]["needles"] == ("logging", "sentry_sdk")
+    before = snapshot.files_read
+    health = plan.evaluate(snapshot, facts)
+    assert snapshot.files_read == before + 1  # requirements.txt (contains sur un fichier)
+    assert health["max_score"] == 120
+    assert health["details"]["ci"] == {"score": 10, "max": 10, "details": ["Workflows CI : 1"]}
+    assert health["details"]["best_practices"]["details"] == [
+        "requirements.txt présent", "logging utilisé", "sentry_sdk utilisé",
+    ]
+    assert "bandit présent" not in health["details"]["security"]["details"]
+    assert health["total_score"] == sum(category["score"] for category in health["details"].values())
+
+    empty = RepoSnapshot(make_repo({"README.md": "# x\n"}, root=tmp_path / "empty"))
+    assert plan.evaluate(empty, {})["details"]["ci"]["details"] == ["Aucun workflow CI"]
+
+
+@pytest.mark.parametrize("rule", [
+    "{category: unknown, exists: x, points: 1}",
+    "{category: ci, exists: x, glob: y, points: 1}",
+    "{category: ci, files_with: coverage, points: 1}",
+    "{category: ci, contains: {file: x}, points: 1}",
+    "{category: ci, exists: x, points: 1, extra: true}",
+])
+def test_invalid_rules_are_rejected(rule, tmp_path):
+    rules = tmp_path / "health.yml"
+    rules.write_text(f"categories: [{{name: ci, max: 5}}]\nrules:\n  - {rule}\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        build_plan(str(rules), facts=main.CONTENT_SELECTORS)
@@ -0,0 +1,45 @@
+import os
+
+from fastapi.testclient import TestClient
+
+import main
+from history import history_size
+from mirrors import full_mirror_store
+from workers import Repo
+
+
+def test_repository_size_reads_every_blob_of_the_history(make_remote, isolated_mirrors, monkeypatch):
+    url = make_remote({"app.py": "print(1)\n", "assets/video.mp4": b"\0" * 200_000})
+    client = TestClient(main.app)
+
+    # Miroirs partagés partiels (défaut) : miroir complet dédié, le miroir
+    # partagé n'est ni créé ni alourdi
+    full = client.get("/repository-size", params={"repo_url": url}).json()
+    assert full["status"] == "success" and not full["partial"]
+    assert full["history"] == {"blobs": 2, "blob_bytes": 200_009,
+                               "blob_disk_bytes": full["history"]["blob_disk_bytes"]}
+    assert full["largest_blobs"][0]["path"] == "assets/video.mp4"
+    assert full["lfs_candidates"] == []
+    assert not os.path.exists(isolated_mirrors.mirror_path(url))
+    assert os.path.isdir(full_mirror_store.mirror_path(url))
+
+    # Miroirs partagés complets : ils suffisent
+    monkeypatch.setattr(isolated_mirrors, "filter_spec", None)
+    shared = client.get("/repository-size", params={"repo_url": url}).json()
+    assert shared["history"] == full["history"]
+    assert os.path.isdir(isolated_mirrors.mirror_path(url))
+
+
+def test_tracked_paths_are_bounded(make_remote, isolated_mirrors, monkeypatch):
+    files = {f"data/{n}.bin": bytes([n]) * (10_000 + n) for n in range(20)}
+    url = make_remote(files)
+    monkeypatch.setattr(isolated_mirrors, "filter_spec", None)
+    with isolated_mirrors.using(url) as mirror:
+        size = history_size(Repo(mirror.git_dir), top=3, lfs_min_bytes=10_017, track_min_bytes=1, max_paths=8)
+    # Les chemins les plus lourds survivent à l'élagage
+    assert sorted(candidate["path"] for candidate in size["lfs_candidates"]) == ["data/17.bin", "data/18.bin", "data/19.bin"]
+
+
+def test_unknown_repository_is_reported(isolated_mirrors, tmp_path):
+    result = main.repository_size_job((tmp_path / "missing.git").as_uri())
+    assert result["status"] == "error"
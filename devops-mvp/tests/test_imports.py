@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import scanning
+from cache import AnalysisCache
+from imports import build_index, import_page, local_modules
+from incremental import BaselineStore
+from jobs import JobManager
+from workers import AnalysisPool
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "job_manager", JobManager())
+    monkeypatch.setattr(main, "analysis_cache", AnalysisCache(db_path=""))
+    monkeypatch.setattr(main, "analysis_pool", AnalysisPool(max_workers=2, max_queue=2, timeout=30))
+    monkeypatch.setattr(main, "baselines", BaselineStore())
+    return TestClient(main.app)
+
+
+def test_index_separates_stdlib_third_party_and_local_modules():
+    local = local_modules(["utils.py", "pkg/__init__.py", "pkg/core.py", "scripts/run.py"])
+    assert local == {"utils", "pkg", "core", "run"}
+    index = build_index([
+        ("a.py", ("os", "collections.abc", "requests", "requests.adapters", "utils", ".models", ".")),
+        ("b.py", ("numpy.linalg", "requests", "pkg.core")),
+        ("c.py", ("requests", "json")),
+    ], local, sample=2)
+
+    assert index["stdlib"] == {
+        "collections": {"count": 1, "files": ["a.py"]},
+        "json": {"count": 1, "files": ["c.py"]},
+        "os": {"count": 1, "files": ["a.py"]},
+    }
+    # Trié par nombre d'imports ; un même fichier n'est cité qu'une fois
+    assert list(index["third_party"]) == ["requests", "numpy"]
+    assert index["third_party"]["requests"] == {"count": 4, "files": ["a.py", "b.py"]}
+    assert index["local"] == {
+        ".": {"count": 1, "files": ["a.py"]},
+        "models": {"count": 1, "files": ["a.py"]},
+        "pkg": {"count": 1, "files": ["b.py"]},
+        "utils": {"count": 1, "files": ["a.py"]},
+    }
+
+
+def test_relative_imports_are_local():
+    source = b"from . import x\nfrom .pkg import y\nfrom .. import z\nimport os\n"
+    imports = scanning.EXTRACTORS["imports"]("app/api/views.py", source)
+    assert imports == (".", ".pkg", "..", "os")
+    # `from . import x` désigne le package du fichier, `..` son parent ;
+    # à la racine, le nom relatif lui-même
+    index = build_index([("app/api/views.py", imports), ("main.py", (".",))], set(), sample=2)
+    assert index["local"] == {
+        ".": {"count": 1, "files": ["main.py"]},
+        "api": {"count": 1, "files": ["app/api/views.py"]},
+        "app": {"count": 1, "files": ["app/api/views.py"]},
+        "pkg": {"count": 1, "files": ["app/api/views.py"]},
+    }
+    assert index["third_party"] == {}
+    assert import_page([("app/api/views.py", imports)], module="api")["total"] == 1
+
+
+def test_per_file_detail_is_paginated(client, make_remote):
+    url = make_remote({
+        "app.py": "import os\nimport requests\nfrom helpers import x\n",
+        "helpers.py": "import requests\nx = 1\n",
+        "src/job.py": "import yaml\n",
+        "README.md": "# app\n",
+    })
+    # Aucune analyse préalable : le HEAD est analysé à la première demande
+    first = client.get("/imports", params={"repo_url": url, "module": "requests", "limit": 1}).json()
+    assert first["total"] == 2
+    assert first["items"] == [{"path": "app.py", "imports": ["os", "requests", "helpers"]}]
+    second = client.get("/imports", params={"repo_url": url, "module": "requests", "offset": 1, "limit": 1}).json()
+    assert second["items"] == [{"path": "helpers.py", "imports": ["requests"]}]
+    assert second["commit"] == first["commit"]
+    assert client.get("/imports", params={"repo_url": url}).json()["total"] == 3
+
+    analysis = client.post("/analyze-repo", data={"repo_url": url}).json()["analysis"]
+    assert analysis["imports"]["local"] == {"helpers": {"count": 1, "files": ["app.py"]}}
+    assert not any("importé" in dep for dep in analysis["dependencies"])
+
+    assert client.get("/imports", params={"repo_url": url, "limit": 0}).status_code == 400
+
+
+def test_detail_comes_from_the_cached_analysis(client, make_remote, monkeypatch):
+    url = make_remote({"app.py": "import requests\n", "lib.py": "import os\n"})
+    analysis = client.post("/analyze-repo", data={"repo_url": url}).json()
+    assert main.job_manager.get_stats()["created"] == 1
+
+    # Sans état incrémental (mode désactivé ou état évincé) : servi par le cache
+    monkeypatch.setattr(main, "baselines", BaselineStore())
+    page = client.get("/imports", params={"repo_url": url}).json()
+    assert page["commit"] == analysis["commit"] and page["total"] == 2
+    assert main.job_manager.get_stats()["created"] == 2  # job servi par le cache, sans analyse
+
+    # Détail évincé du cache : une seule nouvelle analyse, par start_analysis
+    main.analysis_cache._entries.pop(main.imports_key(url, analysis["commit"]))
+    analyses = []
+    original = main.analyze_repository_job
+    monkeypatch.setattr(main, "analyze_repository_job", lambda *a, **k: analyses.append(a) or original(*a, **k))
+    assert client.get("/imports", params={"repo_url": url, "module": "os"}).json()["items"] == [
+        {"path": "lib.py", "imports": ["os"]}]
+    assert len(analyses) == 1
@@ -0,0 +1,119 @@
+import functools
+import random
+import subprocess
+
+import pytest
+
+import main
+from incremental import BaselineStore
+
+# Fichiers parmi lesquels chaque commit ajoute, modifie ou supprime
+CANDIDATES = [
+    "main.py", "app.py", "src/core/service.py", "src/core/models.py", "src/util.py",
+    "tests/test_service.py", "tests/unit/test_models.py", "venv/lib/vendored.py",
+    "requirements.txt", "package.json", "Dockerfile", "docker-compose.yml", ".env", ".env.example",
+    "docs/index.md", "README.md", "nginx.conf", "redis.conf", "assets/logo.py", "static/app.js",
+]
+
+
+def _content(rng, path):
+    if path == "requirements.txt":
+        return "\n".join(rng.sample(["flask==2.0", "fastapi>=0.100", "pytest", "pyjwt", "cryptography", "django"], 3))
+    if path == "package.json":
+        return '{"dependencies": {"express": "^4.%d.0"}}' % rng.randrange(20)
+    if path == "Dockerfile":
+        return f"FROM python:3.11\nEXPOSE {rng.choice([80, 8000, 8080])}\n" + rng.choice(["", "# cpu\n"])
+    if path == "docker-compose.yml":
+        return f"services:\n  web:\n    ports:\n      - {rng.randrange(3000, 9000)}:80\n"
+    if path == ".env":
+        return f"PORT={rng.randrange(3000, 9000)}\n"
+    if path == "assets/logo.py":
+        return bytes(rng.randrange(256) for _ in range(64)) + b"\0"
+    if path.endswith(".py"):
+        lines = [rng.choice(['"""Module."""', "# module"])]
+        lines += [f"import {name}" for name in rng.sample(["requests", "yaml", "os", "numpy", "flask", "json"], 2)]
+        lines.append(rng.choice(["app = Flask(__name__)", "app = FastAPI()", "x = 1", "app.run(port=5005)"]))
+        lines += [f"def test_{n}():\n    pass" for n in range(rng.randrange(3))]
+        return "\n".join(lines) + "\n"
+    return f"# {path} {rng.random()}\n"
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=cwd, check=True, capture_output=True)
+
+
+def _commit_random_change(rng, work):
+    for _ in range(rng.randrange(1, 4)):
+        target = work / rng.choice(CANDIDATES)
+        if target.exists() and rng.random() < 0.3:
+            target.unlink()
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        content = _content(rng, target.relative_to(work).as_posix())
+        if isinstance(content, bytes):
+            target.write_bytes(content)
+        else:
+            target.write_text(content, encoding="utf-8")
+    _git(work, "add", "-A")
+    _git(work, "commit", "-q", "--allow-empty", "-m", "change")
+    _git(work, "push", "-q", "origin", "HEAD:main")
+
+
+def _full_analysis(url):
+    # Analyse complète qui ne remplace pas l'état de référence des analyses incrémentales
+    saved, main.baselines = main.baselines, BaselineStore(max_repos=0)
+    try:
+        return main.analyze_repository_job(url, force=True)
+    finally:
+        main.baselines = saved
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_incremental_matches_full_analysis_on_random_histories(seed, make_remote, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "baselines", BaselineStore())
+    rng = random.Random(seed)
+    url = make_remote({path: _content(rng, path) for path in rng.sample(CANDIDATES, 8)})
+    work = tmp_path / "work"
+    _git(tmp_path, "clone", "-q", url, str(work))
+
+    first = main.analyze_repository_job(url)
+    assert "incremental_from" not in first
+    for _ in range(6):
+        previous = first["commit"]
+        _commit_random_change(rng, work)
+        first = main.analyze_repository_job(url)
+        assert first["status"] == "success"
+        assert first["incremental_from"] == previous
+        assert first["analysis"] == _full_analysis(url)["analysis"]
+    assert main.baselines.get_stats()["incremental"] == 6
+
+
+def test_unchanged_repository_checks_are_reused(make_remote, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "baselines", BaselineStore())
+    url = make_remote({"requirements.txt": "pyjwt\n", "src/app.py": "import requests\n"})
+    work = tmp_path / "work"
+    _git(tmp_path, "clone", "-q", url, str(work))
+    main.analyze_repository_job(url)
+
+    calls = []
+    original = main.health_inputs
+
+    @functools.wraps(original)
+    def health_inputs(snapshot):
+        calls.append(1)
+        return original(snapshot)
+    monkeypatch.setattr(main, "health_inputs", health_inputs)
+    (work / "src" / "app.py").write_text("import yaml\n", encoding="utf-8")
+    _git(work, "commit", "-qam", "code")
+    _git(work, "push", "-q", "origin", "HEAD:main")
+    result = main.analyze_repository_job(url)
+    assert calls == []
+    assert result["analysis"]["imports"]["third_party"]["yaml"] == {"count": 1, "files": ["src/app.py"]}
+
+    (work / "requirements.txt").write_text("cryptography\n", encoding="utf-8")
+    _git(work, "commit", "-qam", "deps")
+    _git(work, "push", "-q", "origin", "HEAD:main")
+    result = main.analyze_repository_job(url)
+    assert calls == [1]
+    assert result["analysis"]["health_score"]["details"]["security"]["details"] == ["cryptography présent"]
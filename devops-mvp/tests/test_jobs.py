@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from cache import AnalysisCache
+from jobs import Job, JobManager
+from workers import AnalysisPool
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "job_manager", JobManager())
+    monkeypatch.setattr(main, "analysis_cache", AnalysisCache(db_path=""))
+    monkeypatch.setattr(main, "analysis_pool", AnalysisPool(max_workers=2, max_queue=2, timeout=30))
+    return TestClient(main.app)
+
+
+def _wait_finished(client, job_id):
+    for _ in range(500):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job non terminé")
+
+
+def test_job_lifecycle_and_events(client, make_remote):
+    """Le job se termine avec le résultat ; le flux SSE publie chaque étape dans l'ordre."""
+    url = make_remote({"main.py": "from flask import Flask\n", "requirements.txt": "flask==2.0\n"})
+    created = client.post("/jobs/analyze", json={"repo_url": url})
+    assert created.status_code == 202
+    job_id = created.json()["job_id"]
+
+    job = _wait_finished(client, job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"]["analysis"]["framework"] == "Flask"
+    assert job["commit"] == job["result"]["commit"]
+
+    stream = client.get(f"/jobs/{job_id}/events")
+    assert stream.headers["content-type"].startswith("text/event-stream")
+    stages = [line.split('"stage": "')[1].split('"')[0]
+              for line in stream.text.splitlines() if '"stage": ' in line]
+    assert stages == ["clone", "language", "framework", "dependencies", "port", "pipeline", "complexity", "health", "costs"]
+    assert stream.text.rstrip().splitlines()[-2] == "event: done"
+
+    # Le même commit est ensuite servi par le cache via un job déjà terminé
+    cached = client.post("/jobs/analyze", json={"repo_url": url}).json()
+    assert cached["status"] == "succeeded"
+    assert client.get(f"/jobs/{cached['job_id']}").json()["result"]["cached"] is True
+
+
+def test_concurrent_requests_share_one_job(client, make_remote, monkeypatch):
+    """Deux demandes pour le même repository et le même commit partagent le job en cours."""
+    url = make_remote({"main.py": "print('ok')\n"})
+    release = threading.Event()
+    calls = []
+
+    def blocked(repo_url, **kwargs):
+        calls.append(repo_url)
+        release.wait(5)
+        return {"status": "success", "analysis": {}, "commit": "abc", "cached": False}
+
+    monkeypatch.setattr(main, "analyze_repository_job", blocked)
+    first = client.post("/jobs/analyze", json={"repo_url": url}).json()
+    second = client.post("/jobs/analyze", json={"repo_url": url + "/"}).json()
+    assert first["job_id"] == second["job_id"]
+
+    form = []
+    waiter = threading.Thread(target=lambda: form.append(client.post("/analyze-repo", data={"repo_url": url})))
+    waiter.start()
+    while main.job_manager.get_stats()["deduplicated"] < 2:
+        time.sleep(0.01)
+    release.set()
+    waiter.join(5)
+    assert form[0].json()["status"] == "success"
+    assert _wait_finished(client, first["job_id"])["status"] == "succeeded"
+    assert len(calls) == 1
+
+
+def test_unknown_job_returns_404(client):
+    assert client.get("/jobs/inconnu").status_code == 404
+    assert client.get("/jobs/inconnu/events").status_code == 404
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_job():
+    job = Job("key", "https://example.com/repo.git")
+
+    async def scenario():
+        first = asyncio.ensure_future(job.wait())
+        second = asyncio.ensure_future(job.wait())
+        await asyncio.sleep(0)
+        # Un lot interrompu annule son attente ; l'autre abonné reçoit le résultat
+        first.cancel()
+        await asyncio.sleep(0)
+        assert not job.done.cancelled()
+        job.finish({"status": "success"})
+        return await second
+
+    assert asyncio.run(scenario()) == {"status": "success"}
+    assert job.status == "succeeded"
@@ -0,0 +1,93 @@
+import main
+from fetching import checkout_for_analysis
+from languages import attribute_pattern, excluded, parse_gitattributes
+from snapshot import RepoSnapshot
+
+JAVA = "public class App {\n" + "    void run() {}\n" * 200 + "}\n"
+
+
+def _shares(breakdown):
+    return {language["name"]: language["percentage"] for language in breakdown["languages"]}
+
+
+def test_primary_language_is_weighted_by_bytes(make_repo):
+    snapshot = RepoSnapshot(make_repo({
+        "src/main/java/App.java": JAVA,
+        "src/main/java/Util.java": JAVA,
+        "scripts/release.py": "print('release')\n",
+        "node_modules/lib/index.js": "x" * 100_000,
+        "web/app.min.js": "y" * 100_000,
+    }))
+    assert main.detect_language(snapshot) == "Java"
+    languages = main.language_breakdown(snapshot)
+    assert languages["basis"] == "bytes"
+    java = languages["languages"][0]
+    assert java["files"] == 2 and java["bytes"] == 2 * len(JAVA)
+    # Code tiers et fichiers minifiés exclus par défaut
+    assert set(_shares(languages)) == {"Java", "Python"}
+    assert sum(_shares(languages).values()) == 100
+
+
+def test_gitattributes_overrides_defaults(make_repo):
+    snapshot = RepoSnapshot(make_repo({
+        ".gitattributes": "*.java linguist-generated\n",
+        "gen/Model.java": JAVA,
+        "vendor/tool.rb": "puts 'x'\n" * 50,
+        "app/.gitattributes": "/legacy/** linguist-vendored\n",
+        "app/legacy/old.py": "print(1)\n" * 100,
+        "app/main.go": "package main\n",
+        "lib/.gitattributes": "vendor/** -linguist-vendored\n",
+        "lib/vendor/tool.rb": "puts 'y'\n",
+    }))
+    assert _shares(main.language_breakdown(snapshot)).keys() == {"Go", "Ruby"}
+    assert main.detect_language(snapshot) == "Go"
+
+
+def test_gitattributes_patterns():
+    assert attribute_pattern("*.js", "web").match("web/a/b.js")
+    assert not attribute_pattern("*.js", "web").match("other/b.js")
+    assert attribute_pattern("docs/**", "").match("docs/a/b.md")
+    assert not attribute_pattern("docs/**", "").match("src/docs/b.md")
+    assert attribute_pattern("**/gen/*.py", "").match("a/b/gen/x.py")
+    assert attribute_pattern("vendor/", "") is None
+    rules = parse_gitattributes("# commentaire\nthird_party/** -linguist-vendored\n*.js !linguist-generated\n")
+    assert not excluded("third_party/lib.c", rules)
+    assert excluded("node_modules/x.js", rules)
+    assert excluded("bundle.min.js", rules)
+
+
+def test_only_ambiguous_files_are_read(make_repo):
+    snapshot = RepoSnapshot(make_repo({
+        "Sources/View.h": "#import <UIKit/UIKit.h>\n@interface View : UIView\n@end\n",
+        "Sources/View.m": "#import \"View.h\"\n@implementation View\n@end\n",
+        "native/util.h": "#include <stddef.h>\nsize_t f(void);\n",
+        "analysis/fit.m": "function y = fit(x)\n  y = x;\nend\n",
+        "core/engine.cpp": "int main() { return 0; }\n" * 10,
+        "lib/big.c": "int x;\n" * 1000,
+    }))
+    languages = main.language_breakdown(snapshot)
+    files = {language["name"]: language["files"] for language in languages["languages"]}
+    assert files == {"C/C++": 3, "Objective-C": 2, "MATLAB": 1}
+    assert snapshot.files_read == 4
+
+
+def test_sizes_come_from_the_tree_without_blobs(tmp_path, make_remote, isolated_mirrors, monkeypatch):
+    url = make_remote({"App.cs": JAVA, "tool.py": "print(1)\n" * 10})
+    with checkout_for_analysis(url, str(tmp_path / "partial")) as snapshot:
+        # Clone partiel (blob:limit) : App.cs n'est pas extrait (aucun détecteur
+        # ne lit le C#), sa taille est lue dans la base d'objets du miroir
+        assert not snapshot.readable("App.cs")
+        assert snapshot.files["App.cs"].size == len(JAVA)
+        languages = main.language_breakdown(snapshot)
+        assert languages["basis"] == "bytes"
+        assert _shares(languages)["C#"] > 90
+
+    # Dernier recours : un fichier source plus gros que la limite du filtre
+    # reste sur le serveur, de taille inconnue
+    monkeypatch.setattr(isolated_mirrors, "root", str(tmp_path / "limited_mirrors"))
+    monkeypatch.setattr(isolated_mirrors, "filter_spec", "blob:limit=1000")
+    with checkout_for_analysis(url, str(tmp_path / "limited")) as snapshot:
+        assert snapshot.files["App.cs"].size is None
+        languages = main.language_breakdown(snapshot)
+        assert languages["basis"] == "files"
+        assert languages["languages"][0]["bytes"] is None
@@ -0,0 +1,199 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+
+import main
+import manifests
+from manifests import (
+    ParseCache, count_packages, parse_file, read_go_sum, read_package_json, read_package_lock,
+    read_pipfile_lock, read_pom, read_requirements, read_toml_packages, read_yarn_lock,
+)
+from snapshot import RepoSnapshot
+
+
+def _read(reader, content):
+    return list(reader(io.BytesIO(content.encode("utf-8"))))
+
+
+def test_requirements_with_extras_markers_and_options():
+    content = (
+        "# outils\n"
+        "--index-url https://pypi.example.com/simple\n"
+        "-r base.txt\n"
+        "fastapi==0.104.1  # serveur\n"
+        "uvicorn[standard] >= 0.24 ; python_version >= \"3.8\"\n"
+        "requests \\\n"
+        "    ~=2.31\n"
+        "cryptography==41.0.0 --hash=sha256:abc\n"
+        "mypkg @ https://example.com/mypkg.tar.gz\n"
+        "https://example.com/archive.zip\n"
+        "pytest\n"
+    )
+    assert _read(read_requirements, content) == [
+        "fastapi==0.104.1", "uvicorn[standard]>=0.24", "requests~=2.31", "cryptography==41.0.0", "mypkg", "pytest",
+    ]
+
+
+def test_package_json_and_pom():
+    package = {"devDependencies": {"jest": "^29.0.0"}, "name": "app", "dependencies": {"express": "^4.18.2"}}
+    assert _read(read_package_json, json.dumps(package)) == ["express@^4.18.2", "jest@^29.0.0 (dev)"]
+
+    pom = """<?xml version="1.0"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <dependencies>
+    <dependency><groupId>org.springframework</groupId><artifactId>spring-core</artifactId><version>6.0.0</version></dependency>
+    <dependency>
+      <artifactId>managed</artifactId>
+      <exclusions><exclusion><artifactId>commons-logging</artifactId></exclusion></exclusions>
+    </dependency>
+  </dependencies>
+</project>"""
+    assert _read(read_pom, pom) == ["spring-core@6.0.0", "managed"]
+
+
+def test_lockfile_readers():
+    lock_v1 = {"lockfileVersion": 1, "dependencies": {
+        "a": {"version": "1.0.0", "dependencies": {"b": {"version": "2.0.0", "dev": True}}},
+    }}
+    assert _read(read_package_lock, json.dumps(lock_v1)) == [("a", "1.0.0", False), ("b", "2.0.0", True)]
+    # Versions 2 et 3 : "packages" fait foi, l'arbre "dependencies" qui suit est ignoré
+    lock_v3 = {"lockfileVersion": 3, "packages": {
+        "": {"name": "app"},
+        "node_modules/@scope/a": {"version": "1.0.0"},
+        "node_modules/@scope/a/node_modules/b": {"version": "2.0.0", "dev": True},
+        "packages/local": {"link": True},
+    }, "dependencies": lock_v1["dependencies"]}
+    assert _read(read_package_lock, json.dumps(lock_v3)) == [("@scope/a", "1.0.0", False), ("b", "2.0.0", True)]
+
+    pipfile = {"_meta": {"hash": {"sha256": "x"}}, "default": {"requests": {"version": "==2.31.0"}},
+               "develop": {"pytest": {"version": "==7.4.0"}, "local": {"path": "."}}}
+    assert _read(read_pipfile_lock, json.dumps(pipfile)) == [("requests", "2.31.0", False), ("pytest", "7.4.0", True)]
+
+    yarn = (
+        "# yarn lockfile v1\n\n"
+        '"@babel/core@^7.0.0", "@babel/core@^7.1.0":\n  version "7.2.0"\n  dependencies:\n    version "^1.0.0"\n\n'
+        "lodash@npm:^4.17.21:\n  version: 4.17.21\n\n"
+        "app@workspace:.:\n  version: 0.0.0-use.local\n"
+    )
+    assert _read(read_yarn_lock, yarn) == [("@babel/core", "7.2.0", False), ("lodash", "4.17.21", False)]
+
+    toml = (
+        '[[package]]\nname = "requests"\nversion = "2.31.0"\ncategory = "main"\n\n'
+        '[package.dependencies]\nname = ">=1"\n\n'
+        '[[package]]\nname = "pytest"\nversion = "7.4.0"\ncategory = "dev"\n\n'
+        '[metadata]\nlock-version = "2.0"\n'
+    )
+    assert _read(read_toml_packages, toml) == [("requests", "2.31.0", False), ("pytest", "7.4.0", True)]
+
+    go_sum = (
+        "golang.org/x/text v0.3.0 h1:abc=\n"
+        "golang.org/x/text v0.3.0/go.mod h1:def=\n"
+        "golang.org/x/net v0.1.0/go.mod h1:ghi=\n"
+    )
+    assert _read(read_go_sum, go_sum) == [("golang.org/x/text", "v0.3.0", False)]
+
+
+def _write_package_lock(path, packages):
+    entries = {"": {"name": "app"}}
+    for i in range(packages):
+        entries[f"node_modules/pkg{i}"] = {
+            "version": f"1.{i}.0", "resolved": f"https://registry.npmjs.org/pkg{i}/-/pkg{i}-1.{i}.0.tgz",
+            "integrity": "sha512-" + "A" * 86, "dev": i % 2 == 0, "dependencies": {"x": "^1.0.0"},
+        }
+    path.write_text(json.dumps({"lockfileVersion": 3, "packages": entries}, indent=2), encoding="utf-8")
+
+
+def test_package_lock_is_read_in_constant_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifests, "CHUNK_BYTES", 64 * 1024)
+    peaks = {}
+    for packages in (1000, 20000):
+        path = tmp_path / f"lock{packages}.json"
+        _write_package_lock(path, packages)
+        with open(path, "rb") as f:
+            tracemalloc.start()
+            try:
+                assert count_packages(read_package_lock(f)) == {"packages": packages, "dev_packages": packages // 2}
+                peaks[packages] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    assert (tmp_path / "lock20000.json").stat().st_size > 20 * 64 * 1024
+    assert peaks[20000] < 1.5 * peaks[1000]
+
+
+def test_chunk_boundaries_do_not_change_results(tmp_path, monkeypatch):
+    path = tmp_path / "package-lock.json"
+    _write_package_lock(path, 50)
+    with open(path, "rb") as f:
+        expected = list(read_package_lock(f))
+    monkeypatch.setattr(manifests, "CHUNK_BYTES", 7)
+    with open(path, "rb") as f:
+        assert list(read_package_lock(f)) == expected
+
+
+def test_large_items_are_decoded_once(tmp_path, monkeypatch):
+    # Un élément plus grand que le bloc n'est décodé qu'une fois complet,
+    # et non à chaque bloc lu ; chaînes, échappements et crochets à cheval
+    # sur deux blocs ne trompent pas le repérage de sa fin
+    item = {"version": "1.0.0", "integrity": "x" * 50_000, "note": 'a \\"} ]\\\\', "requires": {"b": "*"}}
+    path = tmp_path / "package-lock.json"
+    path.write_text(json.dumps({"packages": {"": {}, "node_modules/a": item, "node_modules/b": {"version": "2.0.0"}}}),
+                    encoding="utf-8")
+    decoded = []
+    decoder = json.JSONDecoder()
+    monkeypatch.setattr(manifests, "CHUNK_BYTES", 5)
+    monkeypatch.setattr(manifests, "_json_decoder", type("Counting", (), {
+        "raw_decode": staticmethod(lambda text, pos: decoded.append(pos) or decoder.raw_decode(text, pos))}))
+    with open(path, "rb") as f:
+        packages = list(read_package_lock(f))
+    assert [name for name, *_ in packages] == ["a", "b"]
+    assert len(decoded) == 7  # "packages", puis une clé et une valeur par entrée
+
+
+def test_results_are_memoized_by_content_hash(make_repo, tmp_path, monkeypatch):
+    monkeypatch.setattr(manifests, "parse_cache", ParseCache())
+    first = make_repo({"Cargo.lock": '[[package]]\nname = "serde"\nversion = "1.0.0"\n'})
+    second = make_repo({"Cargo.lock": '[[package]]\nname = "serde"\nversion = "1.0.0"\n'}, root=tmp_path / "other")
+    for root in (first, second):
+        summary = parse_file(RepoSnapshot(root), "Cargo.lock", read_toml_packages, reduce=count_packages)
+        assert summary == {"packages": 1, "dev_packages": 0}
+    assert manifests.parse_cache.stats == {"hits": 1, "misses": 1}
+    assert parse_file(RepoSnapshot(first), "poetry.lock", read_toml_packages) is None
+
+
+def test_blob_ids_key_the_memo_without_hashing(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifests, "parse_cache", ParseCache())
+    path = tmp_path / "package-lock.json"
+    _write_package_lock(path, 50)
+    size = path.stat().st_size
+
+    def from_tree():
+        return RepoSnapshot.from_tree(str(tmp_path), [("package-lock.json", size)], blob_ids={"package-lock.json": "b1"})
+    # SHA du blob connu : une seule lecture pour l'analyser, aucune ensuite
+    first = from_tree()
+    result = parse_file(first, "package-lock.json", read_package_lock, reduce=count_packages)
+    assert first.bytes_read == size
+    second = from_tree()
+    assert parse_file(second, "package-lock.json", read_package_lock, reduce=count_packages) == result
+    assert second.bytes_read == 0
+    assert manifests.parse_cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_analysis_reports_lockfiles_and_survives_invalid_ones(make_repo):
+    path = make_repo({
+        "package.json": '{"dependencies": {"express": "^4.18.2"}}',
+        "package-lock.json": json.dumps({"lockfileVersion": 3, "packages": {
+            "": {}, "node_modules/express": {"version": "4.18.2"}}}),
+        "Pipfile.lock": '{"default": {"requests": ',
+        "requirements.txt": "flask[async]==2.0 ; python_version > '3.7'\n",
+    })
+    analysis = main.analyze_snapshot(RepoSnapshot(path))
+    assert analysis["lockfiles"] == [{"path": "package-lock.json", "ecosystem": "npm", "packages": 1, "dev_packages": 0}]
+    assert analysis["dependencies"][:2] == ["flask[async]==2.0", "express@^4.18.2"]
+
+
+@pytest.mark.parametrize("content", ["", "[1, 2", '{"packages": {"a": }}', "\xff"])
+def test_invalid_json_raises_value_error(content):
+    with pytest.raises(ValueError):
+        _read(read_package_lock, content)
@@ -0,0 +1,74 @@
+import os
+import subprocess
+
+from fetching import checkout_for_analysis, local_blob_sizes
+from mirrors import MirrorStore
+
+
+def _push_commit(remote_url, tmp_path, files):
+    work = tmp_path / "pusher"
+    subprocess.run(["git", "clone", "-q", remote_url, str(work)], check=True)
+    for rel, content in files.items():
+        (work / rel).write_text(content)
+    for args in (["add", "-A"], ["commit", "-q", "-m", "update"], ["push", "-q", "origin", "HEAD"]):
+        subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+            cwd=work, check=True,
+        )
+
+
+def test_mirror_is_reused_and_fetched_incrementally(tmp_path, make_remote, isolated_mirrors):
+    """Un seul miroir par URL ; un nouveau commit distant est visible à la requête suivante."""
+    url = make_remote({"main.py": "print('v1')\n"})
+    with checkout_for_analysis(url, str(tmp_path / "w1"), mode="mirror") as snapshot:
+        first_commit = snapshot.commit
+        assert snapshot.read_text("main.py") == "print('v1')\n"
+    assert not os.path.exists(tmp_path / "w1")
+
+    _push_commit(url, tmp_path, {"main.py": "print('v2')\n"})
+    with checkout_for_analysis(url, str(tmp_path / "w2"), mode="mirror") as snapshot:
+        assert snapshot.commit != first_commit
+        assert snapshot.read_text("main.py") == "print('v2')\n"
+    assert len([n for n in os.listdir(isolated_mirrors.root) if n.endswith(".git")]) == 1
+
+def test_lru_eviction_skips_mirrors_in_use(tmp_path, make_remote):
+    """Au-delà du budget, le miroir le plus ancien est évincé, sauf s'il est utilisé."""
+    store = MirrorStore(root=str(tmp_path / "pool"), max_bytes=1)
+    url_a = make_remote({"a.py": "a = 1\n"}, name="a")
+    url_b = make_remote({"b.py": "b = 1\n"}, name="b")
+
+    with store.worktree(url_a, str(tmp_path / "wa")):
+        store.ensure(url_b)
+        # a est en cours d'utilisation : il survit malgré le budget dépassé
+        assert os.path.isdir(store.mirror_path(url_a))
+    store.ensure(url_b)
+    assert not os.path.isdir(store.mirror_path(url_a))
+    assert os.path.isdir(store.mirror_path(url_b))
+
+def test_mirror_created_with_another_filter_is_refetched(tmp_path, make_remote):
+    """Un miroir blob:none existant reçoit les blobs sous la limite du nouveau filtre."""
+    url = make_remote({"App.cs": "class App {}\n"})
+    MirrorStore(root=str(tmp_path / "pool"), filter_spec="blob:none").ensure(url)
+    mirror = MirrorStore(root=str(tmp_path / "pool"), filter_spec="blob:limit=1000").ensure(url)
+    assert mirror.git.config("--get", "remote.origin.partialclonefilter") == "blob:limit=1000"
+    assert local_blob_sizes(mirror) == {mirror.git.rev_parse("HEAD:App.cs"): 13}
+
+
+def test_setup_ci_pushes_workflow_from_mirror(tmp_path, make_remote, monkeypatch):
+    """Le workflow est commité dans le miroir (sans checkout) puis poussé sur la branche par défaut."""
+    from fastapi.testclient import TestClient
+    import main
+
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "ci-bot")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "ci-bot@example.com")
+    url = make_remote({"main.py": "print('hi')\n"})
+
+    response = TestClient(main.app).post("/setup-ci", json={"repo_url": url})
+    assert response.status_code == 200, response.text
+    bare = url[len("file://"):]
+    tree = subprocess.run(
+        ["git", "ls-tree", "-r", "--name-only", "main"], cwd=bare, check=True, capture_output=True, text=True
+    ).stdout.split()
+    assert ".github/workflows/ci.yml" in tree
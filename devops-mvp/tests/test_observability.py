@@ -0,0 +1,59 @@
+import io
+import json
+import logging
+
+from fastapi.testclient import TestClient
+
+import logs
+import main
+from metrics import Histogram, render_prometheus
+
+
+def test_histogram_prometheus_format():
+    histogram = Histogram("test_latency_seconds", "Latence de test", ["stage"], buckets=(0.1, 1))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5, stage="a")
+    text = render_prometheus()
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="a"} 3' in text
+
+
+def test_metrics_endpoint_after_analysis(make_remote):
+    url = make_remote({"main.py": "from fastapi import FastAPI\napp = FastAPI()\n"})
+    main.analyze_repository_job(url, force=True)
+    response = TestClient(main.app).get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    for sample in (
+        "devops_clone_duration_seconds_count",
+        "devops_walk_duration_seconds_count",
+        'devops_stage_duration_seconds_count{stage="framework"}',
+        'devops_stage_duration_seconds_count{stage="costs"}',
+        "devops_bytes_read_sum",
+        "devops_files_scanned_count",
+        "devops_cleanup_duration_seconds_count",
+        'devops_analyses_total{status="success"}',
+    ):
+        assert sample in response.text
+
+
+def test_json_logs_and_debug_sampling():
+    stream = io.StringIO()
+    logs.configure(level="DEBUG", fmt="json", debug_sample_rate=0, stream=stream)
+    try:
+        logger = logs.get_logger("test")
+        logger.debug("jamais émis %s", "x")
+        logger.info("Analyse de %s", "repo", extra={"repo_url": "https://example.com/r"})
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        record = json.loads(lines[0])
+        assert record["level"] == "info"
+        assert record["logger"] == "devops.test"
+        assert record["message"] == "Analyse de repo"
+        assert record["repo_url"] == "https://example.com/r"
+    finally:
+        logs.configure()
+        logging.getLogger(logs.ROOT_LOGGER).setLevel(logs.LOG_LEVEL)
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+import yaml
+from fastapi.testclient import TestClient
+
+import main
+from pipelines import render
+from snapshot import RepoSnapshot
+
+# Workflows attendus, un fichier par pile ; UPDATE_GOLDEN=1 les régénère
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "pipelines")
+
+PACKAGE_JSON = '{"name": "app", "scripts": {"test": "jest"}}'
+
+# {pile: (fichiers du repository, langage principal)}
+STACKS = {
+    "python-pip": ({"requirements.txt": "fastapi\n", "main.py": "import fastapi\n"}, "Python"),
+    "python-poetry": ({"pyproject.toml": "[tool.poetry]\n", "poetry.lock": "", "app/main.py": ""}, "Python"),
+    "python-pipenv": ({"Pipfile": "[packages]\n", "Pipfile.lock": "{}", "app.py": ""}, "Python"),
+    "node-npm": ({"package.json": PACKAGE_JSON, "package-lock.json": "{}", "index.js": ""}, "JavaScript/TypeScript"),
+    "node-yarn": ({"package.json": PACKAGE_JSON, "yarn.lock": "", "index.js": ""}, "JavaScript/TypeScript"),
+    "node-pnpm": ({"package.json": PACKAGE_JSON, "pnpm-lock.yaml": "", "index.ts": ""}, "JavaScript/TypeScript"),
+    "java-maven": ({"pom.xml": "<project/>", "src/main/java/App.java": ""}, "Java"),
+    "java-gradle": ({"build.gradle.kts": "", "gradlew": "#!/bin/sh\n", "src/main/kotlin/App.kt": ""}, "Kotlin"),
+    "go": ({"go.mod": "module app\n\ngo 1.22\n", "go.sum": "", "main.go": "package main\n"}, "Go"),
+    "rust": ({"Cargo.toml": "[package]\n", "Cargo.lock": "", "src/main.rs": ""}, "Rust"),
+    "docker": ({"requirements.txt": "flask\n", "app.py": "", "Dockerfile": "FROM python:3.11-slim\n"}, "Python"),
+}
+
+
+@pytest.mark.parametrize("stack", sorted(STACKS))
+def test_pipeline_matches_golden_file(stack, make_repo):
+    files, language = STACKS[stack]
+    snapshot = RepoSnapshot(make_repo(files))
+    workflow = render(main.generate_pipeline_config(snapshot, language=language))
+
+    golden = os.path.join(GOLDEN_DIR, f"{stack}.yml")
+    if os.getenv("UPDATE_GOLDEN"):
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(golden, "w", encoding="utf-8") as f:
+            f.write(workflow)
+    with open(golden, encoding="utf-8") as f:
+        assert workflow == f.read()
+    # Sans le langage de l'analyse (setup-ci), la racine suffit à retrouver la pile
+    assert main.generate_github_action(list(files)) == workflow
+    assert yaml.safe_load(workflow)["concurrency"]["cancel-in-progress"] is True
+
+
+def test_lockfile_free_projects_are_not_cached(make_repo):
+    snapshot = RepoSnapshot(make_repo({"package.json": PACKAGE_JSON, "index.js": ""}))
+    steps = main.generate_pipeline_config(snapshot, language="JavaScript/TypeScript")["jobs"]["build"]["steps"]
+    # setup-node échoue avec `cache` sans lockfile : ni cache ni `npm ci`
+    assert "cache" not in steps[1]["with"]
+    assert steps[2]["run"] == "npm install"
+
+
+def test_setup_ci_rejects_unknown_stacks(make_remote):
+    url = make_remote({"README.md": "# Docs\n"})
+    response = TestClient(main.app).post("/setup-ci", json={"repo_url": url})
+    assert response.status_code == 400
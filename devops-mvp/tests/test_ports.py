@@ -0,0 +1,87 @@
+import pytest
+
+from fetching import clone_for_analysis
+from main import calculate_health_score, detect_dependencies, detect_framework, detect_imports, detect_port, detect_ports
+from ports import parse_code, parse_dockerfile
+from snapshot import RepoSnapshot
+
+
+def test_deployment_config_outranks_loose_code_matches(make_repo):
+    """Compose et Dockerfile priment sur une affectation quelconque dans le code."""
+    snapshot = RepoSnapshot(make_repo({
+        "main.py": "retries = 3\nport = 1\n",
+        "Dockerfile": "FROM python:3.11\nEXPOSE 8000/tcp\n",
+        "docker-compose.yml": "services:\n  web:\n    ports:\n      - 8080:80\n",
+        ".env": "DB_PORT=5432\nPORT=5000\n",
+    }))
+    assert detect_port(snapshot) == 80
+    found = [(c.port, c.source, c.kind) for c in detect_ports(snapshot)]
+    assert found == [
+        (80, "docker-compose.yml", "compose_ports"),
+        (8000, "Dockerfile", "dockerfile_expose"),
+        (5000, ".env", "env"),
+        (1, "main.py", "code_assignment"),
+    ]
+
+
+def test_only_candidate_files_are_parsed(make_repo):
+    snapshot = RepoSnapshot(make_repo({
+        "app.py": "import uvicorn\nuvicorn.run(app, host='0.0.0.0', port=9000)\n",
+        "src/lib/helpers.py": "PORT = 1234\n",
+        "node_modules/x/server.py": "app.run(port=1)\n",
+    }))
+    assert [(c.port, c.line) for c in detect_ports(snapshot)] == [(9000, 2)]
+    # Chaque fichier Python est lu une fois, pour tous les détecteurs de contenu
+    assert snapshot.files_read == 3
+    detect_framework(snapshot)
+    detect_dependencies(snapshot)
+    detect_imports(snapshot)
+    calculate_health_score(snapshot)
+    assert snapshot.files_read == 3
+
+
+def test_framework_default_without_candidates(make_repo):
+    snapshot = RepoSnapshot(make_repo({"requirements.txt": "flask==2.0\n", "src/x.py": "pass\n"}))
+    assert detect_port(snapshot) == 5000
+
+
+def test_code_and_dockerfile_parsers():
+    code = (
+        "PORT = int(os.environ.get('PORT', '8080'))\n"
+        "server.listen(3000)\n"
+        "HTTP_PORT = 9090\n"
+    )
+    assert [(c.port, c.kind, c.line) for c in parse_code("server.py", code)] == [
+        (8080, "code_env_default", 1), (3000, "code_server", 2), (9090, "code_constant", 3),
+    ]
+    dockerfile = (
+        "FROM node:20\n"
+        "ENV PORT=3000 NODE_ENV=production\n"
+        "EXPOSE 3000 9229/udp\n"
+        'CMD ["gunicorn", "-b", "0.0.0.0:8000", \\\n     "app:app"]\n'
+    )
+    assert [(c.port, c.kind, c.line) for c in parse_dockerfile("Dockerfile", dockerfile)] == [
+        (3000, "dockerfile_env", 2), (3000, "dockerfile_expose", 3), (9229, "dockerfile_expose", 3),
+        (8000, "dockerfile_cmd", 4),
+    ]
+
+
+@pytest.mark.parametrize("mode", ["sparse", "full"])
+def test_nested_config_files_are_fetched_in_every_mode(mode, make_remote, tmp_path):
+    """Les fichiers retenus par file_kind, à toute profondeur, sont extraits par le checkout partiel."""
+    url = make_remote({
+        "services/api/docker-compose.prod.yml": "services:\n  api:\n    ports:\n      - 8080:81\n",
+        "services/web/Dockerfile.prod": "FROM nginx\nEXPOSE 8443\n",
+        "config/.env.production": "PORT=5001\n",
+        "deploy/Procfile": "web: gunicorn app:app --bind 0.0.0.0:7000\n",
+        "deploy/nginx/nginx.conf": "server {\n  listen 8081;\n}\n",
+        "README.md": "# app\n",
+    })
+    snapshot = clone_for_analysis(url, str(tmp_path / mode), mode=mode)
+    assert sorted((c.port, c.source) for c in detect_ports(snapshot)) == [
+        (81, "services/api/docker-compose.prod.yml"),
+        (5001, "config/.env.production"),
+        (7000, "deploy/Procfile"),
+        (8081, "deploy/nginx/nginx.conf"),
+        (8443, "services/web/Dockerfile.prod"),
+    ]
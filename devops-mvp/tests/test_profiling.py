@@ -0,0 +1,47 @@
+import os
+import pstats
+
+from fastapi.testclient import TestClient
+
+import main
+import profiling
+
+
+def test_profile_report(make_remote, tmp_path, monkeypatch):
+    """profile=1 ajoute le détail par étape, les fonctions coûteuses et le profil brut."""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    url = make_remote({"main.py": "from fastapi import FastAPI\napp = FastAPI()\n", "requirements.txt": "fastapi==0.104.1\n"})
+
+    result = TestClient(main.app).post("/analyze-repo", data={"repo_url": url, "profile": "1"}).json()
+    assert result["status"] == "success"
+    report = result["profile"]
+    stages = [stage["stage"] for stage in report["stages"]]
+    assert stages == ["clone", "language", "framework", "dependencies", "port", "pipeline", "complexity", "health", "costs", "cleanup"]
+    framework = next(stage for stage in report["stages"] if stage["stage"] == "framework")
+    assert framework["files_opened"] >= 1 and framework["bytes_read"] > 0
+    assert report["files_opened"] == sum(stage["files_opened"] for stage in report["stages"])
+    assert report["peak_memory_bytes"] > 0
+    assert report["top_functions"]
+    # Nom du fichier seulement : le dossier du serveur n'est pas divulgué
+    assert os.sep not in report["raw_profile"]
+    assert pstats.Stats(str(tmp_path / "profiles" / report["raw_profile"])).total_calls > 0
+
+
+def test_raw_profiles_are_opt_in_and_rotated(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", "")
+    with profiling.AnalysisProfiler() as profiler:
+        sum(range(10))
+    assert profiler.report()["raw_profile"] is None
+
+    names = []
+    for _ in range(5):
+        with profiling.AnalysisProfiler(profile_dir=str(tmp_path), max_files=3) as profiler:
+            sum(range(10))
+        names.append(profiler.dump())
+    assert sorted(os.listdir(tmp_path)) == sorted(names[-3:])
+
+
+def test_no_profile_by_default(make_remote):
+    url = make_remote({"main.py": "print('ok')\n"})
+    result = TestClient(main.app).post("/analyze-repo", data={"repo_url": url, "force": "true"}).json()
+    assert "profile" not in result
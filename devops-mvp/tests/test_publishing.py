@@ -0,0 +1,81 @@
+import subprocess
+
+import pytest
+from fastapi.testclient import TestClient
+
+import fetching
+import main
+from publishing import commit_files
+from workers import Repo
+
+
+@pytest.fixture(autouse=True)
+def committer(monkeypatch):
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "ci-bot")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "ci-bot@example.com")
+
+
+def _git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def test_commit_rewrites_only_the_parent_trees(tmp_path, make_remote):
+    bare = make_remote({
+        "main.py": "print('hi')\n",
+        ".github/workflows/ci.yml": "old\n",
+        ".github/CODEOWNERS": "* @team\n",
+        "src/app/models.py": "x = 1\n",
+    })[len("file://"):]
+    repo = Repo(bare)
+    parent = repo.git.rev_parse("main")
+    commit = commit_files(repo, parent, {".github/workflows/ci.yml": b"new\n", "docs/a/b.md": b"# B\n"}, "ci")
+    assert _git(bare, "show", f"{commit}:.github/workflows/ci.yml") == "new\n"
+    assert _git(bare, "show", f"{commit}:docs/a/b.md") == "# B\n"
+    # Les arbres non concernés sont repris tels quels
+    assert _git(bare, "rev-parse", f"{commit}:src") == _git(bare, "rev-parse", f"{parent}:src")
+    assert _git(bare, "diff", "--name-only", parent, commit).split() == [".github/workflows/ci.yml", "docs/a/b.md"]
+    assert _git(bare, "rev-parse", f"{commit}^").strip() == parent
+    # Contenu identique : pas de commit
+    assert commit_files(repo, commit, {".github/workflows/ci.yml": b"new\n"}, "ci") is None
+
+
+def test_setup_ci_never_checks_out_nor_fetches_blobs(make_remote, isolated_mirrors):
+    url = make_remote({"main.py": "print('hi')\n", "data/big.bin": "x" * (fetching.MAX_SOURCE_SIZE + 1)})
+    response = TestClient(main.app).post("/setup-ci", json={"repo_url": url})
+    assert response.status_code == 200, response.text
+    assert response.json()["branch"] == "main"
+    bare = url[len("file://"):]
+    assert _git(bare, "rev-parse", "main").strip() == response.json()["commit"]
+    assert ".github/workflows/ci.yml" in _git(bare, "ls-tree", "-r", "--name-only", "main").split()
+
+    # Miroir partiel : les blobs exclus par le filtre n'ont jamais été récupérés
+    mirror = isolated_mirrors.mirror_path(url)
+    missing = _git(mirror, "rev-list", "--objects", "--missing=print", "--all").split()
+    assert f"?{_git(bare, 'rev-parse', 'main:data/big.bin').strip()}" in missing
+    assert _git(mirror, "worktree", "list").count("\n") == 1
+
+    # Relancé, le workflow est déjà là : rien n'est poussé
+    again = TestClient(main.app).post("/setup-ci", json={"repo_url": url})
+    assert again.json()["message"] == "Workflow CI/CD déjà à jour."
+
+
+def test_setup_ci_opens_a_new_branch_from_a_shallow_clone(make_remote, monkeypatch):
+    monkeypatch.setattr(fetching, "FETCH_MODE", "shallow")
+    url = make_remote({"app.py": "print('hi')\n"})
+    bare = url[len("file://"):]
+    head = _git(bare, "rev-parse", "main").strip()
+    client = TestClient(main.app)
+
+    response = client.post("/setup-ci", json={"repo_url": url, "branch": "ci/setup"})
+    assert response.status_code == 200, response.text
+    assert response.json()["branch"] == "ci/setup"
+    assert _git(bare, "rev-parse", "main").strip() == head
+    assert _git(bare, "rev-parse", "ci/setup^").strip() == head
+
+    # Jamais de push forcé : la branche existe déjà avec un autre commit
+    # (autre date, donc autre SHA que le premier)
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "2001-01-01T00:00:00")
+    assert client.post("/setup-ci", json={"repo_url": url, "branch": "ci/setup"}).status_code == 409
+    assert client.post("/setup-ci", json={"repo_url": url, "branch": "bad..name"}).status_code == 400
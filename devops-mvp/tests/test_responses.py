@@ -0,0 +1,80 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import responses
+from cache import AnalysisCache
+from jobs import JobManager
+from responses import negotiate
+from workers import AnalysisPool
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "job_manager", JobManager())
+    monkeypatch.setattr(main, "analysis_cache", AnalysisCache(db_path=""))
+    monkeypatch.setattr(main, "analysis_pool", AnalysisPool(max_workers=2, max_queue=2, timeout=30))
+    return TestClient(main.app)
+
+
+def test_negotiation_honours_quality_values_and_preference_order():
+    assert negotiate("gzip;q=0.5, br", ["br", "gzip"]) == "br"
+    assert negotiate("gzip, br;q=0.1", ["br", "gzip"]) == "gzip"
+    assert negotiate("*", ["br", "gzip"]) == "br"
+    assert negotiate("identity", ["br", "gzip"]) is None
+    assert negotiate("gzip;q=0", ["gzip"]) is None
+    assert negotiate("application/*;q=0.5, text/html", ["application/json"]) == "application/json"
+    assert negotiate(None, ["application/json"]) is None
+
+
+def test_if_none_match_returns_304_without_running_anything(client, make_remote, monkeypatch):
+    url = make_remote({"requirements.txt": "fastapi\n", "main.py": "app = FastAPI()\n"})
+    first = client.get("/analyze-repo", params={"repo_url": url})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag == f'W/"{main.ANALYZER_VERSION}-{first.json()["commit"]}"'
+
+    def fail(*args, **kwargs):
+        raise AssertionError("analyse relancée")
+    monkeypatch.setattr(main, "start_analysis", fail)
+    second = client.get("/analyze-repo", params={"repo_url": url}, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+
+
+def test_finished_job_supports_conditional_polling(client, make_remote):
+    url = make_remote({"app.py": "import flask\n"})
+    job_id = client.post("/jobs/analyze", json={"repo_url": url}).json()["job_id"]
+    client.get(f"/jobs/{job_id}/events")
+    response = client.get(f"/jobs/{job_id}")
+    assert response.json()["status"] == "succeeded"
+    assert client.get(f"/jobs/{job_id}", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_large_bodies_are_compressed(client, monkeypatch):
+    monkeypatch.setattr(responses, "COMPRESS_MIN_BYTES", 100)
+    monkeypatch.setattr(main, "start_analysis", lambda *args: main.job_manager.completed(
+        "key", "x", {"status": "success", "commit": "abc", "analysis": {"dependencies": ["pytest"] * 200}}))
+
+    response = client.post("/analyze-repo", data={"repo_url": "x"}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert int(response.headers["Content-Length"]) < len(json.dumps(response.json())) / 10
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    raw = client.post("/analyze-repo", data={"repo_url": "x"}, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in raw.headers
+    assert raw.json() == response.json()
+    assert gzip.decompress(responses.COMPRESSORS["gzip"](raw.content)) == raw.content
+
+
+def test_msgpack_is_negotiated(client, monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+    monkeypatch.setattr(main, "start_analysis", lambda *args: main.job_manager.completed(
+        "key", "x", {"status": "success", "commit": "abc", "analysis": {"ports": [(8000, "Dockerfile")]}}))
+    response = client.post("/analyze-repo", data={"repo_url": "x"}, headers={"Accept": "application/msgpack"})
+    assert response.headers["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["analysis"] == {"ports": [[8000, "Dockerfile"]]}
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+import scanning
+from main import CONTENT_SELECTORS, analyze_snapshot
+from snapshot import RepoSnapshot
+from workers import JobTimeout, job_deadline
+
+
+def _monorepo(make_repo):
+    files = {"requirements.txt": "flask==2.0\n", "README.md": "# demo\n"}
+    for n in range(40):
+        files[f"services/s{n % 4}/module_{n}.py"] = f'"""Module {n}."""\nimport requests\nfrom lib{n} import x\n'
+        files[f"tests/test_{n}.py"] = "def test_a():\n    pass\n\ndef test_b():\n    pass\n"
+    files["app.py"] = "from flask import Flask\napp = Flask(__name__)\napp.run(port=5001)\n"
+    files["assets/blob.py"] = b"\x00\x01binary"
+    return make_repo(files)
+
+
+def test_parallel_scan_matches_serial(make_repo, monkeypatch):
+    root = _monorepo(make_repo)
+    serial_snapshot = RepoSnapshot(root)
+    serial = scanning.scan_contents(serial_snapshot, CONTENT_SELECTORS, workers=1)
+
+    monkeypatch.setattr(scanning, "SCAN_PARALLEL_MIN_FILES", 1)
+    monkeypatch.setattr(scanning, "SCAN_CHUNK_FILES", 7)
+    parallel_snapshot = RepoSnapshot(root)
+    parallel = scanning.scan_contents(parallel_snapshot, CONTENT_SELECTORS, workers=2)
+
+    assert list(parallel) == list(serial)
+    assert parallel == serial
+    assert "assets/blob.py" not in parallel
+    assert parallel["tests/test_3.py"]["tests"] == 2
+    assert parallel_snapshot.files_read == serial_snapshot.files_read
+    # Analyse complète : mêmes résultats que le snapshot lu en série
+    monkeypatch.setattr(scanning, "SCAN_WORKERS", 2)
+    assert analyze_snapshot(RepoSnapshot(root)) == analyze_snapshot(serial_snapshot)
+
+
+def test_small_repositories_are_scanned_serially(make_repo, monkeypatch):
+    def no_pool(workers):
+        raise AssertionError("pool de processus démarré pour un petit repository")
+    monkeypatch.setattr(scanning, "_executor", no_pool)
+    snapshot = RepoSnapshot(make_repo({"main.py": "import requests\n"}))
+    facts = scanning.scan_contents(snapshot, CONTENT_SELECTORS, workers=8)
+    assert facts["main.py"]["imports"] == ("requests",)
+
+
+def test_scan_stops_at_the_job_deadline(make_repo, monkeypatch):
+    root = _monorepo(make_repo)
+    expired = time.monotonic() - 1
+    # Le processus de lecture reçoit l'échéance et s'arrête avant le premier fichier
+    items = [("app.py", 80, (("imports", None),))]
+    with pytest.raises(JobTimeout):
+        scanning._scan_chunk(root, items, expired)
+    assert scanning._scan_chunk(root, items, None)[1] == 1
+
+    monkeypatch.setattr(scanning, "SCAN_PARALLEL_MIN_FILES", 1)
+    for workers in (1, 2):
+        snapshot = RepoSnapshot(root)
+        with job_deadline(expired), pytest.raises(JobTimeout):
+            scanning.scan_contents(snapshot, CONTENT_SELECTORS, workers=workers)
+        assert snapshot.files_read == 0
+    # Le pool reste utilisable après l'interruption
+    assert scanning.scan_contents(RepoSnapshot(root), CONTENT_SELECTORS, workers=2)["tests/test_3.py"]["tests"] == 2
@@ -0,0 +1,30 @@
+from snapshot import RepoSnapshot
+
+
+def test_snapshot_skips_git_dir_only(make_repo):
+    """Le dossier .git est exclu, mais pas .github."""
+    path = make_repo({
+        ".git/HEAD": "ref: refs/heads/main\n",
+        ".github/workflows/ci.yml": "name: CI\n",
+        "pkg/mod.py": "x = 1\n",
+    })
+    snapshot = RepoSnapshot(path)
+    assert set(snapshot.files) == {".github/workflows/ci.yml", "pkg/mod.py"}
+    assert snapshot.is_dir("pkg") and not snapshot.exists(".git")
+
+def test_snapshot_reads_each_file_once(make_repo, monkeypatch):
+    """Le contenu est lu à la demande puis mémorisé."""
+    path = make_repo({"a.py": "import os\n"})
+    snapshot = RepoSnapshot(path)
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *a, **k: opened.append(a[0]) or real_open(*a, **k))
+    assert snapshot.read_text("a.py") == "import os\n"
+    assert snapshot.read_text("a.py") == "import os\n"
+    assert len(opened) == 1
+
+def test_snapshot_excludes_dirs(make_repo):
+    """Les dossiers exclus sont filtrés par composant de chemin."""
+    path = make_repo({"venv/lib/x.py": "", "src/venvtools.py": "", "src/y.py": ""})
+    names = {e.path for e in RepoSnapshot(path).iter_files(ext=".py", exclude_dirs=("venv",))}
+    assert names == {"src/venvtools.py", "src/y.py"}
@@ -0,0 +1,135 @@
+import hashlib
+import hmac
+import json
+import subprocess
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from cache import AnalysisCache
+from jobs import JobManager
+from webhooks import Push, PushCoalescer
+from workers import BACKGROUND, AnalysisPool
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "job_manager", JobManager())
+    monkeypatch.setattr(main, "analysis_cache", AnalysisCache(db_path=""))
+    monkeypatch.setattr(main, "analysis_pool", AnalysisPool(max_workers=2, max_queue=2, timeout=30))
+    return TestClient(main.app)
+
+
+def _push_payload(url, sha, ref="refs/heads/main"):
+    return {"ref": ref, "after": sha, "repository": {"clone_url": url, "default_branch": "main"}}
+
+
+def test_interactive_jobs_run_before_background_jobs():
+    pool = AnalysisPool(max_workers=1, max_queue=4, timeout=10, background_workers=1)
+    release, order = threading.Event(), []
+    blocker = pool.submit(release.wait, 5)
+    while pool.get_stats()["running"] < 1:
+        time.sleep(0.01)
+
+    background = pool.submit(order.append, "background", priority=BACKGROUND)
+    interactive = pool.submit(order.append, "interactive")
+    release.set()
+    for future in (blocker, background, interactive):
+        future.result(timeout=5)
+    assert order == ["interactive", "background"]
+
+
+def test_pushes_on_a_busy_branch_are_coalesced():
+    pool = AnalysisPool(max_workers=1, max_queue=4, timeout=10, background_workers=1)
+    release, analyzed = threading.Event(), []
+    blocker = pool.submit(release.wait, 5)
+    while pool.get_stats()["running"] < 1:
+        time.sleep(0.01)
+
+    coalescer = PushCoalescer(lambda fn, *args: pool.submit(fn, *args, priority=BACKGROUND),
+                              lambda url, sha: analyzed.append(sha) or "succeeded")
+    statuses = [coalescer.push(Push("https://example.com/a/b", sha, "refs/heads/main"))
+                for sha in ("aaaaaaa", "bbbbbbb", "ccccccc")]
+    assert statuses == ["scheduled", "coalesced", "coalesced"]
+    release.set()
+    blocker.result(timeout=5)
+    while coalescer.get_stats()["active"]:
+        time.sleep(0.01)
+    assert analyzed == ["ccccccc"]
+    assert coalescer.get_stats()["coalesced"] == 2
+
+
+def test_push_warms_cache_for_interactive_request(client, make_remote, monkeypatch):
+    monkeypatch.setattr(main, "push_coalescer", PushCoalescer(
+        lambda fn, *args: main.analysis_pool.submit(fn, *args, priority=BACKGROUND),
+        main.warm_analysis,
+    ))
+    url = make_remote({"requirements.txt": "fastapi\n", "main.py": "app = FastAPI()\n"})
+    sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=url[len("file://"):],
+                         check=True, capture_output=True, text=True).stdout.strip()
+
+    response = client.post("/webhooks/push", json=_push_payload(url, sha))
+    assert response.status_code == 202
+    assert response.json() == {"status": "scheduled", "repo_url": url, "commit": sha}
+    for _ in range(500):
+        if main.analysis_cache.get(AnalysisCache.make_key(url, sha, main.ANALYZER_VERSION)) is not None:
+            break
+        time.sleep(0.02)
+
+    result = client.post("/analyze-repo", data={"repo_url": url}).json()
+    assert result["cached"] is True
+    assert result["commit"] == sha
+
+
+def test_other_branches_and_bad_signatures_are_rejected(client, monkeypatch):
+    response = client.post("/webhooks/push", json=_push_payload("https://example.com/a/b", "a" * 40, "refs/heads/dev"))
+    assert response.status_code == 202
+    assert response.json()["status"] == "ignored"
+
+    monkeypatch.setattr("webhooks.WEBHOOK_SECRET", "s3cret")
+    body = json.dumps(_push_payload("https://example.com/a/b", "a" * 40, "refs/heads/dev")).encode()
+    assert client.post("/webhooks/push", content=body,
+                       headers={"X-Hub-Signature-256": "sha256=bad"}).status_code == 401
+    signature = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert client.post("/webhooks/push", content=body,
+                       headers={"X-Hub-Signature-256": signature}).status_code == 202
+
+
+def _git(cwd, *args):
+    return subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                          cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.mark.parametrize("mode", ["mirror", "sparse"])
+def test_warm_analysis_pins_the_pushed_commit(client, make_remote, tmp_path, monkeypatch, mode):
+    monkeypatch.setattr("fetching.FETCH_MODE", mode)
+    url = make_remote({"requirements.txt": "flask\n", "app.py": "from flask import Flask\n"})
+    pushed = _git(url[len("file://"):], "rev-parse", "HEAD")
+    # Un autre push est arrivé avant le démarrage de l'analyse
+    work = tmp_path / "remote_work"
+    (work / "package.json").write_text('{"dependencies": {"express": "4.0.0"}}')
+    _git(work, "add", "-A")
+    _git(work, "commit", "-q", "-m", "second")
+    _git(work, "push", "-q", url, "HEAD:main")
+
+    # SHA abrégé : résolu en SHA complet, la clé des demandes interactives
+    # (hors miroir, seul un commit en tête d'une référence peut être abrégé)
+    assert main.warm_analysis(url, pushed[:7] if mode == "mirror" else pushed) == "succeeded"
+    cached = main.analysis_cache.get(AnalysisCache.make_key(url, pushed, main.ANALYZER_VERSION))
+    assert cached is not None and "package.json" not in cached["lockfiles"]
+    assert main.analysis_cache.get(AnalysisCache.make_key(url, _git(work, "rev-parse", "HEAD"),
+                                                          main.ANALYZER_VERSION)) is None
+
+
+def test_branch_filter_applies_to_every_payload_shape(client, make_remote):
+    url = make_remote({"main.py": "print(1)\n"})
+    gitlab = {"ref": "refs/heads/dev", "after": "a" * 40, "project": {"default_branch": "main"},
+              "repository": {"git_http_url": url}}
+    generic = {"repo_url": url, "sha": "a" * 40, "ref": "refs/heads/dev"}
+    for payload in (gitlab, generic):
+        response = client.post("/webhooks/push", json=payload)
+        assert response.status_code == 202
+        assert response.json() == {"status": "ignored", "reason": "refs/heads/dev n'est pas la branche par défaut"}
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobManager
+from workers import AnalysisPool, DeadlineGit, JobTimeout, PoolFull
+
+
+def test_pool_rejects_when_queue_is_full():
+    """Au-delà des workers et de la file d'attente, la soumission est refusée."""
+    pool = AnalysisPool(max_workers=1, max_queue=1, timeout=5, retry_after=3)
+    release = threading.Event()
+    running = [pool.submit(release.wait), pool.submit(release.wait)]
+    with pytest.raises(PoolFull) as excinfo:
+        pool.submit(release.wait)
+    assert excinfo.value.retry_after == 3
+    release.set()
+    for future in running:
+        future.result(timeout=5)
+    assert pool.get_stats()["rejected"] == 1
+    # Les places sont libérées une fois les jobs terminés
+    assert pool.submit(lambda: "ok").result(timeout=5) == "ok"
+
+def test_deadline_kills_git_subprocess():
+    """Une commande git qui dépasse l'échéance du job est tuée."""
+    pool = AnalysisPool(max_workers=1, max_queue=0, timeout=0.5)
+    slow = ["git", "-c", "alias.slow=!sleep 30", "slow"]
+    start = time.monotonic()
+    with pytest.raises(JobTimeout):
+        pool.submit(DeadlineGit().execute, slow).result(timeout=10)
+    assert time.monotonic() - start < 5
+    assert pool.get_stats()["timeouts"] == 1
+
+def test_event_loop_stays_responsive_and_returns_429(monkeypatch):
+    """La page d'accueil répond pendant les analyses ; le surplus reçoit 429 + Retry-After."""
+    from fastapi.testclient import TestClient
+    import main
+
+    release = threading.Event()
+    monkeypatch.setattr(main, "analysis_pool", AnalysisPool(max_workers=1, max_queue=1, timeout=5, retry_after=7))
+    monkeypatch.setattr(main, "job_manager", JobManager())
+    monkeypatch.setattr(main, "analyze_repository_job", lambda repo_url, **kwargs: release.wait(5) and {"status": "success"})
+    client = TestClient(main.app)
+
+    responses = []
+    threads = [
+        # URLs distinctes : des demandes identiques partageraient le même job
+        threading.Thread(target=lambda i=i: responses.append(client.post("/analyze-repo", data={"repo_url": f"x{i}"})))
+        for i in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    while main.analysis_pool.get_stats()["running"] + main.analysis_pool.get_stats()["queued"] < 2:
+        time.sleep(0.01)
+
+    start = time.monotonic()
+    assert client.get("/").status_code == 200
+    assert time.monotonic() - start < 1
+
+    rejected = client.post("/analyze-repo", data={"repo_url": "x2"})
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "7"
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert [r.json()["status"] for r in responses] == ["success", "success"]
@@ -0,0 +1,149 @@
+import hashlib
+import hmac
+import os
+import re
+import threading
+from dataclasses import dataclass, replace
+
+from cache import normalize_repo_url
+from logs import get_logger
+from workers import PoolFull
+
+logger = get_logger("webhooks")
+
+# Secret partagé des webhooks GitHub (en-tête X-Hub-Signature-256) ; vide :
+# signature non vérifiée
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+_SHA = re.compile(r'^[0-9a-fA-F]{7,64}$')
+_NULL_SHA = re.compile(r'^0+$')
+
+
+@dataclass(frozen=True)
+class Push:
+    repo_url: str
+    sha: str
+    ref: str = None     # None : branche par défaut (payload générique)
+    skip: str = None    # raison pour laquelle le push ne déclenche rien
+    # Référence de la branche par défaut, si le payload la donne ; sinon, à
+    # lire sur le remote (voir on_branch)
+    default_ref: str = None
+
+
+def verify_signature(body, signature, secret=None):
+    """Vérifie la signature HMAC-SHA256 d'un webhook GitHub (toujours vraie sans secret)."""
+    secret = WEBHOOK_SECRET if secret is None else secret
+    if not secret:
+        return True
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+def parse_push(payload):
+    """Push décrit par un payload GitHub ou GitLab (`repository`, `ref`, `after`) ou générique (`repo_url`, `sha`).
+
+    Lève ValueError si le payload est incomplet.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Payload JSON attendu")
+    repository = payload.get("repository")
+    if isinstance(repository, dict):
+        repo_url = (repository.get("clone_url") or repository.get("git_http_url")
+                    or repository.get("git_url") or repository.get("url"))
+        sha, ref = payload.get("after"), payload.get("ref")
+        # GitLab : branche par défaut dans `project`
+        project = payload.get("project") if isinstance(payload.get("project"), dict) else {}
+        default_branch = repository.get("default_branch") or project.get("default_branch")
+    else:
+        repo_url, sha, ref = payload.get("repo_url"), payload.get("sha"), payload.get("ref")
+        default_branch = None
+    if not isinstance(repo_url, str) or not repo_url:
+        raise ValueError("URL du repository manquante")
+    if not isinstance(sha, str) or not _SHA.match(sha):
+        raise ValueError("SHA du commit manquant ou invalide")
+
+    if payload.get("deleted") or _NULL_SHA.match(sha):
+        return Push(repo_url, sha, ref, skip="branche supprimée")
+    push = Push(repo_url, sha.lower(), ref)
+    return on_branch(push, f"refs/heads/{default_branch}") if default_branch else push
+
+
+def on_branch(push, default_ref):
+    """`push`, ignoré s'il porte sur une autre branche que `default_ref`.
+
+    Seule la branche par défaut est analysée par /analyze-repo ; un push
+    sans `ref` (payload générique) est réputé la concerner.
+    """
+    if push.ref is not None and push.ref != default_ref:
+        return replace(push, default_ref=default_ref, skip=f"{push.ref} n'est pas la branche par défaut")
+    return replace(push, default_ref=default_ref)
+
+
+class PushCoalescer:
+    """Analyses d'arrière-plan déclenchées par les push, une par (repository, branche).
+
+    Tant que l'analyse d'une branche attend un worker, les push suivants ne
+    font que remplacer le commit à analyser ; un push reçu pendant l'analyse
+    en déclenche une seule autre, sur le dernier commit reçu.
+    """
+
+    def __init__(self, submit, analyze):
+        # submit(fn, *args) : soumission au pool en priorité basse
+        # analyze(repo_url, sha) : analyse (ou non, si déjà en cache) et renvoie un statut
+        self._submit = submit
+        self._analyze = analyze
+        self._pending = {}
+        self._active = set()
+        self._lock = threading.Lock()
+        self.stats = {"received": 0, "coalesced": 0, "scheduled": 0, "dropped": 0}
+
+    def push(self, push):
+        """Planifie l'analyse de `push` ; renvoie "scheduled" ou "coalesced"."""
+        key = (normalize_repo_url(push.repo_url), push.ref)
+        with self._lock:
+            self.stats["received"] += 1
+            self._pending[key] = push
+            if key in self._active:
+                self.stats["coalesced"] += 1
+                return "coalesced"
+            self._active.add(key)
+        self._schedule(key)
+        return "scheduled"
+
+    def _schedule(self, key):
+        try:
+            self._submit(self._run, key)
+        except PoolFull:
+            with self._lock:
+                self._active.discard(key)
+                self._pending.pop(key, None)
+                self.stats["dropped"] += 1
+            raise
+        with self._lock:
+            self.stats["scheduled"] += 1
+
+    def _run(self, key):
+        with self._lock:
+            push = self._pending.pop(key)
+        try:
+            status = self._analyze(push.repo_url, push.sha)
+            logger.info("Analyse d'arrière-plan de %s@%s: %s", push.repo_url, push.sha, status)
+            return status
+        except Exception as e:
+            # Personne n'attend le résultat : l'erreur est seulement journalisée
+            logger.error("Analyse d'arrière-plan de %s@%s en échec: %s", push.repo_url, push.sha, e)
+            return "error"
+        finally:
+            with self._lock:
+                again = key in self._pending
+                if not again:
+                    self._active.discard(key)
+            if again:
+                try:
+                    self._schedule(key)
+                except PoolFull:
+                    logger.warning("File d'arrière-plan pleine, push ignoré pour %s", push.repo_url)
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "pending": len(self._pending), "active": len(self._active)}
@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import itertools
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import git
+
+MAX_CONCURRENT_ANALYSES = int(os.getenv("MAX_CONCURRENT_ANALYSES", 4))
+# Nombre de jobs pouvant attendre un worker ; au-delà, la requête est refusée (429)
+MAX_QUEUED_ANALYSES = int(os.getenv("MAX_QUEUED_ANALYSES", 16))
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", 300))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", 10))
+# Workers que les jobs d'arrière-plan (webhooks) peuvent occuper : par défaut,
+# un worker reste toujours libre pour les demandes interactives
+BACKGROUND_MAX_WORKERS = int(os.getenv("BACKGROUND_MAX_WORKERS", max(MAX_CONCURRENT_ANALYSES - 1, 1)))
+BACKGROUND_MAX_QUEUED = int(os.getenv("BACKGROUND_MAX_QUEUED", 256))
+
+# Priorités des jobs : la file sert toujours les jobs interactifs en premier
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class PoolFull(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Trop d'analyses en cours, réessayez plus tard")
+        self.retry_after = retry_after
+
+
+class JobTimeout(Exception):
+    pass
+
+
+# Échéance du job exécuté par le thread courant (time.monotonic())
+_job = threading.local()
+
+
+def remaining_time():
+    """Secondes restantes avant l'échéance du job courant, None hors job."""
+    deadline = getattr(_job, "deadline", None)
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def current_deadline():
+    """Échéance (time.monotonic()) du job courant, None hors job."""
+    return getattr(_job, "deadline", None)
+
+
+@contextmanager
+def job_deadline(deadline):
+    """Exécute un bloc sous l'échéance `deadline`, transmise par un autre processus.
+
+    L'horloge monotone est commune aux processus d'une même machine : un
+    processus de lecture applique ainsi l'échéance du job qui l'emploie.
+    """
+    previous = getattr(_job, "deadline", None)
+    _job.deadline = deadline
+    try:
+        yield
+    finally:
+        _job.deadline = previous
+
+
+@contextmanager
+def suspended_deadline():
+    """Exécute un bloc (nettoyage) sans échéance, même si le job a expiré."""
+    deadline = getattr(_job, "deadline", None)
+    _job.deadline = None
+    try:
+        yield
+    finally:
+        _job.deadline = deadline
+
+
+def check_deadline():
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise JobTimeout("Délai d'analyse dépassé")
+
+
+class DeadlineGit(git.Git):
+    """Commande git tuée, avec tous ses sous-processus, à l'échéance du job courant.
+
+    Le kill_after_timeout de GitPython ne tue que les enfants directs : les
+    processus qu'ils lancent (index-pack, alias shell...) gardent les pipes
+    ouverts. La commande est donc lancée dans sa propre session et c'est le
+    groupe de processus entier qui est tué.
+    """
+
+    def execute(self, command, **kwargs):
+        remaining = remaining_time()
+        if remaining is None or kwargs.get("as_process") or kwargs.get("output_stream") is not None:
+            return super().execute(command, **kwargs)
+        if remaining <= 0:
+            raise JobTimeout("Délai d'analyse dépassé")
+
+        with_extended_output = kwargs.pop("with_extended_output", False)
+        with_exceptions = kwargs.pop("with_exceptions", True)
+        strip_newline = kwargs.pop("strip_newline_in_stdout", True)
+        stdout_as_string = kwargs.pop("stdout_as_string", True)
+        kwargs.pop("kill_after_timeout", None)
+        process = super().execute(command, as_process=True, start_new_session=True, **kwargs)
+        timed_out = threading.Event()
+        timer = threading.Timer(remaining, _kill_group, args=(process.proc, timed_out))
+        timer.daemon = True
+        timer.start()
+        try:
+            stdout, stderr = process.proc.communicate()
+        finally:
+            timer.cancel()
+        status = process.proc.returncode
+        if timed_out.is_set():
+            raise JobTimeout(f"Délai d'analyse dépassé: {' '.join(map(str, command[:2]))}")
+
+        if isinstance(stdout, bytes) and stdout_as_string:
+            stdout = stdout.decode("utf-8", errors="replace")
+        if strip_newline and stdout and stdout[-1:] in ("\n", b"\n"):
+            stdout = stdout[:-1]
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode("utf-8", errors="replace")
+        stderr = stderr.rstrip("\n") if stderr else ""
+        if with_exceptions and status != 0:
+            raise git.GitCommandError(command, status, stderr, stdout)
+        if with_extended_output:
+            return status, stdout, stderr
+        return stdout
+
+
+def _kill_group(process, timed_out):
+    if process.poll() is not None:
+        return
+    timed_out.set()
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, OSError):
+        process.kill()
+
+
+class Repo(git.Repo):
+    GitCommandWrapperType = DeadlineGit
+
+
+def clone_repo(repo_url, local_path, **options):
+    """Équivalent de git.Repo.clone_from soumis à l'échéance du job courant."""
+    args = []
+    for name, value in options.items():
+        flag = "--" + name.replace("_", "-")
+        if value is True:
+            args.append(flag)
+        elif value not in (None, False):
+            args.append(f"{flag}={value}")
+    DeadlineGit().clone(*args, "--", repo_url, local_path)
+    return Repo(local_path)
+
+
+class AnalysisPool:
+    """Exécute les analyses hors de la boucle d'événements.
+
+    Au plus `max_workers` jobs tournent en parallèle et `max_queue` jobs
+    interactifs attendent ; au-delà, `run` lève PoolFull sans rien exécuter.
+    Les jobs d'arrière-plan (BACKGROUND) ont leur propre file, ne démarrent
+    que lorsqu'aucun job interactif n'attend et n'occupent jamais plus de
+    `background_workers` workers. Chaque job dispose d'une échéance : les
+    commandes git en cours sont tuées lorsqu'elle est atteinte.
+    """
+
+    def __init__(self, max_workers=MAX_CONCURRENT_ANALYSES, max_queue=MAX_QUEUED_ANALYSES,
+                 timeout=ANALYSIS_TIMEOUT, retry_after=RETRY_AFTER_SECONDS,
+                 background_workers=BACKGROUND_MAX_WORKERS, background_queue=BACKGROUND_MAX_QUEUED):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.background_workers = max(min(background_workers, max_workers), 1)
+        self.background_queue = background_queue
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        # Tas (priorité, ordre d'arrivée, tâche) partagé par les workers
+        self._queue = []
+        self._sequence = itertools.count()
+        self._threads = []
+        self._lock = threading.Condition()
+        self.stats = {
+            "running": 0, "queued": 0, "completed": 0, "rejected": 0, "timeouts": 0,
+            "background_running": 0, "background_queued": 0, "background_rejected": 0,
+        }
+
+    def _next_task(self):
+        # Verrou tenu. Le tas place les jobs interactifs en tête : un job
+        # d'arrière-plan en tête signifie qu'aucun job interactif n'attend.
+        if not self._queue:
+            return None
+        if self._queue[0][0] == BACKGROUND and self.stats["background_running"] >= self.background_workers:
+            return None
+        return heapq.heappop(self._queue)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                task = self._next_task()
+                while task is None:
+                    self._lock.wait()
+                    task = self._next_task()
+                priority = task[0]
+                self.stats["queued"] -= 1
+                self.stats["running"] += 1
+                if priority == BACKGROUND:
+                    self.stats["background_queued"] -= 1
+                    self.stats["background_running"] += 1
+            self._call(*task)
+
+    def _call(self, priority, _, future, fn, args, timeout):
+        if future.set_running_or_notify_cancel():
+            _job.deadline = time.monotonic() + timeout
+            try:
+                future.set_result(fn(*args))
+            except JobTimeout as e:
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                future.set_exception(e)
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                _job.deadline = None
+        with self._lock:
+            self.stats["running"] -= 1
+            self.stats["completed"] += 1
+            if priority == BACKGROUND:
+                self.stats["background_running"] -= 1
+            self._lock.notify_all()
+        if priority == INTERACTIVE:
+            self._slots.release()
+
+    def submit(self, fn, *args, timeout=None, priority=INTERACTIVE):
+        """Soumet `fn(*args)` et renvoie un concurrent.futures.Future."""
+        if priority == INTERACTIVE and not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise PoolFull(self.retry_after)
+        future = Future()
+        with self._lock:
+            if priority == BACKGROUND:
+                if self.stats["background_queued"] >= self.background_queue:
+                    self.stats["background_rejected"] += 1
+                    raise PoolFull(self.retry_after)
+                self.stats["background_queued"] += 1
+            self.stats["queued"] += 1
+            heapq.heappush(self._queue, (priority, next(self._sequence), future, fn, args, timeout or self.timeout))
+            # Workers démarrés au premier job, comme ThreadPoolExecutor
+            while len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._work, name=f"analysis_{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._lock.notify()
+        return future
+
+    async def run(self, fn, *args, timeout=None, priority=INTERACTIVE):
+        return await asyncio.wrap_future(self.submit(fn, *args, timeout=timeout, priority=priority))
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "max_workers": self.max_workers, "max_queue": self.max_queue,
+                    "background_workers": self.background_workers}